@@ -7,6 +7,7 @@ import sympy
 import zipfile
 import logging
 import subprocess
+import multiprocessing
 import matplotlib
 import mpldatacursor
 import constants
@@ -24,6 +25,7 @@ from spectral_network import SolitonTree
 from parallel import parallel_get_spectral_network
 from parallel import parallel_get_improved_soliton_tree
 from parallel import get_improved_soliton_tree_child_process
+from parallel import get_n_processes
 # TODO: plotting.py will be deprecated; use plot_ui.py
 from plotting import NetworkPlot, NetworkPlotTk
 from plot_ui import SpectralNetworkPlotUI, SpectralNetworkPlotTk
@@ -303,7 +305,19 @@ class SpectralNetworkData:
         downsample=False,
         #downsample=True,
         downsample_ratio=None,
+        n_grow_threads=1,
+        n_joint_processes=1,
     ):
+        """
+        Generate spectral networks at the given phases.
+
+        n_processes is the number of processes for generating
+        multiple spectral networks in parallel. When generating
+        a single spectral network, n_grow_threads threads grow its
+        S-walls and n_joint_processes processes find its joints;
+        both default to 1, i.e. serial, and follow the convention
+        of n_processes for values <= 0.
+        """
         logger = logging.getLogger(self.logger_name)
 
         if cache_dir is not None and os.path.exists(cache_dir) is False:
@@ -374,12 +388,24 @@ class SpectralNetworkData:
                         )
                     else:
                         cache_file_path = None
+                    n_threads = get_n_processes(
+                        n_grow_threads,
+                        n_jobs=multiprocessing.cpu_count(),
+                        logger_name=self.logger_name,
+                    )
+                    n_joint_search_processes = get_n_processes(
+                        n_joint_processes,
+                        n_jobs=multiprocessing.cpu_count(),
+                        logger_name=self.logger_name,
+                    )
                     spectral_network.grow(
                         config=self.config, sw_data=self.sw_data,
                         cache_file_path=cache_file_path,
                         method=method,
                         downsample=downsample,
                         downsample_ratio=downsample_ratio,
+                        n_threads=n_threads,
+                        n_processes=n_joint_search_processes,
                     )
 
                     spectral_networks = [spectral_network]
@@ -5,6 +5,9 @@
 #include <CGAL/Sweep_line_2_algorithms.h>
 #include <vector>
 #include <list>
+#include <map>
+#include <algorithm>
+#include <cmath>
 
 #include "cgal_intersection.h"
 
@@ -59,3 +62,128 @@ extern "C" int find_intersections_of_curves(
 
     return num_of_intersections;
 }
+
+// An incidence of an intersection point on a segment of a curve.
+struct incidence {
+    long curve;
+    long segment;
+    double t;
+    double distance;
+};
+
+extern "C" int find_intersections_of_curve_set(
+    coordinate *points, long *curve_offsets, int num_of_curves,
+    double accuracy,
+    double *intersection_data, int max_num_of_intersections)
+{
+    // Find intersections among all the curves with a single sweep,
+    // where the n-th curve is points[curve_offsets[n]:curve_offsets[n+1]].
+    // Each intersection of two different curves is written as
+    //     x, y, curve_a, segment_a, t_a, curve_b, segment_b, t_b
+    // into intersection_data, where the intersection is at
+    //     (1 - t) * points[offset + segment] + t * points[offset + segment + 1]
+    // of each curve. Returns the number of the intersections.
+    Polyline_traits polyline_traits;
+    Polyline_traits::Construct_curve_2 construct_polyline =
+        polyline_traits.construct_curve_2_object();
+
+    std::vector<Polyline> polylines;
+    for(int n = 0; n < num_of_curves; n++){
+        coordinate *curve = points + curve_offsets[n];
+        long size_of_curve = curve_offsets[n + 1] - curve_offsets[n];
+        if(size_of_curve < 2)
+            continue;
+        std::vector<Point> curve_points;
+        curve_points.push_back(Point(curve[0].x, curve[0].y));
+        for(long i = 1; i < size_of_curve; i++){
+            Point p_i = Point(curve[i].x, curve[i].y);
+            if(p_i != curve_points.back()){
+                curve_points.push_back(p_i);
+            }
+        }
+        if(curve_points.size() < 2)
+            continue;
+        polylines.push_back(
+            construct_polyline(curve_points.begin(), curve_points.end())
+        );
+    }
+
+    std::list<Point> intersection_points;
+    CGAL::compute_intersection_points(polylines.begin(), polylines.end(),
+                                      std::back_inserter(intersection_points),
+                                      false, polyline_traits);
+
+    // Sort the intersection points by x to locate them on the segments.
+    std::vector<std::pair<double, double> > ips;
+    for(std::list<Point>::iterator it = intersection_points.begin();
+        it != intersection_points.end(); it++){
+        ips.push_back(std::make_pair(it->x(), it->y()));
+    }
+    std::sort(ips.begin(), ips.end());
+
+    // {index of an intersection point: {curve: incidence}}
+    std::vector<std::map<long, incidence> > incidences(ips.size());
+    for(int n = 0; n < num_of_curves; n++){
+        coordinate *curve = points + curve_offsets[n];
+        long size_of_curve = curve_offsets[n + 1] - curve_offsets[n];
+        for(long i = 0; i < size_of_curve - 1; i++){
+            double x_0 = curve[i].x, y_0 = curve[i].y;
+            double dx = curve[i + 1].x - x_0, dy = curve[i + 1].y - y_0;
+            double l2 = dx * dx + dy * dy;
+            if(l2 == 0)
+                continue;
+            double x_min = std::min(x_0, x_0 + dx) - accuracy;
+            double x_max = std::max(x_0, x_0 + dx) + accuracy;
+            double y_min = std::min(y_0, y_0 + dy) - accuracy;
+            double y_max = std::max(y_0, y_0 + dy) + accuracy;
+            std::vector<std::pair<double, double> >::iterator it =
+                std::lower_bound(ips.begin(), ips.end(),
+                                 std::make_pair(x_min, -HUGE_VAL));
+            for(; it != ips.end() && it->first <= x_max; it++){
+                if(it->second < y_min || it->second > y_max)
+                    continue;
+                double t = ((it->first - x_0) * dx + (it->second - y_0) * dy)
+                           / l2;
+                t = std::max(0.0, std::min(1.0, t));
+                double d_x = x_0 + t * dx - it->first;
+                double d_y = y_0 + t * dy - it->second;
+                double distance = std::sqrt(d_x * d_x + d_y * d_y);
+                if(distance > accuracy)
+                    continue;
+                // Keep the nearest segment of each curve.
+                std::map<long, incidence> &ip_incidences =
+                    incidences[it - ips.begin()];
+                std::map<long, incidence>::iterator found =
+                    ip_incidences.find(n);
+                if(found == ip_incidences.end() ||
+                   found->second.distance > distance){
+                    incidence inc = {n, i, t, distance};
+                    ip_incidences[n] = inc;
+                }
+            }
+        }
+    }
+
+    int num_of_intersections = 0;
+    for(size_t k = 0; k < ips.size(); k++){
+        std::map<long, incidence>::iterator a, b;
+        for(a = incidences[k].begin(); a != incidences[k].end(); a++){
+            for(b = a, b++; b != incidences[k].end(); b++){
+                if(num_of_intersections < max_num_of_intersections){
+                    double *data = intersection_data + 8 * num_of_intersections;
+                    data[0] = ips[k].first;
+                    data[1] = ips[k].second;
+                    data[2] = a->second.curve;
+                    data[3] = a->second.segment;
+                    data[4] = a->second.t;
+                    data[5] = b->second.curve;
+                    data[6] = b->second.segment;
+                    data[7] = b->second.t;
+                }
+                num_of_intersections++;
+            }
+        }
+    }
+
+    return num_of_intersections;
+}
@@ -6,3 +6,8 @@ extern "C" int find_intersections_of_curves(
     coordinate *curve_1, long curve_1_size,
     coordinate *curve_2, long curve_2_size,
     coordinate *intersections, int max_num_of_intersections);
+
+extern "C" int find_intersections_of_curve_set(
+    coordinate *points, long *curve_offsets, int num_of_curves,
+    double accuracy,
+    double *intersection_data, int max_num_of_intersections);
@@ -40,6 +40,12 @@ int grow(
 
     double min_d_from_bps;
     double min_d_from_pps;
+    // Safe radius of the proximity checks,
+    // see CriticalPointProximity in s_wall.py.
+    double horizon;
+    double complex z_ref;
+    double d_ref;
+    double d_lb;
     //double d;
     double dt;
     double f_dt;
@@ -48,14 +54,36 @@ int grow(
 
     msg->rv = 0;
 
+    horizon = np.size_of_bp_neighborhood;
+    if (np.size_of_pp_neighborhood > horizon)
+        horizon = np.size_of_pp_neighborhood;
+    if (np.size_of_puncture_cutoff > horizon)
+        horizon = np.size_of_puncture_cutoff;
+    z_ref = z[i];
+    d_ref = N_INF;
+
     while (i < (s_wall_size - 1)) {
         z_i = z[i];
         x_i_1 = x[i]._1;
         x_i_2 = x[i]._2;
         M_i = M[i];
 
-        min_d_from_pps = get_min_d(z_i, ppz, n_ppz);
-        min_d_from_bps = get_min_d(z_i, bpz, n_bpz);
+        // Scan the critical points only when z_i is outside
+        // the safe radius d_ref - horizon around z_ref.
+        d_lb = d_ref - cabs(z_i - z_ref);
+        if (d_lb >= horizon) {
+            min_d_from_pps = d_lb;
+            min_d_from_bps = d_lb;
+        } else {
+            min_d_from_pps = get_min_d(z_i, ppz, n_ppz);
+            min_d_from_bps = get_min_d(z_i, bpz, n_bpz);
+            z_ref = z_i;
+            if (min_d_from_bps < min_d_from_pps) {
+                d_ref = min_d_from_bps;
+            } else {
+                d_ref = min_d_from_pps;
+            }
+        }
 
         if (i > (MIN_NUM_OF_DATA_PTS - 1)) {
 /*
@@ -74,6 +102,15 @@ int grow(
                 msg->rv = MASS_LIMIT;
                 break;
             }
+
+            // Stop if z is moving away outside the growth domain.
+            if (
+                cabs(z_i) > np.growth_domain_radius &&
+                cabs(z_i) > cabs(z[i - 1])
+            ) {
+                msg->rv = OUT_OF_DOMAIN;
+                break;
+            }
         }
 
 /*
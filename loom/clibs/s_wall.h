@@ -13,6 +13,7 @@ typedef struct {
     double size_of_puncture_cutoff;
     double mass_limit;
     double accuracy;
+    double growth_domain_radius;
 } numerical_parameters;
 typedef struct {double start; double end;} twist_line;
 
@@ -21,6 +22,7 @@ typedef struct {double start; double end;} twist_line;
 #define MASS_LIMIT 2
 #define IN_P_NBHD 3
 #define OUT_P_NBHD 4
+#define OUT_OF_DOMAIN 5
 
 #define MIN_NUM_OF_DATA_PTS 3
 
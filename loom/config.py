@@ -52,11 +52,24 @@ class LoomConfig:
                     ('Size of a puncture neighborhood', None),
                 'size_of_puncture_cutoff': ('Size of a puncture cutoff', None),
                 'mass_limit': ('Mass limit', None),
+                'adaptive_step_tolerance':
+                    ('Tolerance of adaptive step sizes', None),
+                'growth_domain_margin':
+                    ('Margin of the growth domain', None),
                 'phase': ('Phase (single value or range)', None),
             },
             'settings': {
                 'trivialize': ('Trivialize spectral networks', True),
                 'use_scipy_ode': ('Use SciPy ODE solver', False),
+                'use_adaptive_step': ('Use adaptive step sizes', False),
+                # NOTE: This is a heuristic. An S-wall stops at the
+                # first step outside the disk of radius
+                # get_growth_domain_radius() where it moves away from
+                # the origin, although it may turn around and come
+                # back into the plot range; growth_domain_margin
+                # should be large enough for such S-walls.
+                'use_growth_domain':
+                    ('Stop S-walls outside the plot range', False),
             },
         }
 
@@ -9,6 +9,8 @@ F_SIZE_OF_LARGE_STEPS = 1e-1
 F_SIZE_OF_BP_NEIGHBORHOOD = .2
 F_SIZE_OF_PP_NEIGHBORHOOD = .4
 F_SIZE_OF_PUNCTURE_CUTOFF = 1e-2
+# Default margin of the growth domain relative to the plot range.
+F_GROWTH_DOMAIN_MARGIN = .5
 
 # Large numbers for infinity.
 N_INF = -1e308
@@ -19,6 +21,10 @@ LIB_C = 0
 LIB_SCIPY_ODE = 1
 LIB_NUMBA = 2
 LIB_PYTHON = 3
+# Grow all S-walls of an iteration together in lock-step.
+LIB_BATCH = 4
+# Adaptive step size using the Dormand-Prince method.
+LIB_ADAPTIVE = 5
 
 # NOTE: The following should have the same values as those in clibs/s_wall.h
 ERROR_SAME_XS = -1
@@ -28,10 +34,14 @@ MASS_LIMIT = 2
 #OUT_BP_NBHD = 4
 IN_P_NBHD = 3
 OUT_P_NBHD = 4
+OUT_OF_DOMAIN = 5
 
 # Additional error code for SciPy ODE
 ERROR_SCIPY_ODE = -2
 
+# Default tolerance of the local error when using adaptive step sizes.
+ADAPTIVE_STEP_TOLERANCE = 1e-6
+
 # Maximum # of steps when using Newton's method.
 NEWTON_MAX_STEPS = 100
 # Max # of steps to resolve the error of getting the same x's.
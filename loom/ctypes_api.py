@@ -8,6 +8,8 @@ from sympy import oo
 
 import constants
 
+from misc import get_growth_domain_radius
+
 numpy_ctypeslib_flags = ['C_CONTIGUOUS', 'ALIGNED']
 
 array_1d_int = numpy.ctypeslib.ndpointer(
@@ -16,6 +18,12 @@ array_1d_int = numpy.ctypeslib.ndpointer(
     flags=numpy_ctypeslib_flags,
 )
 
+array_1d_long = numpy.ctypeslib.ndpointer(
+    dtype=numpy.int64,
+    ndim=1,
+    flags=numpy_ctypeslib_flags,
+)
+
 array_1d_float = numpy.ctypeslib.ndpointer(
     dtype=numpy.float64,
     ndim=1,
@@ -64,6 +72,9 @@ class Message(ctypes.Structure):
     def out_p_nbhd(self):
         return self.rv == constants.OUT_P_NBHD
 
+    def out_of_domain(self):
+        return self.rv == constants.OUT_OF_DOMAIN
+
     def __str__(self):
         if self.error_same_xs():
             msg = 'x1 == x2'
@@ -75,6 +86,8 @@ class Message(ctypes.Structure):
             msg = 'inside the neighborhood of a point'
         elif self.out_p_nbhd():
             msg = 'outside the neighborhood of a point'
+        elif self.out_of_domain():
+            msg = 'left the growth domain'
         elif self.rv == 0:
             msg = 'successfully finished'
         else:
@@ -107,7 +120,8 @@ class NumericalParameters(ctypes.Structure):
         ('size_of_pp_neighborhood', ctypes.c_double),
         ('size_of_puncture_cutoff', ctypes.c_double),
         ('mass_limit', ctypes.c_double),
-        ('accuracy', ctypes.c_double)
+        ('accuracy', ctypes.c_double),
+        ('growth_domain_radius', ctypes.c_double),
     ]
 
 
@@ -245,20 +259,10 @@ class CTypesSWall:
         self.np.size_of_puncture_cutoff = config['size_of_puncture_cutoff']
         self.np.mass_limit = config['mass_limit']
         self.np.accuracy = config['accuracy']
+        self.np.growth_domain_radius = get_growth_domain_radius(config)
 
-        config_twist_lines = config['twist_lines']
-        if config_twist_lines is None:
-            twist_lines = []
-        else:
-            twist_lines = eval(config_twist_lines)
-        self.n_tl = len(twist_lines)
-        self.tl = numpy.empty([len(twist_lines), 2], dtype=numpy.float64)
-        for i, (s, e) in enumerate(twist_lines):
-            if s == -oo:
-                s = constants.N_INF
-            if e == oo:
-                e = constants.P_INF
-            self.tl[i] = (s, e)
+        self.tl = get_typed_twist_lines(config['twist_lines'])
+        self.n_tl = len(self.tl)
 
     def is_available(self):
         if self.clibs_s_wall_grow is None:
@@ -292,14 +296,61 @@ class CTypesSWall:
         )
 
 
-def libcgal_get_intersections():
+def get_typed_twist_lines(config_twist_lines):
+    """
+    Returns twist lines from the configuration as an (n_tl, 2) array
+    of [start, end], where +/-oo is replaced with constants.P_INF/N_INF.
+    """
+    if config_twist_lines is None:
+        twist_lines = []
+    else:
+        twist_lines = eval(config_twist_lines)
+    tl = numpy.empty([len(twist_lines), 2], dtype=numpy.float64)
+    for i, (s, e) in enumerate(twist_lines):
+        if s == -oo:
+            s = constants.N_INF
+        if e == oo:
+            e = constants.P_INF
+        tl[i] = (s, e)
+    return tl
+
+
+def get_linux_distribution(os_release_path='/etc/os-release'):
+    """
+    Return the name of the Linux distribution, or an empty string
+    when it cannot be determined. platform.linux_distribution()
+    is removed from Python 3.8, so read the name from os-release
+    when it is not available.
+    """
+    try:
+        return platform.linux_distribution()[0]
+    except AttributeError:
+        pass
+
+    try:
+        with open(os_release_path, 'r') as f:
+            for line in f:
+                key, sep, value = line.strip().partition('=')
+                if key == 'NAME':
+                    return value.strip('"\'')
+    except IOError:
+        pass
+
+    return ''
+
+
+def load_libcgal_intersection():
     lib_name = 'libcgal_intersection'
 
-    linux_distribution = platform.linux_distribution()[0]
+    linux_distribution = get_linux_distribution()
     if linux_distribution == 'Ubuntu':
         lib_name += '_ubuntu'
-    elif linux_distribution == 'debian':
-        # NOTE: Anaconda Python returns 'debian' instead of 'Ubuntu'.
+    elif (
+        linux_distribution == 'debian' or
+        linux_distribution.startswith('Debian')
+    ):
+        # NOTE: Anaconda Python returns 'debian' instead of 'Ubuntu',
+        # and os-release of Debian has 'Debian GNU/Linux'.
         lib_name += '_ubuntu'
     elif linux_distribution == 'Scientific Linux':
         lib_name += '_het-math2'
@@ -313,6 +364,12 @@ def libcgal_get_intersections():
          '/cgal_intersection/'),
     )
 
+    return libcgal_intersection
+
+
+def libcgal_get_intersections():
+    libcgal_intersection = load_libcgal_intersection()
+
     get_intersections = (libcgal_intersection.
                          find_intersections_of_curves)
 
@@ -326,3 +383,32 @@ def libcgal_get_intersections():
     ]
 
     return get_intersections
+
+
+def libcgal_get_intersections_of_curve_set():
+    """
+    Load find_intersections_of_curve_set() of the CGAL library,
+    which finds the intersections among many curves with a single
+    sweep, see cgal_intersection.cpp. Raises OSError when it is
+    not available, e.g. the library is built from an older source.
+    """
+    libcgal_intersection = load_libcgal_intersection()
+
+    try:
+        get_intersections = (libcgal_intersection.
+                             find_intersections_of_curve_set)
+    except AttributeError:
+        raise OSError(
+            'find_intersections_of_curve_set() is not in the CGAL library.'
+        )
+
+    get_intersections.restype = ctypes.c_int
+    get_intersections.argtypes = [
+        array_1d_complex,
+        array_1d_long,
+        ctypes.c_int,
+        ctypes.c_double,
+        array_2d_float, ctypes.c_int,
+    ]
+
+    return get_intersections
@@ -4,6 +4,9 @@ import logging
 import copy
 import json
 import mpmath
+import os
+import hashlib
+import tempfile
 
 from math import factorial
 from sympy import oo, I
@@ -41,8 +44,23 @@ mpmath.mp.dps = ROOT_FINDING_PRECISION
 DEFAULT_LARGE_STEP_SIZE = 0.01
 
 X_ROOTS_ACCURACY_FACTOR = 1e-4
+# Coefficients of a numerical discriminant smaller than this,
+# relative to the largest one, are regarded as zero.
+DISCRIMINANT_COEFF_TOLERANCE = 1e-10
 RAMIFICATION_PT_ANALYSIS_ACCURACY = 100
 
+# Directory of the cached GData, see GData.load_from_cache().
+# Set to None not to use the cache.
+G_DATA_CACHE_DIR = os.path.join(
+    os.path.expanduser('~'), '.loom', 'cache', 'g_data',
+)
+# Change this when the cached data changes.
+G_DATA_CACHE_VERSION = 1
+
+# See GData.get_lattice_key().
+LATTICE_KEY_MAX_DENOMINATOR = 12
+LATTICE_KEY_TOLERANCE = 1e-6
+
 
 class GData:
     """
@@ -77,10 +95,28 @@ class GData:
     def __init__(self, root_system=None, representation_str=None,
                  json_data=None, logger_name='loom'):
         self.logger_name = logger_name
+        # Cache of get_lattice_key().
+        self.lattice_key_matrix = None
+        # Caches of get_weight_pairs_table().
+        self.weight_pairs_table = None
+        self.ffr_weight_pairs_table = None
+        # Caches of get_root_index(), get_positive_root_index(),
+        # get_weight_index(), and get_root_sum_table().
+        self.root_indices = None
+        self.positive_root_indices = None
+        self.weight_indices = None
+        self.ffr_weight_indices = None
+        self.root_sum_table = None
+        # Caches of get_monodromy_matrix() and weyl_monodromy().
+        self.monodromy_matrices = {}
+        self.weyl_monodromy_images = {}
+        # NOTE: The caches are set before the data,
+        # because save_to_cache() uses them.
         if json_data is not None:
             self.set_from_json_data(json_data)
-        else:
+        elif self.load_from_cache(root_system, representation_str) is False:
             self.set_from_sage(root_system, representation_str)
+            self.save_to_cache(root_system, representation_str)
         self.root_color_map = self.get_root_color_map()
 
         self.data_attributes = [
@@ -129,6 +165,96 @@ class GData:
             json_data['weight_coefficients']
         )
 
+    def get_cache_file_path(self, root_system, representation_str):
+        """
+        Return the path of the cache file of the GData
+        for root_system and representation_str, named by
+        the hash of them.
+        """
+        key = json.dumps([
+            G_DATA_CACHE_VERSION, root_system,
+            str(eval(representation_str)),
+        ])
+        return os.path.join(
+            G_DATA_CACHE_DIR,
+            hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json',
+        )
+
+    def load_from_cache(self, root_system, representation_str):
+        """
+        Set the data from the cache file if it exists,
+        and return True if successful.
+        """
+        logger = logging.getLogger(self.logger_name)
+        if G_DATA_CACHE_DIR is None:
+            return False
+
+        file_path = self.get_cache_file_path(
+            root_system, representation_str
+        )
+        if not os.path.exists(file_path):
+            return False
+
+        try:
+            with open(file_path, 'r') as fp:
+                cache_data = json.load(fp)
+            self.set_from_json_data(cache_data['g_data'])
+            self.weight_pairs_table = {
+                self.get_lattice_key(root): pairs
+                for root, pairs in cache_data['weight_pairs']
+            }
+            self.ffr_weight_pairs_table = {
+                self.get_lattice_key(root): pairs
+                for root, pairs in cache_data['ffr_weight_pairs']
+            }
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                'Failed to load GData from {}: {}'.format(file_path, e)
+            )
+            self.weight_pairs_table = None
+            self.ffr_weight_pairs_table = None
+            return False
+
+        logger.info('Loaded GData from {}.'.format(file_path))
+        return True
+
+    def save_to_cache(self, root_system, representation_str):
+        """
+        Save the data with the weight pairs to the cache file.
+        """
+        logger = logging.getLogger(self.logger_name)
+        if G_DATA_CACHE_DIR is None:
+            return
+
+        file_path = self.get_cache_file_path(
+            root_system, representation_str
+        )
+        # Save the roots instead of their lattice keys.
+        cache_data = {
+            'g_data': self.get_json_data(),
+            'weight_pairs': [
+                [root.tolist(), self.ordered_weight_pairs(root)]
+                for root in self.roots
+            ],
+            'ffr_weight_pairs': [
+                [root.tolist(), self.ordered_weight_pairs(root, ffr=True)]
+                for root in self.roots
+            ],
+        }
+        try:
+            if not os.path.exists(G_DATA_CACHE_DIR):
+                os.makedirs(G_DATA_CACHE_DIR)
+            # Write to a temporary file and rename it,
+            # so that other processes do not read an incomplete file.
+            fd, tmp_file_path = tempfile.mkstemp(dir=G_DATA_CACHE_DIR)
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(cache_data, fp)
+            os.rename(tmp_file_path, file_path)
+        except (IOError, OSError) as e:
+            logger.warning(
+                'Failed to save GData to {}: {}'.format(file_path, e)
+            )
+
     def set_from_sage(self, root_system, representation_str):
         logger = logging.getLogger(self.logger_name)
         self.root_system = root_system
@@ -180,21 +306,43 @@ class GData:
         """
         Return list of pairs of weight indices.
         """
-        pairs = []
+        if self.get_root_index(root) is None:
+            return []
+        pairs = self.get_weight_pairs_table(ffr=ffr).get(
+            self.get_lattice_key(root), []
+        )
+        return [list(pair) for pair in pairs]
 
+    def get_weight_pairs_table(self, ffr=False):
+        """
+        Return a dict whose key is the lattice key of a root and whose value
+        is the list of pairs [i, j] of weight indices
+        such that weights[j] - weights[i] is the root.
+        """
         if ffr is False:
+            table = self.weight_pairs_table
             weights = self.weights
         elif ffr is True:
+            table = self.ffr_weight_pairs_table
             weights = self.ffr_weights
 
+        if table is not None:
+            return table
+
+        table = {}
         for i, w_1 in enumerate(weights):
             for j, w_2 in enumerate(weights):
-                # FIXME: Currently weights are arrays of floats,
-                # the following comparison may have a numerical issue.
-                if numpy.array_equal(w_2 - w_1, root):
-                    pairs.append([i, j])
+                root = w_2 - w_1
+                if self.get_root_index(root) is not None:
+                    table.setdefault(
+                        self.get_lattice_key(root), []
+                    ).append([i, j])
 
-        return pairs
+        if ffr is False:
+            self.weight_pairs_table = table
+        elif ffr is True:
+            self.ffr_weight_pairs_table = table
+        return table
 
     # XXX: rename this to apply_weyl_monodromy()
     def weyl_monodromy(
@@ -208,51 +356,192 @@ class GData:
         given, by specifying the corresponding argument.
         """
         if perm_matrix is None:
-            if reverse is False:
-                if direction == 'ccw':
-                    monodromy_matrix = br_loc.monodromy
-                elif direction == 'cw':
-                    monodromy_matrix = (
-                        numpy.linalg.inv(br_loc.monodromy).astype(int)
-                    )
-            elif reverse is True:
-                if direction == 'cw':
-                    monodromy_matrix = br_loc.monodromy
-                elif direction == 'ccw':
-                    monodromy_matrix = (
-                        numpy.linalg.inv(br_loc.monodromy).astype(int)
-                    )
-        else:
-            if reverse is False:
-                if direction == 'ccw':
-                    monodromy_matrix = perm_matrix
-                elif direction == 'cw':
-                    monodromy_matrix = (
-                        numpy.linalg.inv(perm_matrix).astype(int)
-                    )
-            elif reverse is True:
-                if direction == 'cw':
-                    monodromy_matrix = perm_matrix
-                elif direction == 'ccw':
-                    monodromy_matrix = (
-                        numpy.linalg.inv(perm_matrix).astype(int)
-                    )
+            perm_matrix = br_loc.monodromy
+
+        if reverse is False:
+            if direction == 'ccw':
+                inverse = False
+            elif direction == 'cw':
+                inverse = True
+        elif reverse is True:
+            if direction == 'cw':
+                inverse = False
+            elif direction == 'ccw':
+                inverse = True
+
+        m_key, monodromy_matrix = self.get_monodromy_matrix(
+            perm_matrix, inverse=inverse,
+        )
+        image_key = (m_key, inverse, self.get_lattice_key(root))
+        try:
+            return self.weyl_monodromy_images[image_key].copy()
+        except KeyError:
+            pass
 
         pair_0 = self.ordered_weight_pairs(root)[0]
         v_i_ind = pair_0[0]
         v_j_ind = pair_0[1]
         ordered_weights = self.weights
-        new_v_i = sum([
-            monodromy_matrix[k][v_i_ind] * v
-            for k, v in enumerate(ordered_weights)
-        ])
-        new_v_j = sum([
-            monodromy_matrix[k][v_j_ind] * v
-            for k, v in enumerate(ordered_weights)
-        ])
+        new_v_i = numpy.dot(monodromy_matrix[:, v_i_ind], ordered_weights)
+        new_v_j = numpy.dot(monodromy_matrix[:, v_j_ind], ordered_weights)
 
         new_root = new_v_j - new_v_i
-        return new_root
+        self.weyl_monodromy_images[image_key] = new_root
+        return new_root.copy()
+
+    def get_monodromy_matrix(self, perm_matrix, inverse=False):
+        """
+        Return a hashable key of a sheet permutation matrix
+        and the matrix as an integer array, or its inverse
+        if inverse is True. The inverse of an orthogonal matrix,
+        e.g. a permutation matrix, is its transpose.
+        """
+        m = numpy.rint(numpy.asarray(perm_matrix)).astype(int)
+        m_key = (m.shape, tuple(m.ravel().tolist()))
+        try:
+            m, m_inv = self.monodromy_matrices[m_key]
+        except KeyError:
+            if numpy.array_equal(
+                numpy.dot(m.T, m), numpy.identity(len(m), dtype=int)
+            ):
+                m_inv = m.T.copy()
+            else:
+                m_inv = numpy.rint(numpy.linalg.inv(m)).astype(int)
+            self.monodromy_matrices[m_key] = (m, m_inv)
+
+        if inverse is True:
+            return m_key, m_inv
+        else:
+            return m_key, m
+
+    def get_lattice_key(self, v):
+        """
+        Return a tuple of integers identifying a vector v
+        of the weight lattice, which is its coordinates
+        in self.weight_basis times a common denominator,
+        or the tuple of v itself when there is no such denominator.
+
+        Vectors that are not in the lattice may have the same key
+        as a vector in the lattice, therefore a vector found by its
+        key is compared with the given one, e.g. in get_root_index().
+        """
+        if self.lattice_key_matrix is None:
+            self.lattice_key_matrix = self.get_lattice_key_matrix()
+        if self.lattice_key_matrix is False:
+            return tuple(numpy.asarray(v, dtype=float).tolist())
+        return tuple(
+            numpy.rint(
+                numpy.dot(numpy.asarray(v, dtype=float),
+                          self.lattice_key_matrix)
+            ).astype(int).tolist()
+        )
+
+    def get_lattice_key_matrix(self):
+        """
+        Return a matrix that maps the roots and the weights
+        to integer coordinates, see get_lattice_key(),
+        or False if there is no such matrix.
+        """
+        logger = logging.getLogger(self.logger_name)
+        basis_inv = numpy.linalg.pinv(numpy.array(self.weight_basis,
+                                                  dtype=float))
+        coefficients = numpy.dot(
+            numpy.concatenate([
+                numpy.array(self.roots, dtype=float),
+                numpy.array(self.weights, dtype=float),
+                numpy.array(self.ffr_weights, dtype=float),
+            ]),
+            basis_inv,
+        )
+        for d in range(1, LATTICE_KEY_MAX_DENOMINATOR + 1):
+            if numpy.allclose(
+                d * coefficients, numpy.rint(d * coefficients),
+                atol=LATTICE_KEY_TOLERANCE,
+            ):
+                return d * basis_inv
+
+        logger.warning(
+            'The weights are not integral in the weight basis, '
+            'use their coordinates as their keys.'
+        )
+        return False
+
+    def get_root_index(self, root):
+        """
+        Return the index of a root in self.roots,
+        or None if it is not a root.
+        """
+        if self.root_indices is None:
+            self.root_indices = {
+                self.get_lattice_key(a_root): i
+                for i, a_root in enumerate(self.roots)
+            }
+        i = self.root_indices.get(self.get_lattice_key(root))
+        if i is None or not numpy.array_equal(self.roots[i], root):
+            return None
+        return i
+
+    def get_positive_root_index(self, root):
+        """
+        Return the index i of self.positive_roots such that
+        root = +/- self.positive_roots[i], or None if it is not a root.
+        """
+        if self.positive_root_indices is None:
+            self.positive_root_indices = {}
+            for i, p_root in enumerate(self.positive_roots):
+                self.positive_root_indices[self.get_lattice_key(p_root)] = i
+                self.positive_root_indices[self.get_lattice_key(-p_root)] = i
+        i = self.positive_root_indices.get(self.get_lattice_key(root))
+        if i is None or not (
+            numpy.array_equal(self.positive_roots[i], root) or
+            numpy.array_equal(-self.positive_roots[i], root)
+        ):
+            return None
+        return i
+
+    def get_weight_index(self, weight, ffr=False):
+        """
+        Return the index of a weight in self.weights,
+        or in self.ffr_weights if ffr is True,
+        or None if it is not a weight.
+        """
+        if ffr is False:
+            weights = self.weights
+            if self.weight_indices is None:
+                self.weight_indices = {
+                    self.get_lattice_key(w): i
+                    for i, w in enumerate(weights)
+                }
+            indices = self.weight_indices
+        elif ffr is True:
+            weights = self.ffr_weights
+            if self.ffr_weight_indices is None:
+                self.ffr_weight_indices = {
+                    self.get_lattice_key(w): i
+                    for i, w in enumerate(weights)
+                }
+            indices = self.ffr_weight_indices
+        i = indices.get(self.get_lattice_key(weight))
+        if i is None or not numpy.array_equal(weights[i], weight):
+            return None
+        return i
+
+    def get_root_sum_table(self):
+        """
+        Return a list whose i-th element is the set of the indices j
+        such that self.roots[i] + self.roots[j] is a root.
+        """
+        if self.root_sum_table is None:
+            table = [set() for root in self.roots]
+            for i, j in combinations(range(len(self.roots)), 2):
+                if (
+                    self.get_root_index(self.roots[i] + self.roots[j])
+                    is not None
+                ):
+                    table[i].add(j)
+                    table[j].add(i)
+            self.root_sum_table = table
+        return self.root_sum_table
 
     def get_root_color_map(self):
         """
@@ -278,12 +567,9 @@ class GData:
     def get_root_color(self, root):
         logger = logging.getLogger(self.logger_name)
 
-        for i, p_root in enumerate(self.positive_roots):
-            if (
-                numpy.array_equal(p_root, root) or
-                numpy.array_equal(-p_root, root)
-            ):
-                return self.root_color_map[i]
+        i = self.get_positive_root_index(root)
+        if i is not None:
+            return self.root_color_map[i]
 
         logger.warning('No color mapped for the root {}'
                        .format(root.tolist()))
@@ -634,6 +920,9 @@ class SWCurve:
                  expand=False):
         self.sym_eq = None
         self.num_eq = None
+        # Cache of get_typed_phi_k_czes(self.get_phi_k_czes()),
+        # see SWCurve.get_xs_batch().
+        self.typed_phi_k_czes = None
 
         if ffr is True:
             # Build a cover in the first fundamental representation.
@@ -673,6 +962,7 @@ class SWCurve:
         self.num_eq = (self.num_eq
                        .subs(z, z_rotation * z)
                        .evalf(n=ROOT_FINDING_PRECISION, chop=True))
+        self.typed_phi_k_czes = None
         return self
 
     def get_xs(self, z_0, use_sage=False):
@@ -683,10 +973,7 @@ class SWCurve:
             raise NotImplementedError
 
         if use_sage is False:
-            fx = self.num_eq.subs(z, z_0)
-            sym_poly = sympy.Poly(fx, x, domain='CC')
-            coeff_list = map(complex, sym_poly.all_coeffs())
-            return numpy.roots(coeff_list)
+            return self.get_xs_batch([z_0])[0]
         else:
             f_x_eq = self.num_eq.subs(z, z_0).evalf(n=ROOT_FINDING_PRECISION)
             f_x_roots = sage_subprocess.solve_single_eq_single_var(
@@ -696,13 +983,43 @@ class SWCurve:
             )
             return map(complex, f_x_roots)
 
+    def get_xs_batch(self, zs):
+        """
+        Return a numpy array whose i-th row is the x-coordinates
+        over z = zs[i], evaluating the coefficients of the curve
+        at all zs at once and finding the eigenvalues of
+        their companion matrices with a single numpy.linalg.eigvals().
+        The coefficients are of the monic polynomial, see
+        get_phi_k_czes().
+        """
+        if self.num_eq is None:
+            raise NotImplementedError
+
+        if self.typed_phi_k_czes is None:
+            self.typed_phi_k_czes = get_typed_phi_k_czes(
+                self.get_phi_k_czes()
+            )
+        return get_roots_of_monic_polynomials(
+            get_phis_at_zs(self.typed_phi_k_czes, zs)
+        )
+
     def get_phi_k_czes(self):
+        """
+        Return the coefficients phi_k(z) of the curve as a monic
+        polynomial x^N + sum_k phi_k(z) x^k, which the typed methods
+        and the C library assume, dividing the curve by the coefficient
+        of x^N when it is not 1.
+        """
         f = self.num_eq
         N = sympy.degree(f, x)
+        c_N = f.coeff(x, n=N)
         phi_k_n_czes = []
         phi_k_d_czes = []
         for k in range(N):
-            phi_k_n, phi_k_d = f.coeff(x, n=k).expand().as_numer_denom()
+            phi_k = f.coeff(x, n=k)
+            if c_N != 1:
+                phi_k = sympy.cancel(phi_k / c_N)
+            phi_k_n, phi_k_d = phi_k.expand().as_numer_denom()
             for z_monomial in phi_k_n.as_ordered_terms():
                 c_z, e_z = z_monomial.as_coeff_exponent(z)
                 phi_k_n_czes.append(
@@ -933,7 +1250,11 @@ class SWDataBase(object):
             get_ramification_points = (
                 get_ramification_points_multiplicity
             )
-        else:
+        elif method == 'resultant':
+            get_ramification_points = (
+                get_ramification_points_using_resultant
+            )
+        elif sage_subprocess.sage_is_available():
             logger.warning(
                 'Unknown or no method set to find ramification points.\n'
                 'Use system_of_eqs by default.'
@@ -941,6 +1262,26 @@ class SWDataBase(object):
             get_ramification_points = (
                 get_ramification_points_using_system_of_eqs
             )
+        else:
+            logger.warning(
+                'Unknown or no method set to find ramification points.\n'
+                'Use resultant by default.'
+            )
+            get_ramification_points = (
+                get_ramification_points_using_resultant
+            )
+
+        if (
+            method in ('discriminant', 'system_of_eqs') and
+            not sage_subprocess.sage_is_available()
+        ):
+            logger.warning(
+                'Sage is not available for {}, use resultant instead.'
+                .format(method)
+            )
+            get_ramification_points = (
+                get_ramification_points_using_resultant
+            )
 
         self.regular_punctures = get_punctures_from_config(
             config['regular_punctures'], 'regular puncture',
@@ -1812,6 +2153,214 @@ def get_ramification_points_using_discriminant(
     return sols
 
 
+def get_ramification_points_using_resultant(
+    curve=None,
+    diff_params=None,
+    mt_params=None,
+    accuracy=None,
+    punctures=None,
+    ramification_points=None,
+    branch_points=None,
+    g_data=None,
+    logger_name='loom',
+):
+    """
+    Find ramification points without Sage. The resultant
+    of f_n(x, z) and df_n/dx in x is obtained numerically as a polynomial
+    in z, its roots are found with numpy.roots(), and then each
+    ramification point (z_i, x_i) is polished with Newton's method
+    on {f_n = 0, df_n/dx = 0}.
+    """
+    logger = logging.getLogger(logger_name)
+    sols = []
+
+    f = (curve.sym_eq.subs(diff_params)
+         .evalf(n=ROOT_FINDING_PRECISION, chop=True))
+    # Make f into the form of f_n/f_d
+    f_n, f_d = sympy.cancel(f).as_numer_denom()
+    c_xz = get_xz_coefficients(f_n)
+
+    # Remove a factor of x^k, e.g. x^2 of a D-type curve,
+    # which makes the discriminant identically zero.
+    k = 0
+    while (
+        c_xz.shape[0] > k + 2 and
+        numpy.all(abs(c_xz[k]) < accuracy * X_ROOTS_ACCURACY_FACTOR)
+    ):
+        k += 1
+    if k > 0:
+        logger.info('Will work with the curve divided by x^{}.'.format(k))
+        c_xz = c_xz[k:]
+
+    z_roots = get_resultant_z_roots(c_xz)
+
+    # NOTE: gather() requires the comparison to return True,
+    # not numpy.bool_.
+    def is_same_z(a, b):
+        return bool(abs(a - b) < accuracy)
+    gathered_z_roots = gather(z_roots, is_same_z)
+
+    # In general x-roots of a multiple root have worse errors
+    # before polishing.
+    def is_near_x(a, b):
+        return bool(abs(a - b) < numpy.sqrt(accuracy))
+
+    for z_c in gathered_z_roots.keys():
+        # Check if z_c is one of the punctures.
+        is_puncture = False
+        for p in punctures:
+            if p.Ciz == oo:
+                continue
+            if abs(z_c - complex(p.Ciz)) < accuracy:
+                is_puncture = True
+        if is_puncture:
+            continue
+
+        x_cs = numpy.polynomial.polynomial.polyval(z_c, c_xz.T)
+        if abs(x_cs[-1]) < accuracy:
+            # An x-root goes to infinity at z_c.
+            logger.debug('Leading coefficient vanishes at z = {}.'
+                         .format(z_c))
+            continue
+
+        gathered_x_roots = gather(numpy.roots(x_cs[::-1]), is_near_x)
+        for x_c, xs in gathered_x_roots.iteritems():
+            m_x = len(xs)
+            if m_x == 1:
+                continue
+            z_i, x_i = polish_ramification_point(
+                c_xz, z_c, numpy.mean(xs),
+                accuracy * X_ROOTS_ACCURACY_FACTOR,
+                logger_name=logger_name,
+            )
+            if any(
+                abs(z_i - z_j) < accuracy and abs(x_i - x_j) < accuracy
+                for z_j, (x_j, m_x_j) in sols
+            ):
+                continue
+            sols.append([complex(z_i), (complex(x_i), m_x)])
+
+    if len(sols) == 0:
+        logger.warning('No ramification point is found.')
+
+    return sols
+
+
+def get_xz_coefficients(f_n):
+    """
+    Return a numpy array c of the coefficients of a polynomial
+    f_n(x, z) = sum_{i, j} c[i, j] x^i z^j.
+    """
+    f_P = sympy.Poly(f_n, x, z)
+    deg_x = f_P.degree(x)
+    deg_z = f_P.degree(z)
+    c_xz = numpy.zeros((deg_x + 1, deg_z + 1), dtype=complex)
+    for (i, j), c in f_P.terms():
+        c_xz[i, j] = complex(c)
+    return c_xz
+
+
+def get_resultant_z_roots(c_xz):
+    """
+    Find the roots of the resultant of f(x, z) and df/dx in x,
+    where c_xz is from get_xz_coefficients().
+
+    The resultant is evaluated at points on a circle of the z-plane
+    as the determinants of the Sylvester matrices, and the coefficients
+    of the resultant are obtained from the values with an FFT.
+    The radius of the circle is first 1, then the geometric mean
+    of the absolute values of the nonzero roots for a better conditioning.
+    """
+    c_dxz = numpy.polynomial.polynomial.polyder(c_xz, axis=0)
+    n_x = c_xz.shape[0] - 1
+    # Upper bound of the degree of the resultant in z.
+    n_z = (2 * n_x - 1) * (c_xz.shape[1] - 1)
+
+    radius = 1.0
+    for attempt in range(3):
+        zs = radius * numpy.exp(2j * pi * numpy.arange(n_z + 1) / (n_z + 1))
+        # Coefficients of f and df/dx, with the highest power of x first.
+        f_cs = numpy.polynomial.polynomial.polyval(zs, c_xz.T).T[:, ::-1]
+        df_cs = numpy.polynomial.polynomial.polyval(zs, c_dxz.T).T[:, ::-1]
+        sylvester = numpy.zeros(
+            (len(zs), 2 * n_x - 1, 2 * n_x - 1), dtype=complex
+        )
+        for k in range(n_x - 1):
+            sylvester[:, k, k:k + n_x + 1] = f_cs
+        for k in range(n_x):
+            sylvester[:, n_x - 1 + k, k:k + n_x] = df_cs
+        # Coefficients of the resultant as a polynomial in w = z / radius.
+        r_ws = numpy.fft.fft(numpy.linalg.det(sylvester)) / len(zs)
+
+        is_nonzero = (
+            abs(r_ws) > abs(r_ws).max() * DISCRIMINANT_COEFF_TOLERANCE
+        )
+        nonzero_ks = numpy.nonzero(is_nonzero)[0]
+        if len(nonzero_ks) == 0:
+            # The resultant is identically zero.
+            return []
+        k_min = nonzero_ks[0]
+        k_max = nonzero_ks[-1]
+        if k_max == k_min:
+            new_radius = radius
+        else:
+            new_radius = radius * (
+                abs(r_ws[k_min] / r_ws[k_max]) ** (1.0 / (k_max - k_min))
+            )
+        if attempt == 2 or abs(numpy.log(new_radius / radius)) < 1:
+            break
+        radius = new_radius
+
+    z_roots = list(radius * numpy.roots(r_ws[k_min:k_max + 1][::-1]))
+    # The resultant is divisible by z^k_min.
+    z_roots += [0j] * k_min
+    return z_roots
+
+
+def polish_ramification_point(
+    c_xz, z_0, x_0, accuracy, logger_name='loom',
+):
+    """
+    Polish a ramification point (z_0, x_0) of f(x, z) with Newton's method
+    on {f = 0, df/dx = 0}, where c_xz is from get_xz_coefficients().
+    """
+    logger = logging.getLogger(logger_name)
+    polyder = numpy.polynomial.polynomial.polyder
+    polyval2d = numpy.polynomial.polynomial.polyval2d
+
+    c_dx = polyder(c_xz, axis=0)
+    c_dz = polyder(c_xz, axis=1)
+    c_dxdx = polyder(c_dx, axis=0)
+    c_dxdz = polyder(c_dx, axis=1)
+
+    z_i = z_0
+    x_i = x_0
+    for step in range(ROOT_FINDING_MAX_STEPS):
+        F = numpy.array([polyval2d(x_i, z_i, c_xz), polyval2d(x_i, z_i, c_dx)])
+        J = numpy.array([
+            [polyval2d(x_i, z_i, c_dz), polyval2d(x_i, z_i, c_dx)],
+            [polyval2d(x_i, z_i, c_dxdz), polyval2d(x_i, z_i, c_dxdx)],
+        ])
+        try:
+            delta_z, delta_x = numpy.linalg.solve(J, -F)
+        except numpy.linalg.LinAlgError:
+            # J is singular at a ramification point of a higher order.
+            break
+        z_i += delta_z
+        x_i += delta_x
+        if max(abs(delta_z), abs(delta_x)) < accuracy:
+            break
+
+    if not (numpy.isfinite(z_i) and numpy.isfinite(x_i)):
+        logger.warning(
+            'Failed to polish the ramification point at z = {}, x = {}.'
+            .format(z_0, x_0)
+        )
+        return z_0, x_0
+
+    return z_i, x_i
+
+
 def get_ramification_points_from_branch_points(
     curve=None,
     diff_params=None,
@@ -2461,3 +3010,213 @@ if use_numba:
     get_xs_along_zs = numba.jit(nopython=True)(_get_xs_along_zs)
 else:
     get_xs_along_zs = _get_xs_along_zs
+
+
+def get_typed_phi_k_czes(phi_k_czes):
+    """
+    Convert phi_k_czes = (N, phi_k_n_czes, phi_k_d_czes)
+    from SWCurve.get_phi_k_czes() into a tuple of typed arrays,
+        (N, n_k, n_c, n_e, d_k, d_c, d_e),
+    which can be given to a function compiled by Numba in nopython mode.
+    """
+    N, phi_k_n_czes, phi_k_d_czes = phi_k_czes
+    typed_czes = [int(N)]
+    for czes in (phi_k_n_czes, phi_k_d_czes):
+        typed_czes += [
+            numpy.array([k for k, c, e in czes], dtype=numpy.int64),
+            numpy.array([c for k, c, e in czes], dtype=numpy.complex128),
+            numpy.array([e for k, c, e in czes], dtype=numpy.float64),
+        ]
+    return tuple(typed_czes)
+
+
+def _typed_f_df_at_zx(N, n_k, n_c, n_e, d_k, d_c, d_e, z_0, x_0):
+    """
+    Same as f_df_at_zx(), but the coefficients of the curve are
+    given as typed arrays from get_typed_phi_k_czes().
+    """
+    f_0 = x_0 ** N
+    df_0 = N * (x_0 ** (N - 1))
+    phi_ns = numpy.zeros(N, dtype=numpy.complex128)
+    phi_ds = numpy.zeros(N, dtype=numpy.complex128)
+
+    for i in range(len(n_k)):
+        phi_ns[n_k[i]] += n_c[i] * (z_0 ** n_e[i])
+
+    for i in range(len(d_k)):
+        phi_ds[d_k[i]] += d_c[i] * (z_0 ** d_e[i])
+
+    for k in range(N):
+        phi_k = phi_ns[k] / phi_ds[k]
+        f_0 += phi_k * (x_0 ** k)
+        if k > 0:
+            df_0 += k * phi_k * x_0 ** (k - 1)
+
+    return f_0, df_0
+
+
+if use_numba:
+    typed_f_df_at_zx = numba.jit(nopython=True)(_typed_f_df_at_zx)
+else:
+    typed_f_df_at_zx = _typed_f_df_at_zx
+
+
+def _typed_get_x(
+    N, n_k, n_c, n_e, d_k, d_c, d_e, z_0, x_0, accuracy, max_steps,
+):
+    """
+    Same as get_x(), but the coefficients of the curve are
+    given as typed arrays from get_typed_phi_k_czes().
+    """
+    step = 0
+    x_i = x_0
+    while(step < max_steps):
+        f_i, df_i = typed_f_df_at_zx(
+            N, n_k, n_c, n_e, d_k, d_c, d_e, z_0, x_i,
+        )
+        Delta = f_i / df_i
+        if abs(Delta) < accuracy:
+            break
+        else:
+            x_i -= Delta
+        step += 1
+    return x_i
+
+
+if use_numba:
+    typed_get_x = numba.jit(nopython=True)(_typed_get_x)
+else:
+    typed_get_x = _typed_get_x
+
+
+def get_phis_at_zs(typed_phi_k_czes, zs):
+    """
+    Return an array whose [k][i] element is the coefficient phi_k
+    of x^k of the curve at z = zs[i], where the coefficients of
+    the curve are given as typed arrays from get_typed_phi_k_czes().
+    """
+    N, n_k, n_c, n_e, d_k, d_c, d_e = typed_phi_k_czes
+    zs = numpy.asarray(zs, dtype=numpy.complex128)
+    phi_ns = numpy.zeros((N, len(zs)), dtype=numpy.complex128)
+    phi_ds = numpy.zeros((N, len(zs)), dtype=numpy.complex128)
+    for k, c, e in zip(n_k, n_c, n_e):
+        phi_ns[k] += c * (zs ** e)
+    for k, c, e in zip(d_k, d_c, d_e):
+        phi_ds[k] += c * (zs ** e)
+    return phi_ns / phi_ds
+
+
+def get_roots_of_monic_polynomials(phis):
+    """
+    Return an array whose i-th row is the roots of
+        x^N + phis[N - 1][i] x^(N - 1) + ... + phis[0][i],
+    which are the eigenvalues of the companion matrices
+    as in numpy.roots(), solved at once for all i.
+    """
+    N, n = phis.shape
+    companions = numpy.zeros((n, N, N), dtype=numpy.complex128)
+    companions[:, 0, :] = -phis[::-1].T
+    companions[:, range(1, N), range(N - 1)] = 1
+    return numpy.linalg.eigvals(companions)
+
+
+def get_x_batch(typed_phi_k_czes, zs, x_0s, accuracy, max_steps=100):
+    """
+    Vectorized version of get_x(): solve f(zs[i], x) = 0
+    using Newton's method from x = x_0s[i], for every i at once.
+    """
+    N = typed_phi_k_czes[0]
+    phis = get_phis_at_zs(typed_phi_k_czes, zs)
+
+    xs = numpy.array(x_0s, dtype=numpy.complex128)
+    converged = numpy.zeros(len(zs), dtype=bool)
+    for step in range(max_steps):
+        f = xs ** N
+        df = N * (xs ** (N - 1))
+        for k in range(N):
+            f += phis[k] * (xs ** k)
+            if k > 0:
+                df += k * phis[k] * (xs ** (k - 1))
+        Delta = f / df
+        converged |= (abs(Delta) < accuracy)
+        if converged.all():
+            break
+        xs = numpy.where(converged, xs, xs - Delta)
+    return xs
+
+
+def _typed_F_at_zx(N, n_k, n_c, n_e, d_k, d_c, d_e, z_0, x_0):
+    """
+    Calculate F(z_0, x_0) = -(df/dz) / (df/dx), i.e. dx/dz along a sheet,
+    where the coefficients of the curve are given as typed arrays
+    from get_typed_phi_k_czes().
+    """
+    phi_ns = numpy.zeros(N, dtype=numpy.complex128)
+    phi_ds = numpy.zeros(N, dtype=numpy.complex128)
+    dphi_ns = numpy.zeros(N, dtype=numpy.complex128)
+    dphi_ds = numpy.zeros(N, dtype=numpy.complex128)
+
+    for i in range(len(n_k)):
+        phi_ns[n_k[i]] += n_c[i] * (z_0 ** n_e[i])
+        if n_e[i] != 0:
+            dphi_ns[n_k[i]] += n_e[i] * n_c[i] * (z_0 ** (n_e[i] - 1))
+
+    for i in range(len(d_k)):
+        phi_ds[d_k[i]] += d_c[i] * (z_0 ** d_e[i])
+        if d_e[i] != 0:
+            dphi_ds[d_k[i]] += d_e[i] * d_c[i] * (z_0 ** (d_e[i] - 1))
+
+    df_dz = 0j
+    df_dx = N * (x_0 ** (N - 1))
+    for k in range(N):
+        phi_k = phi_ns[k] / phi_ds[k]
+        dphi_k = (
+            (dphi_ns[k] * phi_ds[k] - phi_ns[k] * dphi_ds[k]) /
+            (phi_ds[k] ** 2)
+        )
+        df_dz += dphi_k * (x_0 ** k)
+        if k > 0:
+            df_dx += k * phi_k * x_0 ** (k - 1)
+
+    return -df_dz / df_dx
+
+
+if use_numba:
+    typed_F_at_zx = numba.jit(nopython=True)(_typed_F_at_zx)
+else:
+    typed_F_at_zx = _typed_F_at_zx
+
+
+def _typed_ode_f(z_x1_x2_M, N, n_k, n_c, n_e, d_k, d_c, d_e, c_dz_dt,
+                 accuracy):
+    """
+    The right-hand side of the ODE for growing an S-wall,
+        dz/dt = c_dz_dt / (x_1 - x_2),
+        dx_i/dt = F(z, x_i) dz/dt,
+        dM/dt = 1,
+    where the coefficients of the curve are given as typed arrays
+    from get_typed_phi_k_czes().
+    """
+    z_i = z_x1_x2_M[0]
+    x1_i = z_x1_x2_M[1]
+    x2_i = z_x1_x2_M[2]
+    Dv = x1_i - x2_i
+    if abs(Dv) < accuracy:
+        raise RuntimeError('ode_f(): Dv is too small.')
+    dz_i_dt = c_dz_dt / Dv
+    dy_dt = numpy.empty(4, dtype=numpy.complex128)
+    dy_dt[0] = dz_i_dt
+    dy_dt[1] = typed_F_at_zx(
+        N, n_k, n_c, n_e, d_k, d_c, d_e, z_i, x1_i,
+    ) * dz_i_dt
+    dy_dt[2] = typed_F_at_zx(
+        N, n_k, n_c, n_e, d_k, d_c, d_e, z_i, x2_i,
+    ) * dz_i_dt
+    dy_dt[3] = 1
+    return dy_dt
+
+
+if use_numba:
+    typed_ode_f = numba.jit(nopython=True)(_typed_ode_f)
+else:
+    typed_ode_f = _typed_ode_f
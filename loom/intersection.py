@@ -13,6 +13,11 @@ from scipy.optimize import brentq, newton
 from sympy import Interval
 from itertools import combinations
 
+from misc import (
+    get_turning_points, get_chain_bboxes, get_splits_with_overlap,
+    bboxes_overlap,
+)
+
 
 class NoIntersection(Exception):
     """
@@ -115,7 +120,7 @@ def find_intersection_of_segments(segment_1, segment_2, accuracy=1e-1,
     f2 = interp1d(*segment_2)
 
     def delta_f12(x):
-        f1(x) - f2(x)
+        return f1(x) - f2(x)
 
     try:
         logging.debug('try brentq.')
@@ -151,3 +156,177 @@ def find_intersection_of_segments(segment_1, segment_2, accuracy=1e-1,
             raise NoIntersection()
 
     return [float(intersection_x), float(intersection_y)]
+
+
+def find_intersections_of_polylines(
+    a_zs, b_zs, accuracy=0, a_chains=None, b_chains=None,
+    return_segments=False,
+):
+    """
+    Find the intersections of two polylines on the complex plane,
+    each given as a 1-dim NumPy array of its vertices.
+
+    The polylines are split into monotone chains, and for each pair of
+    chains whose bounding boxes overlap within the accuracy, the pairs
+    of their line segments inside the overlap are tested at once.
+    As with the CGAL library, an intersection at an endpoint of both
+    polylines is not included.
+
+    a_chains and b_chains are (turning points, chain bounding boxes)
+    of the polylines, e.g. from SWall.get_chains(), and are calculated
+    when not given.
+
+    Returns an array of [x, y] of the intersections, of shape (n, 2).
+    When return_segments is True, returns an array of
+    [x, y, i_a, t_a, i_b, t_b] of shape (n, 6) instead, where
+    the intersection is at (1 - t_a) * a_zs[i_a] + t_a * a_zs[i_a + 1]
+    and at the same point of b_zs.
+    """
+    num_of_columns = 6 if return_segments is True else 2
+    a_zs = numpy.asarray(a_zs, dtype=numpy.complex128)
+    b_zs = numpy.asarray(b_zs, dtype=numpy.complex128)
+    if len(a_zs) < 2 or len(b_zs) < 2:
+        return numpy.empty((0, num_of_columns))
+
+    if a_chains is None:
+        a_tps = get_turning_points(a_zs)
+        a_chains = (a_tps, get_chain_bboxes(a_zs, a_tps))
+    a_tps, a_bboxes = a_chains
+
+    if b_chains is None:
+        b_tps = get_turning_points(b_zs)
+        b_chains = (b_tps, get_chain_bboxes(b_zs, b_tps))
+    b_tps, b_bboxes = b_chains
+
+    intersections = []
+    for (a_start, a_stop), a_bbox in zip(
+        get_splits_with_overlap(a_tps), a_bboxes
+    ):
+        for (b_start, b_stop), b_bbox in zip(
+            get_splits_with_overlap(b_tps), b_bboxes
+        ):
+            if not bboxes_overlap(a_bbox, b_bbox, accuracy):
+                continue
+            # The overlap of the bounding boxes.
+            window = [
+                max(a_bbox[0], b_bbox[0]) - accuracy,
+                min(a_bbox[1], b_bbox[1]) + accuracy,
+                max(a_bbox[2], b_bbox[2]) - accuracy,
+                min(a_bbox[3], b_bbox[3]) + accuracy,
+            ]
+            ips = find_intersections_of_line_segments(
+                a_zs, a_start, a_stop, b_zs, b_start, b_stop, window,
+            )
+            if len(ips) > 0:
+                intersections.append(ips)
+
+    if len(intersections) == 0:
+        return numpy.empty((0, num_of_columns))
+    return numpy.concatenate(intersections)[:, :num_of_columns]
+
+
+def get_line_segments_in_window(zs, start, stop, window):
+    """
+    Return the indices i of the line segments [zs[i], zs[i + 1]]
+    with start <= i < stop - 1 that overlap with the window
+    [x_min, x_max, y_min, y_max].
+    """
+    if stop is None:
+        stop = len(zs)
+    z_0s = zs[start:stop - 1]
+    z_1s = zs[start + 1:stop]
+    x_min, x_max, y_min, y_max = window
+    in_window = (
+        (numpy.minimum(z_0s.real, z_1s.real) <= x_max) &
+        (numpy.maximum(z_0s.real, z_1s.real) >= x_min) &
+        (numpy.minimum(z_0s.imag, z_1s.imag) <= y_max) &
+        (numpy.maximum(z_0s.imag, z_1s.imag) >= y_min)
+    )
+    return numpy.nonzero(in_window)[0] + start
+
+
+def find_intersections_of_line_segments(
+    a_zs, a_start, a_stop, b_zs, b_start, b_stop, window,
+):
+    """
+    Find the intersections between the line segments of two polylines
+    a_zs[a_start:a_stop] and b_zs[b_start:b_stop] inside the window
+    [x_min, x_max, y_min, y_max], testing all the pairs of the segments
+    at once. Returns an array of [x, y, i_a, t_a, i_b, t_b] of the
+    intersections, see find_intersections_of_polylines().
+
+    Each segment includes its starting point, and the last segment
+    of a polyline also includes its ending point, so that an
+    intersection at a vertex is found only once.
+    """
+    i_as = get_line_segments_in_window(a_zs, a_start, a_stop, window)
+    i_bs = get_line_segments_in_window(b_zs, b_start, b_stop, window)
+    if len(i_as) == 0 or len(i_bs) == 0:
+        return numpy.empty((0, 6))
+
+    # a(t) = p + t * r, b(u) = q + u * s, where 0 <= t, u <= 1.
+    p = a_zs[i_as][:, None]
+    r = (a_zs[i_as + 1] - a_zs[i_as])[:, None]
+    q = b_zs[i_bs][None, :]
+    s = (b_zs[i_bs + 1] - b_zs[i_bs])[None, :]
+
+    # cross(v, w) = v.real * w.imag - v.imag * w.real
+    denom = (r.conjugate() * s).imag
+    qp = q - p
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        t = (qp.conjugate() * s).imag / denom
+        u = (qp.conjugate() * r).imag / denom
+
+    a_first = (i_as == 0)[:, None]
+    a_last = (i_as == len(a_zs) - 2)[:, None]
+    b_first = (i_bs == 0)[None, :]
+    b_last = (i_bs == len(b_zs) - 2)[None, :]
+    found = (
+        (denom != 0) &
+        (t >= 0) & ((t < 1) | (a_last & (t == 1))) &
+        (u >= 0) & ((u < 1) | (b_last & (u == 1)))
+    )
+    # Exclude intersections at endpoints of both polylines.
+    at_a_endpoint = (a_first & (t == 0)) | (a_last & (t == 1))
+    at_b_endpoint = (b_first & (u == 0)) | (b_last & (u == 1))
+    found &= ~(at_a_endpoint & at_b_endpoint)
+
+    k_as, k_bs = numpy.nonzero(found)
+    ts = t[k_as, k_bs]
+    ips = p[k_as, 0] + ts * r[k_as, 0]
+    return numpy.column_stack((
+        ips.real, ips.imag, i_as[k_as], ts, i_bs[k_bs], u[k_as, k_bs],
+    ))
+
+
+def locate_point_on_polyline(zs, z):
+    """
+    Return (i, t) of the point (1 - t) * zs[i] + t * zs[i + 1]
+    on the line segments of a polyline that is nearest to z.
+    """
+    zs = numpy.asarray(zs, dtype=numpy.complex128)
+    if len(zs) < 2:
+        return (0, 0.0)
+    z_0s = zs[:-1]
+    dzs = zs[1:] - z_0s
+    l2s = (dzs * dzs.conjugate()).real
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        ts = ((z - z_0s) * dzs.conjugate()).real / l2s
+    ts = numpy.clip(numpy.where(l2s > 0, ts, 0), 0, 1)
+    i = int(numpy.argmin(abs(z_0s + ts * dzs - z)))
+    return (i, float(ts[i]))
+
+
+def locate_intersections(a_zs, b_zs, intersections):
+    """
+    Locate the intersections [[x, y], ...] of two polylines on their
+    line segments, returning an array of [x, y, i_a, t_a, i_b, t_b]
+    as find_intersections_of_polylines() with return_segments=True.
+    """
+    located = numpy.empty((len(intersections), 6))
+    for k, (ip_x, ip_y) in enumerate(intersections):
+        ip_z = ip_x + 1j * ip_y
+        i_a, t_a = locate_point_on_polyline(a_zs, ip_z)
+        i_b, t_b = locate_point_on_polyline(b_zs, ip_z)
+        located[k] = [ip_x, ip_y, i_a, t_a, i_b, t_b]
+    return located
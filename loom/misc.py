@@ -6,6 +6,8 @@ import sympy
 import warnings
 # import pdb
 
+import constants
+
 from fractions import Fraction
 from sympy import limit, oo
 from cmath import log
@@ -121,15 +123,9 @@ def nearest(a_list, value):
 
 
 def nearest_index(a_list, value):
-    min_d = float('+inf')
-    min_i = None
-    for i, item in enumerate(a_list):
-        d_i = abs(item - value)
-        if d_i < min_d:
-            min_d = d_i
-            min_i = i
-
-    return min_i
+    if len(a_list) == 0:
+        return None
+    return int(numpy.argmin(abs(numpy.asarray(a_list) - value)))
 
 
 def n_nearest(a_list, value, n):
@@ -297,14 +293,7 @@ def parse_sym_dict_str(string, multi_parameter=False):
 
 
 def is_root(np_array, g_data):
-    ans = False
-    for rt in list(g_data.roots):
-        if (np_array == rt).all():
-            ans = True
-            break
-        else:
-            pass
-    return ans
+    return g_data.get_root_index(np_array) is not None
 
 
 def get_descendant_roots(parent_roots, g_data):
@@ -346,24 +335,16 @@ def sort_roots(roots, g_data):
     assuming no repetition in roots, and assuming
     all the roots are either positive or negative.
     """
-    root_indices = range(len(roots))
-    sorted_roots = []
-    for g_data_root in g_data.positive_roots:
-        found = False
-        for i in root_indices:
-            if (
-                numpy.array_equal(g_data_root, roots[i]) or
-                numpy.array_equal(-g_data_root, roots[i])
-            ):
-                found = True
-                sorted_roots.append(roots[i])
-                break
-        if found is True:
-            root_indices.remove(i)
-        if len(root_indices) == 0:
-            break
-
-    return sorted_roots
+    positive_root_indices = [
+        g_data.get_positive_root_index(root) for root in roots
+    ]
+    return [
+        roots[i] for i in sorted(
+            [i for i, p_i in enumerate(positive_root_indices)
+             if p_i is not None],
+            key=lambda i: positive_root_indices[i],
+        )
+    ]
 
 
 def is_weyl_monodromy(sheet_permutation_matrix, g_data):
@@ -388,27 +369,180 @@ def get_turning_points(zs):
     """
     Return a list of indices of turning points of a curve on the z-plane,
     i.e. dx/dy = 0 or dy/dx = 0, where x = z[t].real and y = z[t].imag.
-    """
-    tps = []
 
+    The curve between two adjacent turning points is a monotone chain,
+    i.e. both x and y are monotonic along it.
+    """
+    zs = numpy.asarray(zs)
     if len(zs) < 3:
-        return tps
+        return []
 
-    x_0 = zs[0].real
-    y_0 = zs[0].imag
+    dxs = numpy.diff(zs.real)
+    dys = numpy.diff(zs.imag)
+    is_tp = (dxs[:-1] * dxs[1:] < 0) | (dys[:-1] * dys[1:] < 0)
+    return (numpy.nonzero(is_tp)[0] + 1).tolist()
 
-    for t in range(1, len(zs) - 1):
-        x_1 = zs[t].real
-        y_1 = zs[t].imag
-        x_2 = zs[t + 1].real
-        y_2 = zs[t + 1].imag
-        if (
-            (x_1 - x_0) * (x_2 - x_1) < 0 or (y_1 - y_0) * (y_2 - y_1) < 0
-        ):
-            tps.append(t)
-        x_0 = x_1
-        y_0 = y_1
-    return tps
+
+def get_chain_bboxes(zs, tps=None):
+    """
+    Return an array of the bounding boxes [x_min, x_max, y_min, y_max]
+    of the monotone chains of a curve on the z-plane, where the chains
+    are split at the turning points as in get_splits_with_overlap(tps).
+    """
+    zs = numpy.asarray(zs)
+    if len(zs) == 0:
+        return numpy.empty((0, 4))
+    if tps is None:
+        tps = get_turning_points(zs)
+
+    starts = numpy.array([0] + list(tps), dtype=int)
+    bboxes = numpy.empty((len(starts), 4))
+    for j, values in enumerate([zs.real, zs.imag]):
+        mins = numpy.minimum.reduceat(values, starts)
+        maxs = numpy.maximum.reduceat(values, starts)
+        # Each chain also includes the first point of the next one.
+        mins[:-1] = numpy.minimum(mins[:-1], values[starts[1:]])
+        maxs[:-1] = numpy.maximum(maxs[:-1], values[starts[1:]])
+        bboxes[:, 2 * j] = mins
+        bboxes[:, 2 * j + 1] = maxs
+    return bboxes
+
+
+def get_chains_in_range(tps, bboxes, t_i, t_f):
+    """
+    Given the turning points and the chain bounding boxes of a curve,
+    return those of the part of the curve from t_i to t_f, with the
+    turning points relative to t_i. The bounding box of a chain cut
+    at t_i or t_f is that of the whole chain, which contains the part.
+    """
+    tps = numpy.asarray(tps, dtype=int)
+    k_f = numpy.searchsorted(tps, t_f, side='left')
+    k_i = min(numpy.searchsorted(tps, t_i, side='right'), k_f)
+    return (tps[k_i:k_f] - t_i).tolist(), bboxes[k_i:k_f + 1]
+
+
+def bboxes_overlap(bbox_1, bbox_2, margin=0):
+    """
+    Check if two bounding boxes [x_min, x_max, y_min, y_max]
+    overlap within the margin.
+    """
+    return (
+        bbox_1[0] <= bbox_2[1] + margin and
+        bbox_2[0] <= bbox_1[1] + margin and
+        bbox_1[2] <= bbox_2[3] + margin and
+        bbox_2[2] <= bbox_1[3] + margin
+    )
+
+
+def get_union_bbox(bboxes):
+    """
+    Return the bounding box [x_min, x_max, y_min, y_max]
+    containing all the given bounding boxes.
+    """
+    bboxes = numpy.asarray(bboxes)
+    return numpy.array([
+        bboxes[:, 0].min(), bboxes[:, 1].max(),
+        bboxes[:, 2].min(), bboxes[:, 3].max(),
+    ])
+
+
+class BoundingBoxGrid:
+    """
+    A uniform grid of square cells on the z-plane for finding objects
+    whose bounding boxes [x_min, x_max, y_min, y_max] overlap given ones.
+
+    Each object is registered with an array of its bounding boxes to
+    every cell that one of them covers, except that a bounding box
+    covering more than max_cells cells is not registered to cells and
+    is instead tested against every query.
+    """
+    def __init__(self, cell_size, max_cells=64):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        # {(i, j): set of keys}
+        self.cells = {}
+        # {key: array of bounding boxes}
+        self.bboxes = {}
+        # {key: list of (i, j) of the cells of the key}
+        self.key_cells = {}
+        # Keys with a bounding box covering too many cells.
+        self.large_keys = set()
+
+    def get_cell_range(self, bbox, margin=0):
+        x_min, x_max, y_min, y_max = bbox
+        return (
+            int(numpy.floor((x_min - margin) / self.cell_size)),
+            int(numpy.floor((x_max + margin) / self.cell_size)),
+            int(numpy.floor((y_min - margin) / self.cell_size)),
+            int(numpy.floor((y_max + margin) / self.cell_size)),
+        )
+
+    def insert(self, key, bboxes):
+        """
+        Register an object with its bounding boxes, replacing
+        the bounding boxes when the object is already registered.
+        """
+        if key in self.bboxes:
+            self.remove(key)
+        self.bboxes[key] = bboxes
+        key_cells = set()
+        for bbox in bboxes:
+            i_0, i_1, j_0, j_1 = self.get_cell_range(bbox)
+            if (i_1 - i_0 + 1) * (j_1 - j_0 + 1) > self.max_cells:
+                self.large_keys.add(key)
+                continue
+            for i in range(i_0, i_1 + 1):
+                for j in range(j_0, j_1 + 1):
+                    key_cells.add((i, j))
+        for cell in key_cells:
+            self.cells.setdefault(cell, set()).add(key)
+        self.key_cells[key] = key_cells
+
+    def update(self, key, bboxes):
+        """
+        Insert the object unless it is registered
+        with the same array of bounding boxes.
+        """
+        if self.bboxes.get(key) is not bboxes:
+            self.insert(key, bboxes)
+
+    def remove(self, key):
+        for cell in self.key_cells.pop(key):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if len(keys) == 0:
+                del self.cells[cell]
+        self.large_keys.discard(key)
+        del self.bboxes[key]
+
+    def query(self, bboxes, margin=0):
+        """
+        Return the set of the keys of the objects with a bounding box
+        that overlaps one of the given bounding boxes within the margin.
+        """
+        candidates = set(self.large_keys)
+        for bbox in bboxes:
+            i_0, i_1, j_0, j_1 = self.get_cell_range(bbox, margin)
+            if (i_1 - i_0 + 1) * (j_1 - j_0 + 1) > self.max_cells:
+                # Test all the objects against a large bounding box.
+                candidates.update(self.bboxes.keys())
+                break
+            for i in range(i_0, i_1 + 1):
+                for j in range(j_0, j_1 + 1):
+                    candidates.update(self.cells.get((i, j), ()))
+
+        qs = numpy.asarray(bboxes)[:, None, :]
+        keys = set()
+        for key in candidates:
+            bs = self.bboxes[key][None, :, :]
+            if numpy.any(
+                (qs[..., 0] <= bs[..., 1] + margin) &
+                (bs[..., 0] <= qs[..., 1] + margin) &
+                (qs[..., 2] <= bs[..., 3] + margin) &
+                (bs[..., 2] <= qs[..., 3] + margin)
+            ):
+                keys.add(key)
+        return keys
 
 
 def get_splits_with_overlap(splits):
@@ -565,3 +699,34 @@ def build_family_tree(obj, tree=None):
         return None
 
     return tree
+
+
+def get_growth_domain_radius(config):
+    """
+    Returns the radius of the disk around the origin of the z-plane
+    outside of which S-walls stop growing when config['use_growth_domain']
+    is True, otherwise returns constants.P_INF.
+
+    The disk contains the plot range with a margin, and it is used
+    instead of the rectangle of the plot range because the z-plane
+    may be rotated around the origin for plotting.
+
+    An S-wall stops at the first step outside the disk where |z|
+    increases. This is a heuristic: an S-wall that leaves the disk
+    and comes back, e.g. one going around a branch point near the
+    boundary, is cut short, together with its descendants in the
+    plot range. Such S-walls need a larger growth_domain_margin,
+    or use_growth_domain set to False.
+    """
+    plot_range = config['plot_range']
+    if config['use_growth_domain'] is not True or plot_range is None:
+        return constants.P_INF
+
+    [[x_min, x_max], [y_min, y_max]] = plot_range
+    r_plot = max([
+        abs(complex(x, y)) for x in (x_min, x_max) for y in (y_min, y_max)
+    ])
+    margin = config['growth_domain_margin']
+    if margin is None:
+        margin = r_plot * constants.F_GROWTH_DOMAIN_MARGIN
+    return r_plot + margin
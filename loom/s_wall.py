@@ -1,4 +1,5 @@
 import logging
+import threading
 import numpy
 import scipy
 import sympy
@@ -11,21 +12,28 @@ from cmath import exp, pi
 from math import floor
 from scipy import interpolate
 from sympy import oo
+from multiprocessing.pool import ThreadPool
 
 from geometry import (
     find_xs_at_z_0, align_sheets_for_e_6_ffr, SHEET_NULL_TOLERANCE
 )
 from geometry import BranchPoint
-from geometry import get_x
+from geometry import (
+    get_typed_phi_k_czes, typed_get_x, get_x_batch, typed_F_at_zx,
+    typed_ode_f,
+)
 
 from ctypes_api import CTypesSWall
 from ctypes_api import Message
+from ctypes_api import get_typed_twist_lines
 
 from misc import (
     cpow, remove_duplicate, ctor2, r2toc, delete_duplicates, is_root,
     get_descendant_roots, sort_roots, n_nearest
 )
 from misc import nearest_index
+from misc import get_turning_points, get_chain_bboxes
+from misc import get_growth_domain_radius
 
 use_numba = True
 try:
@@ -47,6 +55,11 @@ SEED_PRECISION_MAX_DEPTH = 5
 # Minimum number of data points for each S-wall.
 MIN_NUM_OF_DATA_PTS = 3
 
+# Number of data points allocated for an S-wall when it is created.
+# The arrays are doubled in size when they are filled while growing it,
+# up to n_steps + 1 data points.
+INITIAL_ARRAY_SIZE = 256
+
 
 class Joint:
     def __init__(self, z=None, M=None, ode_xs=None, parents=None, roots=None,
@@ -136,13 +149,67 @@ class Joint:
         return True
 
 
+class JointIndex:
+    """
+    A spatial hash of joints for finding an existing joint equal to
+    a given one, see Joint.is_equal_to(). Joints are stored by their
+    roots and the cell of a square grid of size accuracy that contains
+    their z, so only the joints in the neighboring cells with the same
+    roots are compared.
+    """
+    def __init__(self, accuracy, joints=[]):
+        self.cell_size = float(accuracy)
+        # cells[(roots, i, j)] = [joint, ...]
+        self.cells = {}
+        for joint in joints:
+            self.insert(joint)
+
+    def get_cell(self, z):
+        return (
+            int(floor(z.real / self.cell_size)),
+            int(floor(z.imag / self.cell_size)),
+        )
+
+    def get_roots_key(self, joint):
+        if joint.roots is None:
+            return None
+        return tuple(tuple(root) for root in joint.roots)
+
+    def insert(self, joint):
+        i, j = self.get_cell(joint.z)
+        key = (self.get_roots_key(joint), i, j)
+        try:
+            self.cells[key].append(joint)
+        except KeyError:
+            self.cells[key] = [joint]
+
+    def find_equal(self, joint, accuracy, x_accuracy=None):
+        """
+        Return an existing joint equal to the given one,
+        or None if there is no such joint.
+        """
+        roots_key = self.get_roots_key(joint)
+        i, j = self.get_cell(joint.z)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                try:
+                    old_joints = self.cells[(roots_key, i + di, j + dj)]
+                except KeyError:
+                    continue
+                for old_joint in old_joints:
+                    if joint.is_equal_to(old_joint, accuracy, x_accuracy):
+                        return old_joint
+        return None
+
+
 class SWall(object):
     def __init__(self, z_0=None, x_0=None, M_0=None, parents=None,
                  parent_roots=None, label=None, n_steps=None,
                  logger_name='loom'):
         """
-        SWall.z is a NumPy array of length n_steps+1,
-        where z[t] is the base coordinate.
+        SWall.z is a NumPy array of length up to n_steps+1,
+        where z[t] is the base coordinate. The arrays are expanded
+        as needed while growing the S-wall, see SWall.expand().
 
         SWall.x is a Numpy array of the fiber coordinates at t, i.e.
         SWall.x[t] = [x[t][0], x[t][1], ...].
@@ -153,15 +220,18 @@ class SWall(object):
         self.logger_name = logger_name
         # FIXME: self.zs & self.xs instead of z & x?
         if n_steps is None:
+            self.max_array_size = None
             self.z = []
             self.x = []
             self.M = []
         else:
-            self.z = numpy.empty(n_steps + 1, numpy.complex128)
+            self.max_array_size = n_steps + 1
+            array_size = min(self.max_array_size, INITIAL_ARRAY_SIZE)
+            self.z = numpy.empty(array_size, numpy.complex128)
             self.x = numpy.empty(
-                n_steps + 1, (numpy.complex128, NUM_ODE_XS_OVER_Z)
+                array_size, (numpy.complex128, NUM_ODE_XS_OVER_Z)
             )
-            self.M = numpy.empty(n_steps + 1, numpy.float64)
+            self.M = numpy.empty(array_size, numpy.float64)
             self.z[0] = z_0
             self.x[0] = x_0
             self.M[0] = M_0
@@ -177,6 +247,14 @@ class SWall(object):
         self.multiple_local_roots = None
         # local_weight_pairs is a list of pair of intgers.
         self.local_weight_pairs = []
+        # c_dz_dt of the ODE used to grow this S-wall,
+        # i.e. dz/dM = c_dz_dt / (x[t][0] - x[t][1]). When this is given,
+        # the S-wall between data points is given by a cubic Hermite
+        # interpolation in M, see SWall.get_z_at().
+        self.c_dz_dt = None
+        # Cache of (z, turning points, chain bounding boxes),
+        # see SWall.get_chains().
+        self.chains = None
 
         self.data_attributes = [
             'z', 'M', 'x', 'parents', 'parent_roots', 'label',
@@ -189,6 +267,9 @@ class SWall(object):
 
     def set_z_rotation(self, z_rotation):
         self.z *= complex(z_rotation)
+        if self.c_dz_dt is not None:
+            self.c_dz_dt *= complex(z_rotation)
+        self.reset_chains()
 
     def __setitem__(self, t, data):
         """
@@ -210,10 +291,108 @@ class SWall(object):
         """
         Resize z & x arrays to discard garbage data.
         """
+        # NOTE: Release the reference to z in the cache,
+        # as an array cannot be resized in place when referenced.
+        self.reset_chains()
         self.z.resize((size))
         self.x.resize((size, NUM_ODE_XS_OVER_Z))
         self.M.resize((size))
 
+    def is_expandable(self):
+        return (
+            self.max_array_size is not None and
+            len(self.z) < self.max_array_size
+        )
+
+    def expand(self):
+        """
+        Double the size of the arrays, up to self.max_array_size,
+        keeping the data. Returns the new size.
+        """
+        size = min(2 * len(self.z), self.max_array_size)
+        self.resize(size)
+        return size
+
+    def has_dense_output(self):
+        return (self.c_dz_dt is not None)
+
+    def get_chains(self):
+        """
+        Returns (tps, bboxes), where tps is the list of the turning
+        points of z and bboxes is an array of the bounding boxes
+        [x_min, x_max, y_min, y_max] of the monotone chains between them.
+
+        The result is cached until z is replaced, resized, or rotated.
+        Call SWall.reset_chains() after modifying z in any other way.
+        """
+        if self.chains is None or self.chains[0] is not self.z:
+            tps = get_turning_points(self.z)
+            self.chains = (self.z, tps, get_chain_bboxes(self.z, tps))
+        return self.chains[1:]
+
+    def get_turning_points(self):
+        tps, bboxes = self.get_chains()
+        return tps
+
+    def reset_chains(self):
+        self.chains = None
+
+    def get_hermite_data(self, t):
+        """
+        Returns the coefficients [a_0, a_1, a_2, a_3] of the cubic
+        polynomial z(u) = a_0 + a_1 u + a_2 u^2 + a_3 u^3 interpolating
+        the S-wall between z[t] (u = 0) and z[t + 1] (u = 1),
+        using dz/dM at both ends.
+        """
+        z_0 = self.z[t]
+        z_1 = self.z[t + 1]
+        h = self.M[t + 1] - self.M[t]
+        m_0 = h * self.c_dz_dt / (self.x[t][0] - self.x[t][1])
+        m_1 = h * self.c_dz_dt / (self.x[t + 1][0] - self.x[t + 1][1])
+        return [
+            z_0,
+            m_0,
+            -3 * z_0 - 2 * m_0 + 3 * z_1 - m_1,
+            2 * z_0 + m_0 - 2 * z_1 + m_1,
+        ]
+
+    def get_z_at(self, t, u):
+        """
+        Returns z between z[t] and z[t + 1], where 0 <= u <= 1.
+        Uses the dense output if available, otherwise
+        a linear interpolation.
+        """
+        if not self.has_dense_output():
+            return self.z[t] + u * (self.z[t + 1] - self.z[t])
+        a_0, a_1, a_2, a_3 = self.get_hermite_data(t)
+        return a_0 + u * (a_1 + u * (a_2 + u * a_3))
+
+    def get_cut_crossing(self, t, x_r):
+        """
+        Returns u, 0 <= u <= 1, where the dense output of the S-wall
+        between z[t] and z[t + 1] crosses Re(z) = x_r.
+        Returns None if there is no such u.
+        """
+        if not self.has_dense_output():
+            return None
+        a_0, a_1, a_2, a_3 = self.get_hermite_data(t)
+        us = [
+            u.real for u in numpy.roots(
+                [a_3.real, a_2.real, a_1.real, a_0.real - x_r]
+            )
+            if abs(u.imag) < 1e-9 and 0 <= u.real <= 1
+        ]
+        if len(us) == 0:
+            return None
+        # Choose the crossing closest to that of the linear interpolation.
+        y_0 = self.z[t].real - x_r
+        y_1 = self.z[t + 1].real - x_r
+        if y_0 != y_1:
+            u_lin = y_0 / (y_0 - y_1)
+        else:
+            u_lin = 0.5
+        return min(us, key=lambda u: abs(u - u_lin))
+
     def get_json_data(self):
         json_data = {
             'z': numpy.array([self.z.real, self.z.imag]).T.tolist(),
@@ -374,12 +553,24 @@ class SWall(object):
         use_scipy_ode=True,
         method=None,
         twist_lines=None,
+        start_step=0,
+        stop_out_p_nbhd=False,
     ):
+        """
+        Grow the S-wall from self[start_step].
+
+        When stop_out_p_nbhd is True, stop growing when the S-wall is
+        outside the neighborhoods of branch points and punctures,
+        and return the step, see grow_s_walls_in_batch().
+        Otherwise return None after growing the S-wall.
+        """
         logger = logging.getLogger(self.logger_name)
         logger.info('Growing {}...'.format(self.label))
 
-        bpzs = branch_point_zs
-        ppzs = puncture_point_zs
+        proximity = CriticalPointProximity(
+            branch_point_zs, puncture_point_zs,
+            horizon=get_proximity_horizon(config),
+        )
         size_of_small_step = config['size_of_small_step']
         size_of_large_step = config['size_of_large_step']
         size_of_bp_neighborhood = config['size_of_bp_neighborhood']
@@ -387,6 +578,7 @@ class SWall(object):
         size_of_puncture_cutoff = config['size_of_puncture_cutoff']
         mass_limit = config['mass_limit']
         accuracy = config['accuracy']
+        growth_domain_radius = get_growth_domain_radius(config)
 
         array_size = len(self.z)
         
@@ -397,6 +589,8 @@ class SWall(object):
             method_in_p_nbhd = constants.LIB_SCIPY_ODE
             if use_scipy_ode:
                 method_out_p_nbhd = constants.LIB_SCIPY_ODE
+            elif config['use_adaptive_step']:
+                method_out_p_nbhd = constants.LIB_ADAPTIVE
             elif libs.ctypes_s_wall.is_available():
                 method_out_p_nbhd = constants.LIB_C
             elif libs.numba_grow is not None:
@@ -405,7 +599,7 @@ class SWall(object):
                 method_out_p_nbhd = constants.LIB_PYTHON
 
         current_method = None
-        step = 0
+        step = start_step
         finished = False
         # Failure counter. Stop when this becomes less than zero.
         count = 3
@@ -413,8 +607,7 @@ class SWall(object):
             logger.debug('step = {}'.format(step))
 
             z_i, _, _, _ = self[step]
-            min_d_from_bps = get_min_d(z_i, bpzs)
-            min_d_from_pps = get_min_d(z_i, ppzs)
+            min_d_from_bps, min_d_from_pps = proximity.get_min_ds(z_i)
             if (
                 min_d_from_bps < size_of_bp_neighborhood or
                 min_d_from_pps < size_of_pp_neighborhood
@@ -422,6 +615,10 @@ class SWall(object):
                 if current_method is None:
                     current_method = method_in_p_nbhd
                 stop_condition = constants.OUT_P_NBHD
+            elif stop_out_p_nbhd is True:
+                self.c_dz_dt = libs.c_dz_dt
+                self.reset_chains()
+                return step
             else:
                 if current_method is None:
                     current_method = method_out_p_nbhd
@@ -432,7 +629,9 @@ class SWall(object):
                     'Growing {} using C libraries...'
                     .format(self.label)
                 )
-                msg = libs.ctypes_s_wall.message
+                # NOTE: Use a new message for each call,
+                # as S-walls can be grown concurrently in threads.
+                msg = Message()
                 msg.s_wall_size = array_size
                 msg.step = step
                 msg.stop_condition = stop_condition 
@@ -450,189 +649,91 @@ class SWall(object):
                     'Growing {} using Numba...'
                     .format(self.label)
                 )
-                msg = libs.numba_grow(
-                    self.z, self.x, self.M,
-                    step=step,
-                    stop_condition=stop_condition,
-                    phi_k_czes=libs.phi_k_czes,
-                    max_steps=constants.NEWTON_MAX_STEPS,
-                    c_dz_dt=libs.c_dz_dt,
-                    bpzs=bpzs,
-                    ppzs=ppzs,
-                    size_of_small_step=size_of_small_step,
-                    size_of_large_step=size_of_large_step,
-                    size_of_bp_neighborhood=size_of_bp_neighborhood,
-                    size_of_pp_neighborhood=size_of_pp_neighborhood,
-                    size_of_puncture_cutoff=size_of_puncture_cutoff,
-                    mass_limit=mass_limit,
-                    accuracy=accuracy,
-                    twist_lines=libs.ctypes_s_wall.tl,
+                if mass_limit is None:
+                    numba_mass_limit = constants.P_INF
+                else:
+                    numba_mass_limit = float(mass_limit)
+                N, n_k, n_c, n_e, d_k, d_c, d_e = libs.typed_phi_k_czes
+                numba_step, numba_rv = libs.numba_grow(
+                    self.z, self.x, self.M, step, stop_condition,
+                    N, n_k, n_c, n_e, d_k, d_c, d_e,
+                    constants.NEWTON_MAX_STEPS,
+                    libs.c_dz_dt,
+                    proximity.bpzs,
+                    proximity.ppzs,
+                    size_of_small_step,
+                    size_of_large_step,
+                    size_of_bp_neighborhood,
+                    size_of_pp_neighborhood,
+                    size_of_puncture_cutoff,
+                    numba_mass_limit,
+                    accuracy,
+                    growth_domain_radius,
+                    libs.typed_twist_lines,
                 )
-
-            elif(
-                current_method == constants.LIB_SCIPY_ODE or
-                current_method == constants.LIB_PYTHON
-            ):
                 msg = Message()
-                msg.s_wall_size = len(self.z)
-                msg.step = step
+                msg.s_wall_size = array_size
+                msg.step = numba_step
                 msg.stop_condition = stop_condition
-                msg.rv = 0
-
-                get_xs = libs.get_xs
-
-                if current_method == constants.LIB_SCIPY_ODE:
-                    ode = libs.ode
-                    ode.set_initial_value(self[step])
-                    name = 'SciPy ODE'
-                else:
-                    dz_dt = libs.dz_dt
-                    name = 'Python libraries'
+                msg.rv = numba_rv
 
+            elif current_method == constants.LIB_ADAPTIVE:
                 logger.debug(
-                    'Growing {} using {}...'
-                    .format(self.label, name)
+                    'Growing {} using adaptive step sizes...'
+                    .format(self.label)
                 )
+                if mass_limit is None:
+                    adaptive_mass_limit = constants.P_INF
+                else:
+                    adaptive_mass_limit = float(mass_limit)
+                N, n_k, n_c, n_e, d_k, d_c, d_e = libs.typed_phi_k_czes
+                adaptive_step, adaptive_rv = libs.adaptive_grow(
+                    self.z, self.x, self.M, step, stop_condition,
+                    N, n_k, n_c, n_e, d_k, d_c, d_e,
+                    constants.NEWTON_MAX_STEPS,
+                    libs.c_dz_dt,
+                    proximity.bpzs,
+                    proximity.ppzs,
+                    size_of_small_step,
+                    size_of_large_step,
+                    size_of_bp_neighborhood,
+                    size_of_pp_neighborhood,
+                    size_of_puncture_cutoff,
+                    adaptive_mass_limit,
+                    accuracy,
+                    growth_domain_radius,
+                    libs.adaptive_step_tolerance,
+                )
+                msg = Message()
+                msg.s_wall_size = array_size
+                msg.step = adaptive_step
+                msg.stop_condition = stop_condition
+                msg.rv = adaptive_rv
 
-                while step < (array_size - 1):
-                    z_i, x_i_1, x_i_2, M_i = self[step]
-
-                    min_d_from_bps = get_min_d(z_i, bpzs)
-                    min_d_from_pps = get_min_d(z_i, ppzs)
-
-                    if step >= MIN_NUM_OF_DATA_PTS:
-                        if (min_d_from_pps < size_of_puncture_cutoff):
-                            # Stop if z is inside a cutoff of a puncture.
-                            msg.step = step
-                            msg.rv = constants.NEAR_PUNCTURE
-                            break
-                        elif (
-                            (mass_limit is not None) and
-                            (M_i > mass_limit)
-                        ):
-                            # Stop if M exceeds mass limit.
-                            msg.step = step
-                            msg.rv = constants.MASS_LIMIT
-                            break
-
-                    # Adjust the step size if z is near a branch point.
-                    step_size_factor = min([1.0, abs(x_i_1 - x_i_2)])
-                    if min_d_from_bps < size_of_bp_neighborhood:
-                        if stop_condition == constants.IN_P_NBHD:
-                            msg.step = step
-                            msg.rv = constants.IN_P_NBHD
-                            break
-                        else:
-                            dt = size_of_small_step * step_size_factor
-                    elif min_d_from_pps < size_of_pp_neighborhood:
-                        if stop_condition == constants.IN_P_NBHD:
-                            msg.step = step
-                            msg.rv = constants.IN_P_NBHD
-                            break
-                        else:
-                            dt = size_of_large_step * step_size_factor
-                    else:
-                        if stop_condition == constants.OUT_P_NBHD:
-                            msg.step = step
-                            msg.rv = constants.OUT_P_NBHD
-                            break
-                        else:
-                            dt = size_of_large_step * step_size_factor
-
-                    if (current_method == constants.LIB_SCIPY_ODE):
-                        y_n = ode.integrate(ode.t + dt)
-
-                        if not ode.successful():
-                            msg.step = step
-                            msg.rv = constants.ERROR_SCIPY_ODE
-                            logger.warning(
-                                '{} grow(): ode.integrate() failed at '
-                                't = {}; z_i = {}, x_i = ({}, {}). '
-                                .format(
-                                    self.label, step,
-                                    z_i, x_i_1, x_i_2,
-                                )
-                            )
-                            break
-
-                        z_n, x_n_1, x_n_2, M_n = y_n
-                        # SciPy ODE returns M as a complex number.
-                        M_n = M_n.real
-                        y_n = [z_n, x_n_1, x_n_2, M_n]
-
-                        # Check if this S-wall is near a twist line.
-                        if (
-                            twist_lines is not None and
-                            (z_i.imag * z_n.imag) < 0 and
-                            twist_lines.contains(
-                                (z_i.real + z_n.real) * 0.5
-                            )
-                        ):
-                            # xs_at_z_n = get_xs(z_n)
-                            # i_1 = nearest_index(xs_at_z_n, (-1 * x_i_2))
-                            # i_2 = nearest_index(xs_at_z_n, (-1 * x_i_1))
-                            # x_n_1 = xs_at_z_n[i_1]
-                            # x_n_2 = xs_at_z_n[i_2]
-                            # y_n = [z_n, x_n_1, x_n_2, M_n]
-                            #
-                            # if i_1 == i_2:
-                            #     msg.rv = constants.ERROR_SAME_XS
-                            # else:
-                            #     ode.set_initial_value(y_n)
-                            pass
-
-                    elif(current_method == constants.LIB_PYTHON):
-                        # Dx_i = x_i_1 - x_i_2
-                        # z_n = z_i + dt * exp(
-                        #     1j*(cmath.phase(libs.c_dz_dt) - cmath.phase(Dx_i))
-                        # )
-                        # M_n = M_i + abs(Dx_i) * dt
-                        z_n = z_i + dt * dz_dt(z_i, x_i_1, x_i_2)
-                        M_n = M_i + dt
-
-                        if (
-                            twist_lines is not None and
-                            (z_i.imag * z_n.imag) < 0 and
-                            twist_lines.contains(
-                                (z_i.real + z_n.real) * 0.5
-                            )
-                        ):
-                            # x_i_1, x_i_2 = (-1 * x_i_2), (-1 * x_i_1)
-                            pass
-
-                        xs_at_z_n = get_xs(z_n)
-                        i_1 = nearest_index(xs_at_z_n, x_i_1)
-                        i_2 = nearest_index(xs_at_z_n, x_i_2)
-
-                        x_n_1 = xs_at_z_n[i_1]
-                        x_n_2 = xs_at_z_n[i_2]
-                        y_n = [z_n, x_n_1, x_n_2, M_n]
-
-                        if i_1 == i_2:
-                            msg.rv = constants.ERROR_SAME_XS
-
-                    step += 1
-                    self[step] = y_n
-
-                    if msg.rv == constants.ERROR_SAME_XS:
-                        msg.step = step
-                        logger.warning(
-                            '{} grow(): failed to get x\'s at '
-                            't = {} near a twist line; '
-                            'z_n = {}, x_i = ({}, {}), '
-                            'xs_at_z_n = {}, i_1 == i_2 == {}.'
-                            .format(
-                                self.label, step,
-                                z_n, x_i_1, x_i_2, xs_at_z_n, i_1,
-                            )
+            elif(
+                current_method == constants.LIB_SCIPY_ODE or
+                current_method == constants.LIB_PYTHON
+            ):
+                if current_method == constants.LIB_SCIPY_ODE:
+                    # NOTE: SciPy's zvode keeps its state in Fortran
+                    # common blocks and is not re-entrant, so libs.ode
+                    # is locked for this phase of the growth, i.e.
+                    # until the S-wall leaves (or enters) a neighborhood
+                    # of a branch point or a puncture, or stops growing.
+                    # Unless config['use_scipy_ode'] is set, this is
+                    # only the part of the S-wall inside a neighborhood,
+                    # and threads growing other S-walls with a compiled
+                    # method are not blocked by it.
+                    with libs.ode_lock:
+                        msg = self.grow_using_python(
+                            step, stop_condition, current_method, libs,
+                            config, proximity, twist_lines,
                         )
-                        break
-
-                # End of inner while()
-
-                if step == (array_size - 1):
-                    msg.step = step
-                    finished = True
+                else:
+                    msg = self.grow_using_python(
+                        step, stop_condition, current_method, libs,
+                        config, proximity, twist_lines,
+                    )
             else:
                 logger.warning('SWall.grow(): no grow method specified.')
                 finished = True
@@ -644,9 +745,14 @@ class SWall(object):
             )
 
             if msg.rv == 0:
-                # Sucessfully finished.
-                finished = True
                 step = msg.step
+                if step == (array_size - 1) and self.is_expandable():
+                    # Filled the arrays; expand them and continue.
+                    finished = False
+                    array_size = self.expand()
+                else:
+                    # Sucessfully finished.
+                    finished = True
 
             elif msg.out_p_nbhd():
                 finished = False
@@ -658,7 +764,10 @@ class SWall(object):
                 current_method = method_in_p_nbhd
                 step = msg.step
 
-            elif msg.near_puncture() or msg.mass_limit():
+            elif (
+                msg.near_puncture() or msg.mass_limit() or
+                msg.out_of_domain()
+            ):
                 finished = True
                 new_size = msg.step + 1
                 if new_size < array_size:
@@ -698,6 +807,198 @@ class SWall(object):
             )
             self.resize(step + 1)
 
+        self.c_dz_dt = libs.c_dz_dt
+        self.reset_chains()
+
+
+    def grow_using_python(
+        self, step, stop_condition, current_method, libs, config,
+        proximity, twist_lines,
+    ):
+        """
+        Grow the S-wall from self[step] using SciPy ODE or Python
+        libraries, see grow(), and return the Message of the result.
+        """
+        logger = logging.getLogger(self.logger_name)
+        size_of_small_step = config['size_of_small_step']
+        size_of_large_step = config['size_of_large_step']
+        size_of_bp_neighborhood = config['size_of_bp_neighborhood']
+        size_of_pp_neighborhood = config['size_of_pp_neighborhood']
+        size_of_puncture_cutoff = config['size_of_puncture_cutoff']
+        mass_limit = config['mass_limit']
+        growth_domain_radius = get_growth_domain_radius(config)
+        array_size = len(self.z)
+
+        msg = Message()
+        msg.s_wall_size = array_size
+        msg.step = step
+        msg.stop_condition = stop_condition
+        msg.rv = 0
+
+        get_xs = libs.get_xs
+
+        if current_method == constants.LIB_SCIPY_ODE:
+            ode = libs.ode
+            ode.set_initial_value(self[step])
+            name = 'SciPy ODE'
+        else:
+            dz_dt = libs.dz_dt
+            name = 'Python libraries'
+
+        logger.debug(
+            'Growing {} using {}...'
+            .format(self.label, name)
+        )
+
+
+        while step < (array_size - 1):
+            z_i, x_i_1, x_i_2, M_i = self[step]
+
+            min_d_from_bps, min_d_from_pps = proximity.get_min_ds(z_i)
+
+            if step >= MIN_NUM_OF_DATA_PTS:
+                if (min_d_from_pps < size_of_puncture_cutoff):
+                    # Stop if z is inside a cutoff of a puncture.
+                    msg.step = step
+                    msg.rv = constants.NEAR_PUNCTURE
+                    break
+                elif (
+                    (mass_limit is not None) and
+                    (M_i > mass_limit)
+                ):
+                    # Stop if M exceeds mass limit.
+                    msg.step = step
+                    msg.rv = constants.MASS_LIMIT
+                    break
+                elif (
+                    abs(z_i) > growth_domain_radius and
+                    abs(z_i) > abs(self.z[step - 1])
+                ):
+                    # Stop if z is moving away outside
+                    # the growth domain.
+                    msg.step = step
+                    msg.rv = constants.OUT_OF_DOMAIN
+                    break
+
+            # Adjust the step size if z is near a branch point.
+            step_size_factor = min([1.0, abs(x_i_1 - x_i_2)])
+            if min_d_from_bps < size_of_bp_neighborhood:
+                if stop_condition == constants.IN_P_NBHD:
+                    msg.step = step
+                    msg.rv = constants.IN_P_NBHD
+                    break
+                else:
+                    dt = size_of_small_step * step_size_factor
+            elif min_d_from_pps < size_of_pp_neighborhood:
+                if stop_condition == constants.IN_P_NBHD:
+                    msg.step = step
+                    msg.rv = constants.IN_P_NBHD
+                    break
+                else:
+                    dt = size_of_large_step * step_size_factor
+            else:
+                if stop_condition == constants.OUT_P_NBHD:
+                    msg.step = step
+                    msg.rv = constants.OUT_P_NBHD
+                    break
+                else:
+                    dt = size_of_large_step * step_size_factor
+
+            if (current_method == constants.LIB_SCIPY_ODE):
+                y_n = ode.integrate(ode.t + dt)
+
+                if not ode.successful():
+                    msg.step = step
+                    msg.rv = constants.ERROR_SCIPY_ODE
+                    logger.warning(
+                        '{} grow(): ode.integrate() failed at '
+                        't = {}; z_i = {}, x_i = ({}, {}). '
+                        .format(
+                            self.label, step,
+                            z_i, x_i_1, x_i_2,
+                        )
+                    )
+                    break
+
+                z_n, x_n_1, x_n_2, M_n = y_n
+                # SciPy ODE returns M as a complex number.
+                M_n = M_n.real
+                y_n = [z_n, x_n_1, x_n_2, M_n]
+
+                # Check if this S-wall is near a twist line.
+                if (
+                    twist_lines is not None and
+                    (z_i.imag * z_n.imag) < 0 and
+                    twist_lines.contains(
+                        (z_i.real + z_n.real) * 0.5
+                    )
+                ):
+                    # xs_at_z_n = get_xs(z_n)
+                    # i_1 = nearest_index(xs_at_z_n, (-1 * x_i_2))
+                    # i_2 = nearest_index(xs_at_z_n, (-1 * x_i_1))
+                    # x_n_1 = xs_at_z_n[i_1]
+                    # x_n_2 = xs_at_z_n[i_2]
+                    # y_n = [z_n, x_n_1, x_n_2, M_n]
+                    #
+                    # if i_1 == i_2:
+                    #     msg.rv = constants.ERROR_SAME_XS
+                    # else:
+                    #     ode.set_initial_value(y_n)
+                    pass
+
+            elif(current_method == constants.LIB_PYTHON):
+                # Dx_i = x_i_1 - x_i_2
+                # z_n = z_i + dt * exp(
+                #     1j*(cmath.phase(libs.c_dz_dt) - cmath.phase(Dx_i))
+                # )
+                # M_n = M_i + abs(Dx_i) * dt
+                z_n = z_i + dt * dz_dt(z_i, x_i_1, x_i_2)
+                M_n = M_i + dt
+
+                if (
+                    twist_lines is not None and
+                    (z_i.imag * z_n.imag) < 0 and
+                    twist_lines.contains(
+                        (z_i.real + z_n.real) * 0.5
+                    )
+                ):
+                    # x_i_1, x_i_2 = (-1 * x_i_2), (-1 * x_i_1)
+                    pass
+
+                xs_at_z_n = get_xs(z_n)
+                i_1 = nearest_index(xs_at_z_n, x_i_1)
+                i_2 = nearest_index(xs_at_z_n, x_i_2)
+
+                x_n_1 = xs_at_z_n[i_1]
+                x_n_2 = xs_at_z_n[i_2]
+                y_n = [z_n, x_n_1, x_n_2, M_n]
+
+                if i_1 == i_2:
+                    msg.rv = constants.ERROR_SAME_XS
+
+            step += 1
+            self[step] = y_n
+
+            if msg.rv == constants.ERROR_SAME_XS:
+                msg.step = step
+                logger.warning(
+                    '{} grow(): failed to get x\'s at '
+                    't = {} near a twist line; '
+                    'z_n = {}, x_i = ({}, {}), '
+                    'xs_at_z_n = {}, i_1 == i_2 == {}.'
+                    .format(
+                        self.label, step,
+                        z_n, x_i_1, x_i_2, xs_at_z_n, i_1,
+                    )
+                )
+                break
+
+        # End of inner while()
+
+        if step == (array_size - 1):
+            msg.step = step
+        return msg
+
 
     def determine_root_types(self, sw_data, cutoff_radius=0,):
         """
@@ -739,7 +1040,14 @@ class SWall(object):
             br_loc_x = br_loc.z.real
             br_loc_y = br_loc.z.imag
 
-            if num_of_zs > MIN_NUM_OF_DATA_PTS:
+            if self.has_dense_output() and num_of_zs > 1:
+                # Find the data points right before the S-wall
+                # crosses the cut. The crossings are located
+                # using the dense output in enhance_at_cuts().
+                y = traj_z_r - br_loc_x
+                t_zeros = numpy.nonzero(y[:-1] * y[1:] < 0)[0].tolist()
+
+            elif num_of_zs > MIN_NUM_OF_DATA_PTS:
                 # If the length of the S-wall's coordinates
                 # is greater than 3, use the B-spline of SciPy
                 # to find the intersections between cuts and the S-wall.
@@ -1079,7 +1387,16 @@ class SWall(object):
 
             z_1 = self.z[t]
             z_2 = self.z[t + 1]
-            z_to_add = get_intermediate_z_point(z_1, z_2, br_loc.z)
+            u = self.get_cut_crossing(t, br_loc.z.real)
+            if u is None:
+                z_to_add = get_intermediate_z_point(z_1, z_2, br_loc.z)
+                M_to_add = get_intermediate_value(
+                    self.M[t], self.M[t + 1], z_1.real, z_2.real,
+                    z_to_add.real
+                )
+            else:
+                z_to_add = self.get_z_at(t, u)
+                M_to_add = self.M[t] + u * (self.M[t + 1] - self.M[t])
 
             xs_1 = self.x[t]
             xs_2 = self.x[t + 1]
@@ -1088,10 +1405,6 @@ class SWall(object):
                 for i in range(NUM_ODE_XS_OVER_Z)
             ]
 
-            M_to_add = get_intermediate_value(
-                self.M[t], self.M[t + 1], z_1.real, z_2.real, z_to_add.real
-            )
-
             z_piece = numpy.concatenate(
                 (self.z[t_0:t + 1], numpy.array([z_to_add], dtype=complex))
             )
@@ -1167,6 +1480,7 @@ class GrowLibs:
         self.phi_k_czes = None
         # Method using SciPy ODE solver.
         self.ode = None
+        self.ode_lock = None
         # Method using Python routines.
         self.dz_dt = None
         self.get_xs = sw_data.ffr_curve.get_xs
@@ -1174,6 +1488,9 @@ class GrowLibs:
         self.ctypes_s_wall = None
         # Method using numba
         self.numba_grow = None
+        # Method using adaptive step sizes.
+        self.adaptive_grow = None
+        self.adaptive_step_tolerance = None
 
         self.default_lib = None
 
@@ -1184,6 +1501,9 @@ class GrowLibs:
         self.c_dz_dt = complex(exp(phase * 1j) / c_v)
 
         self.phi_k_czes = sw_data.ffr_curve.get_phi_k_czes()
+        # Typed data for the compiled methods.
+        self.typed_phi_k_czes = get_typed_phi_k_czes(self.phi_k_czes)
+        self.typed_twist_lines = get_typed_twist_lines(config['twist_lines'])
 
         # v = sympy.lambdify((z, x), self.v)
         def dz_dt(z, x1, x2):
@@ -1197,23 +1517,39 @@ class GrowLibs:
             return self.c_dz_dt / Dv
         self.dz_dt = dz_dt
 
-        df_dz = self.f.diff(z)
-        df_dx = self.f.diff(x)
-        # NOTE: F = -(\partial f / \partial z) / (\partial f / \partial x).
-        F = sympy.lambdify((z, x), sympy.simplify(-df_dz / df_dx))
-
-        def ode_f(t, z_x1_x2_M):
-            z_i = z_x1_x2_M[0]
-            x1_i = z_x1_x2_M[1]
-            x2_i = z_x1_x2_M[2]
-            dz_i_dt = dz_dt(z_i, x1_i, x2_i)
-            dx1_i_dt = F(z_i, x1_i) * dz_i_dt
-            dx2_i_dt = F(z_i, x2_i) * dz_i_dt
-            dM_dt = 1
-            return [dz_i_dt, dx1_i_dt, dx2_i_dt, dM_dt]
+        if use_numba:
+            # NOTE: The right-hand side of the ODE is evaluated from
+            # the coefficients of the curve by a function compiled
+            # by Numba. Without Numba the typed function is slower
+            # than the lambdified one below, so it is used only here.
+            N, n_k, n_c, n_e, d_k, d_c, d_e = self.typed_phi_k_czes
+            c_dz_dt = self.c_dz_dt
+            accuracy = self.accuracy
+
+            def ode_f(t, z_x1_x2_M):
+                return typed_ode_f(
+                    numpy.asarray(z_x1_x2_M, dtype=numpy.complex128),
+                    N, n_k, n_c, n_e, d_k, d_c, d_e, c_dz_dt, accuracy,
+                )
+        else:
+            df_dz = self.f.diff(z)
+            df_dx = self.f.diff(x)
+            # NOTE: F = -(\partial f / \partial z) / (\partial f / \partial x).
+            F = sympy.lambdify((z, x), sympy.simplify(-df_dz / df_dx))
+
+            def ode_f(t, z_x1_x2_M):
+                z_i = z_x1_x2_M[0]
+                x1_i = z_x1_x2_M[1]
+                x2_i = z_x1_x2_M[2]
+                dz_i_dt = dz_dt(z_i, x1_i, x2_i)
+                dx1_i_dt = F(z_i, x1_i) * dz_i_dt
+                dx2_i_dt = F(z_i, x2_i) * dz_i_dt
+                dM_dt = 1
+                return [dz_i_dt, dx1_i_dt, dx2_i_dt, dM_dt]
 
         self.ode = scipy.integrate.ode(ode_f)
         self.ode.set_integrator('zvode')
+        self.ode_lock = threading.Lock()
 
         self.ctypes_s_wall = CTypesSWall(
             config=config,
@@ -1224,17 +1560,17 @@ class GrowLibs:
             logger_name=logger_name,
         )
 
-        if use_numba:
-            self.numba_grow = _grow
-            # XXX Failed to compile a Numba function from _grow, try later.
-            # self.numba_grow = numba.jit(nopython=True)(_grow)
-            #self.numba_f_df_at_zx = numba.jit(nopython=True)(_f_df_at_zx)
-            #self.numba_get_x = numba.jit(nopython=True)(_get_x)
-        else:
-            self.numba_grow = None
+        self.numba_grow = numba_grow
+
+        self.adaptive_grow = adaptive_grow
+        self.adaptive_step_tolerance = config['adaptive_step_tolerance']
+        if self.adaptive_step_tolerance is None:
+            self.adaptive_step_tolerance = constants.ADAPTIVE_STEP_TOLERANCE
 
         if config['use_scipy_ode']:
             self.default_lib = constants.LIB_SCIPY_ODE
+        elif config['use_adaptive_step']:
+            self.default_lib = constants.LIB_ADAPTIVE
         elif self.ctypes_s_wall.is_available():
             self.default_lib = constants.LIB_C
         elif self.numba_grow is not None:
@@ -1244,44 +1580,65 @@ class GrowLibs:
             self.default_lib = constants.LIB_SCIPY_ODE
 
 
-# XXX: Numba JIT complier fails to compile the following,
 def _grow(
-    zs, xs, Ms,
-    step=0,
-    stop_condition=None,
-    phi_k_czes=None,
-    max_steps=constants.NEWTON_MAX_STEPS,
-    c_dz_dt=None,
-    bpzs=None,
-    ppzs=None,
-    size_of_small_step=None,
-    size_of_large_step=None,
-    size_of_bp_neighborhood=None,
-    size_of_pp_neighborhood=None,
-    size_of_puncture_cutoff=None,
-    mass_limit=None,
-    accuracy=None,
-    twist_lines=None,
+    zs, xs, Ms, step, stop_condition,
+    N, n_k, n_c, n_e, d_k, d_c, d_e,
+    max_steps, c_dz_dt, bpzs, ppzs,
+    size_of_small_step, size_of_large_step,
+    size_of_bp_neighborhood, size_of_pp_neighborhood,
+    size_of_puncture_cutoff, mass_limit, accuracy,
+    growth_domain_radius, twist_lines,
 ):
+    """
+    Grow an S-wall from zs[step] until stop_condition is met
+    or the end of the arrays is reached.
+
+    All arguments are numbers or typed NumPy arrays so that
+    this can be compiled by Numba in nopython mode:
+        (N, n_k, n_c, n_e, d_k, d_c, d_e) from get_typed_phi_k_czes(),
+        bpzs & ppzs are 1-dim complex128 arrays,
+        twist_lines is an (n_tl, 2) float64 array,
+        mass_limit is a float, use constants.P_INF for no limit,
+        growth_domain_radius is from get_growth_domain_radius().
+
+    Returns (step, rv), where rv is the same return value
+    as Message.rv of the C library.
+    """
     numba_rv = 0
-    N, phi_k_n_czes, phi_k_d_czes = phi_k_czes
     array_size = len(zs)
+    horizon = max(
+        size_of_bp_neighborhood, size_of_pp_neighborhood,
+        size_of_puncture_cutoff,
+    )
+    z_ref = zs[step]
+    d_ref = constants.N_INF
     while step < (array_size - 1):
         z_i = zs[step]
-        x_i_1, x_i_2 = xs[step]
+        x_i_1 = xs[step, 0]
+        x_i_2 = xs[step, 1]
         M_i = Ms[step]
-        
-        min_d_from_pps = constants.P_INF
-        for ppz in ppzs:
-            d = abs(z_i - ppz)
-            if d < min_d_from_pps:
-                min_d_from_pps = d
-
-        min_d_from_bps = constants.P_INF
-        for bpz in bpzs:
-            d = abs(z_i - ppz)
-            if d < min_d_from_bps:
-                min_d_from_bps = d
+
+        # Scan the critical points only when z is outside
+        # the safe radius, see CriticalPointProximity.
+        d_lb = d_ref - abs(z_i - z_ref)
+        if d_lb >= horizon:
+            min_d_from_pps = d_lb
+            min_d_from_bps = d_lb
+        else:
+            min_d_from_pps = constants.P_INF
+            for i in range(len(ppzs)):
+                d = abs(z_i - ppzs[i])
+                if d < min_d_from_pps:
+                    min_d_from_pps = d
+
+            min_d_from_bps = constants.P_INF
+            for i in range(len(bpzs)):
+                d = abs(z_i - bpzs[i])
+                if d < min_d_from_bps:
+                    min_d_from_bps = d
+
+            z_ref = z_i
+            d_ref = min(min_d_from_bps, min_d_from_pps)
 
         if step >= MIN_NUM_OF_DATA_PTS:
             # Stop if z is inside a cutoff of a puncture.
@@ -1290,14 +1647,23 @@ def _grow(
                 break
 
             # Stop if M exceeds mass limit.
-            if (mass_limit is not None) and (M_i > mass_limit):
+            if M_i > mass_limit:
                 numba_rv = constants.MASS_LIMIT
                 break
 
+            # Stop if z is moving away outside the growth domain.
+            if (
+                abs(z_i) > growth_domain_radius and
+                abs(z_i) > abs(zs[step - 1])
+            ):
+                numba_rv = constants.OUT_OF_DOMAIN
+                break
+
         # Adjust the step size if z is near a branch point.
         Dx_i = x_i_1 - x_i_2
         f_dt = abs(Dx_i)
-        if f_dt > 1.0 : f_dt = 1.0
+        if f_dt > 1.0:
+            f_dt = 1.0
         if (
             min_d_from_bps < size_of_bp_neighborhood or
             min_d_from_pps < size_of_pp_neighborhood
@@ -1314,66 +1680,611 @@ def _grow(
             else:
                 dt = size_of_large_step * f_dt
 
+        z_n = z_i
+        M_n = M_i
+        x_n_1 = x_i_1
+        x_n_2 = x_i_2
         count = 0
         same_xs = False
         while count < constants.SAME_XS_MAX_STEPS:
-            # z_n = z_i + dt * exp(1j * (cmath.phase(c_dz_dt) - 
-            #                      cmath.phase(Dx_i)))
-            # M_n = M_i + abs(Dx_i) * dt
             z_n = z_i + dt * c_dz_dt / Dx_i / (2.0 ** count)
             M_n = M_i + dt / (2.0 ** count)
-#            import warnings
-#            warnings.filterwarnings('error')
-#            try:
-#                z_n = z_i + dt * c_dz_dt / Dx_i / (2.0 ** count)
-#                M_n = M_i + dt / (2.0 ** count)
-#            except RuntimeWarning:
-#                import pdb
-#                pdb.set_trace()
-
-            if (twist_lines is not None and (z_i.imag * z_n.imag) < 0):
+
+            if (z_i.imag * z_n.imag) < 0:
                 avg_z_r = (z_i.real + z_n.real) * 0.5
-                for s, e in twist_lines:
+                for i in range(len(twist_lines)):
+                    s = twist_lines[i, 0]
+                    e = twist_lines[i, 1]
                     if (s <= avg_z_r and avg_z_r <= e):
                         # x_i_1, x_i_2 = (-1 * x_i_2), (-1 * x_i_1)
                         pass
 
-            x_n_1 = get_x(
-                N, phi_k_n_czes, phi_k_d_czes, z_n, x_i_1, accuracy,
-                max_steps=max_steps,
+            x_n_1 = typed_get_x(
+                N, n_k, n_c, n_e, d_k, d_c, d_e, z_n, x_i_1, accuracy,
+                max_steps,
             )
-            x_n_2 = get_x(
-                N, phi_k_n_czes, phi_k_d_czes, z_n, x_i_2, accuracy,
-                max_steps=max_steps,
+            x_n_2 = typed_get_x(
+                N, n_k, n_c, n_e, d_k, d_c, d_e, z_n, x_i_2, accuracy,
+                max_steps,
             )
             if abs(x_n_1 - x_n_2) < accuracy:
                 same_xs = True
             else:
+                same_xs = False
                 break
             count += 1
 
         step += 1
         zs[step] = z_n
         Ms[step] = M_n
-        xs[step] = (x_n_1, x_n_2)
+        xs[step, 0] = x_n_1
+        xs[step, 1] = x_n_2
 
         if same_xs and count >= constants.SAME_XS_MAX_STEPS:
             numba_rv = constants.ERROR_SAME_XS
             break
 
-    msg = Message()
-    msg.s_wall_size = array_size
-    msg.step = step
-    msg.stop_condition = stop_condition
-    msg.rv = numba_rv
+    return step, numba_rv
+
+
+# NOTE: Release the GIL so that S-walls can be grown in threads.
+if use_numba:
+    numba_grow = numba.jit(nopython=True, nogil=True)(_grow)
+else:
+    numba_grow = None
+
+
+# Coefficients of the Dormand-Prince method,
+# used by the adaptive step size method.
+DP_A = numpy.array([
+    [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [1.0 / 5, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [3.0 / 40, 9.0 / 40, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [44.0 / 45, -56.0 / 15, 32.0 / 9, 0.0, 0.0, 0.0, 0.0],
+    [19372.0 / 6561, -25360.0 / 2187, 64448.0 / 6561, -212.0 / 729,
+     0.0, 0.0, 0.0],
+    [9017.0 / 3168, -355.0 / 33, 46732.0 / 5247, 49.0 / 176,
+     -5103.0 / 18656, 0.0, 0.0],
+    [35.0 / 384, 0.0, 500.0 / 1113, 125.0 / 192, -2187.0 / 6784,
+     11.0 / 84, 0.0],
+])
+# 5th-order weights.
+DP_B = DP_A[6]
+# Difference between the 5th- and the 4th-order weights.
+DP_E = DP_B - numpy.array([
+    5179.0 / 57600, 0.0, 7571.0 / 16695, 393.0 / 640, -92097.0 / 339200,
+    187.0 / 2100, 1.0 / 40,
+])
+
+# Bounds of the ratio of step sizes between adjacent steps
+# and the safety factor of the adaptive step size method.
+ADAPTIVE_STEP_MIN_RATIO = 0.2
+ADAPTIVE_STEP_MAX_RATIO = 5.0
+ADAPTIVE_STEP_SAFETY = 0.9
+# Maximum size of a step in z, in units of size_of_large_step.
+ADAPTIVE_STEP_MAX_DZ_FACTOR = 10.0
+
+
+def _grow_adaptive(
+    zs, xs, Ms, step, stop_condition,
+    N, n_k, n_c, n_e, d_k, d_c, d_e,
+    max_steps, c_dz_dt, bpzs, ppzs,
+    size_of_small_step, size_of_large_step,
+    size_of_bp_neighborhood, size_of_pp_neighborhood,
+    size_of_puncture_cutoff, mass_limit, accuracy,
+    growth_domain_radius, tolerance,
+):
+    """
+    Grow an S-wall like _grow(), but integrate
+        dz/dt = c_dz_dt / (x_1 - x_2),
+        dx_i/dt = F(z, x_i) dz/dt,
+        dM/dt = 1
+    with the Dormand-Prince method, adjusting the step size
+    so that the local error of (z, x_1, x_2) is below 'tolerance'.
+    The x's are corrected after each step using Newton's method.
+
+    A step never exceeds half of the distance to the nearest
+    branch point or puncture, and it does not become smaller than
+    the fixed small step of _grow(). When the x's become the same
+    at a stage of a step, the step size is halved as _grow() does,
+    and ERROR_SAME_XS is returned after SAME_XS_MAX_STEPS trials.
+
+    Returns (step, rv), where rv is the same return value
+    as Message.rv of the C library.
+    """
+    rv = 0
+    array_size = len(zs)
+    y_i = numpy.empty(3, dtype=numpy.complex128)
+    y_s = numpy.empty(3, dtype=numpy.complex128)
+    ks = numpy.empty((7, 3), dtype=numpy.complex128)
+    dt = -1.0
+    # A distance below 2 * ADAPTIVE_STEP_MAX_DZ_FACTOR * size_of_large_step
+    # also limits the step size.
+    horizon = max(
+        size_of_bp_neighborhood, size_of_pp_neighborhood,
+        size_of_puncture_cutoff,
+        2.0 * ADAPTIVE_STEP_MAX_DZ_FACTOR * size_of_large_step,
+    )
+    z_ref = zs[step]
+    d_ref = constants.N_INF
+    while step < (array_size - 1):
+        z_i = zs[step]
+        x_i_1 = xs[step, 0]
+        x_i_2 = xs[step, 1]
+        M_i = Ms[step]
 
-    return msg 
+        # Scan the critical points only when z is outside
+        # the safe radius, see CriticalPointProximity.
+        d_lb = d_ref - abs(z_i - z_ref)
+        if d_lb >= horizon:
+            min_d_from_pps = d_lb
+            min_d_from_bps = d_lb
+        else:
+            min_d_from_pps = constants.P_INF
+            for i in range(len(ppzs)):
+                d = abs(z_i - ppzs[i])
+                if d < min_d_from_pps:
+                    min_d_from_pps = d
 
+            min_d_from_bps = constants.P_INF
+            for i in range(len(bpzs)):
+                d = abs(z_i - bpzs[i])
+                if d < min_d_from_bps:
+                    min_d_from_bps = d
 
-# XXX: Numba JIT complier fails to compile the following,
-# Left for future use.
-# if use_numba:
-#     numba_grow = numba.jit(nopython=True)(_grow)
+            z_ref = z_i
+            d_ref = min(min_d_from_bps, min_d_from_pps)
+
+        if step >= MIN_NUM_OF_DATA_PTS:
+            # Stop if z is inside a cutoff of a puncture.
+            if min_d_from_pps < size_of_puncture_cutoff:
+                rv = constants.NEAR_PUNCTURE
+                break
+
+            # Stop if M exceeds mass limit.
+            if M_i > mass_limit:
+                rv = constants.MASS_LIMIT
+                break
+
+            # Stop if z is moving away outside the growth domain.
+            if (
+                abs(z_i) > growth_domain_radius and
+                abs(z_i) > abs(zs[step - 1])
+            ):
+                rv = constants.OUT_OF_DOMAIN
+                break
+
+        if (
+            min_d_from_bps < size_of_bp_neighborhood or
+            min_d_from_pps < size_of_pp_neighborhood
+        ):
+            if stop_condition == constants.IN_P_NBHD:
+                rv = constants.IN_P_NBHD
+                break
+        elif stop_condition == constants.OUT_P_NBHD:
+            rv = constants.OUT_P_NBHD
+            break
+
+        # Bounds of the step size, where |dz| = dt / |x_1 - x_2|.
+        abs_Dx_i = abs(x_i_1 - x_i_2)
+        dt_min = size_of_small_step * min(1.0, abs_Dx_i)
+        max_dz = min(
+            0.5 * min(min_d_from_bps, min_d_from_pps),
+            ADAPTIVE_STEP_MAX_DZ_FACTOR * size_of_large_step,
+        )
+        dt_max = max(dt_min, max_dz * abs_Dx_i)
+        if dt < 0:
+            dt = size_of_large_step * min(1.0, abs_Dx_i)
+        dt = min(max(dt, dt_min), dt_max)
+
+        y_i[0] = z_i
+        y_i[1] = x_i_1
+        y_i[2] = x_i_2
+        err = 0.0
+        # Number of times the step size is halved
+        # because a stage has the same x's, as _grow() does.
+        count = 0
+        same_xs = False
+        while True:
+            same_xs = False
+            for s in range(7):
+                for j in range(3):
+                    y_s[j] = y_i[j]
+                    for r in range(s):
+                        y_s[j] += dt * DP_A[s, r] * ks[r, j]
+                if abs(y_s[1] - y_s[2]) < accuracy:
+                    same_xs = True
+                    break
+                dz_dt = c_dz_dt / (y_s[1] - y_s[2])
+                ks[s, 0] = dz_dt
+                ks[s, 1] = typed_F_at_zx(
+                    N, n_k, n_c, n_e, d_k, d_c, d_e, y_s[0], y_s[1],
+                ) * dz_dt
+                ks[s, 2] = typed_F_at_zx(
+                    N, n_k, n_c, n_e, d_k, d_c, d_e, y_s[0], y_s[2],
+                ) * dz_dt
+
+            if same_xs:
+                count += 1
+                if count >= constants.SAME_XS_MAX_STEPS:
+                    break
+                dt *= 0.5
+                continue
+
+            err = 0.0
+            for j in range(3):
+                e_j = 0j
+                for s in range(7):
+                    e_j += dt * DP_E[s] * ks[s, j]
+                abs_e_j = abs(e_j)
+                if abs_e_j != abs_e_j:
+                    # The step went through x_1 == x_2.
+                    err = constants.P_INF
+                elif abs_e_j > err:
+                    err = abs_e_j
+
+            if err <= tolerance or dt <= dt_min:
+                break
+            dt = max(
+                dt_min,
+                dt * max(
+                    ADAPTIVE_STEP_MIN_RATIO,
+                    ADAPTIVE_STEP_SAFETY * (tolerance / err) ** 0.2,
+                )
+            )
+
+        if same_xs:
+            # Keep the current data at the next step,
+            # from which SWall.grow() resumes with SciPy ODE.
+            step += 1
+            zs[step] = z_i
+            Ms[step] = M_i
+            xs[step, 0] = x_i_1
+            xs[step, 1] = x_i_2
+            rv = constants.ERROR_SAME_XS
+            break
+
+        # y_s is the 5th-order solution after the last stage.
+        z_n = y_s[0]
+        M_n = M_i + dt
+        x_n_1 = typed_get_x(
+            N, n_k, n_c, n_e, d_k, d_c, d_e, z_n, y_s[1], accuracy,
+            max_steps,
+        )
+        x_n_2 = typed_get_x(
+            N, n_k, n_c, n_e, d_k, d_c, d_e, z_n, y_s[2], accuracy,
+            max_steps,
+        )
+
+        step += 1
+        zs[step] = z_n
+        Ms[step] = M_n
+        xs[step, 0] = x_n_1
+        xs[step, 1] = x_n_2
+
+        if z_n != z_n or abs(x_n_1 - x_n_2) < accuracy:
+            rv = constants.ERROR_SAME_XS
+            break
+
+        # Step size for the next step.
+        if err > 0:
+            dt *= min(
+                ADAPTIVE_STEP_MAX_RATIO,
+                ADAPTIVE_STEP_SAFETY * (tolerance / err) ** 0.2,
+            )
+        else:
+            dt *= ADAPTIVE_STEP_MAX_RATIO
+
+    return step, rv
+
+
+if use_numba:
+    adaptive_grow = numba.jit(nopython=True, nogil=True)(_grow_adaptive)
+else:
+    adaptive_grow = _grow_adaptive
+
+
+def grow_s_walls_in_batch(
+    s_walls,
+    branch_point_zs=[],
+    puncture_point_zs=[],
+    config=None,
+    libs=None,
+    twist_lines=None,
+    method=None,
+    logger_name='loom',
+):
+    """
+    Grow S-walls in lock-step, advancing all of them together
+    with NumPy arrays of shape (n_walls,).
+
+    Outside the neighborhoods of branch points and punctures,
+    each step is the Euler step followed by Newton's method of _grow().
+    Inside the neighborhoods, where SWall.grow() uses SciPy's ODE solver,
+    an S-wall is grown individually by SWall.grow() until it leaves
+    the neighborhoods, and then it rejoins the batch. An S-wall whose x's
+    become the same in the batch is also handed over to SWall.grow()
+    from that step, which resolves it with smaller steps or SciPy's
+    ODE solver, and grows it to the end.
+
+    An S-wall stops when it reaches the end of its arrays,
+    the cutoff of a puncture, the mass limit, or the boundary of
+    the growth domain, and then it is masked out of the remaining steps.
+
+    Returns a dict of {s_wall: error}, where error is the
+    RuntimeError raised while growing the S-wall, or None.
+    """
+    logger = logging.getLogger(logger_name)
+    n_walls = len(s_walls)
+    if n_walls == 0:
+        return {}
+    logger.info('Growing {} S-walls in a batch...'.format(n_walls))
+
+    proximity = CriticalPointProximity(
+        branch_point_zs, puncture_point_zs,
+        horizon=get_proximity_horizon(config),
+    )
+    size_of_large_step = config['size_of_large_step']
+    size_of_bp_neighborhood = config['size_of_bp_neighborhood']
+    size_of_pp_neighborhood = config['size_of_pp_neighborhood']
+    size_of_puncture_cutoff = config['size_of_puncture_cutoff']
+    mass_limit = config['mass_limit']
+    if mass_limit is None:
+        mass_limit = constants.P_INF
+    accuracy = config['accuracy']
+    growth_domain_radius = get_growth_domain_radius(config)
+
+    array_sizes = numpy.array([
+        s_wall.max_array_size if s_wall.max_array_size is not None
+        else len(s_wall.z)
+        for s_wall in s_walls
+    ])
+    max_size = array_sizes.max()
+    # Buffers of the batch, which are doubled in size when filled.
+    buffer_size = min(max_size, INITIAL_ARRAY_SIZE)
+    zs, xs, Ms = get_batch_buffers(n_walls, buffer_size)
+
+    steps = numpy.zeros(n_walls, dtype=numpy.int64)
+    rvs = numpy.zeros(n_walls, dtype=numpy.int64)
+    # Cached data of CriticalPointProximity for each S-wall.
+    z_refs = numpy.zeros(n_walls, dtype=numpy.complex128)
+    d_refs = numpy.full(n_walls, constants.N_INF)
+    active = numpy.zeros(n_walls, dtype=bool)
+    # S-walls grown to the end by SWall.grow().
+    grown_individually = numpy.zeros(n_walls, dtype=bool)
+    errors = {}
+
+    # S-walls to be grown individually by SWall.grow(),
+    # starting from the neighborhoods, as every S-wall is at first,
+    # or from the steps where their x's become the same.
+    in_p_nbhd_walls = range(n_walls)
+    same_xs_walls = []
+    while len(in_p_nbhd_walls) + len(same_xs_walls) > 0:
+        for i in in_p_nbhd_walls + same_xs_walls:
+            s_wall = s_walls[i]
+            t = steps[i]
+            if t > 0:
+                while len(s_wall.z) <= t:
+                    s_wall.expand()
+                s_wall.z[:t + 1] = zs[i, :t + 1]
+                s_wall.x[:t + 1] = xs[i, :t + 1]
+                s_wall.M[:t + 1] = Ms[i, :t + 1]
+            try:
+                t = s_wall.grow(
+                    branch_point_zs=branch_point_zs,
+                    puncture_point_zs=puncture_point_zs,
+                    config=config,
+                    libs=libs,
+                    use_scipy_ode=config['use_scipy_ode'],
+                    method=method,
+                    twist_lines=twist_lines,
+                    start_step=t,
+                    stop_out_p_nbhd=(i in in_p_nbhd_walls),
+                )
+            except RuntimeError as e:
+                errors[i] = e
+                t = None
+            if t is None:
+                grown_individually[i] = True
+                continue
+
+            # Rejoin the batch.
+            if t + 1 >= buffer_size:
+                new_buffer_size = min(max(2 * buffer_size, t + 2), max_size)
+                zs, xs, Ms = get_batch_buffers(
+                    n_walls, new_buffer_size, zs, xs, Ms,
+                )
+                buffer_size = new_buffer_size
+            zs[i, :t + 1] = s_wall.z[:t + 1]
+            xs[i, :t + 1] = s_wall.x[:t + 1]
+            Ms[i, :t + 1] = s_wall.M[:t + 1]
+            steps[i] = t
+            active[i] = (t < array_sizes[i] - 1)
+        in_p_nbhd_walls = []
+        same_xs_walls = []
+
+        while active.any():
+            walls = numpy.nonzero(active)[0]
+            t_i = steps[walls]
+
+            if t_i.max() + 1 >= buffer_size:
+                new_buffer_size = min(2 * buffer_size, max_size)
+                zs, xs, Ms = get_batch_buffers(
+                    n_walls, new_buffer_size, zs, xs, Ms,
+                )
+                buffer_size = new_buffer_size
+            z_i = zs[walls, t_i]
+            x_i_1 = xs[walls, t_i, 0]
+            x_i_2 = xs[walls, t_i, 1]
+            M_i = Ms[walls, t_i]
+
+            z_refs_i = z_refs[walls]
+            d_refs_i = d_refs[walls]
+            min_d_from_bps, min_d_from_pps = proximity.get_min_ds_batch(
+                z_i, z_refs_i, d_refs_i,
+            )
+            z_refs[walls] = z_refs_i
+            d_refs[walls] = d_refs_i
+
+            # Stop if z is inside a cutoff of a puncture,
+            # if M exceeds mass limit, or if z is moving away
+            # outside the growth domain.
+            can_stop = (t_i >= MIN_NUM_OF_DATA_PTS)
+            near_puncture = (
+                can_stop & (min_d_from_pps < size_of_puncture_cutoff)
+            )
+            over_mass_limit = can_stop & (M_i > mass_limit) & ~near_puncture
+            abs_z_i = abs(z_i)
+            out_of_domain = (
+                can_stop & ~near_puncture & ~over_mass_limit &
+                (abs_z_i > growth_domain_radius) &
+                (abs_z_i > abs(zs[walls, numpy.maximum(t_i - 1, 0)]))
+            )
+            rvs[walls[near_puncture]] = constants.NEAR_PUNCTURE
+            rvs[walls[over_mass_limit]] = constants.MASS_LIMIT
+            rvs[walls[out_of_domain]] = constants.OUT_OF_DOMAIN
+            stopped = near_puncture | over_mass_limit | out_of_domain
+            active[walls[stopped]] = False
+
+            # Hand over S-walls in the neighborhoods to SWall.grow().
+            in_p_nbhd = ~stopped & (
+                (min_d_from_bps < size_of_bp_neighborhood) |
+                (min_d_from_pps < size_of_pp_neighborhood)
+            )
+            in_p_nbhd_walls += walls[in_p_nbhd].tolist()
+            active[walls[in_p_nbhd]] = False
+
+            moving = ~(stopped | in_p_nbhd)
+            walls = walls[moving]
+            if len(walls) == 0:
+                continue
+            t_i = t_i[moving]
+            z_i = z_i[moving]
+            x_i_1 = x_i_1[moving]
+            x_i_2 = x_i_2[moving]
+            M_i = M_i[moving]
+
+            Dx_i = x_i_1 - x_i_2
+            dt = size_of_large_step * numpy.minimum(abs(Dx_i), 1.0)
+            z_n = z_i + dt * libs.c_dz_dt / Dx_i
+            M_n = M_i + dt
+            x_n_1 = get_x_batch(
+                libs.typed_phi_k_czes, z_n, x_i_1, accuracy,
+                max_steps=constants.NEWTON_MAX_STEPS,
+            )
+            x_n_2 = get_x_batch(
+                libs.typed_phi_k_czes, z_n, x_i_2, accuracy,
+                max_steps=constants.NEWTON_MAX_STEPS,
+            )
+
+            # Hand over S-walls getting the same x's to SWall.grow().
+            same_xs = (abs(x_n_1 - x_n_2) < accuracy)
+            same_xs_walls += walls[same_xs].tolist()
+            active[walls[same_xs]] = False
+
+            ok = ~same_xs
+            walls = walls[ok]
+            t_n = t_i[ok] + 1
+            zs[walls, t_n] = z_n[ok]
+            xs[walls, t_n, 0] = x_n_1[ok]
+            xs[walls, t_n, 1] = x_n_2[ok]
+            Ms[walls, t_n] = M_n[ok]
+            steps[walls] = t_n
+            active[walls[t_n >= (array_sizes[walls] - 1)]] = False
+
+    for i, s_wall in enumerate(s_walls):
+        if grown_individually[i]:
+            continue
+        size = steps[i] + 1
+        if size != len(s_wall.z):
+            s_wall.resize(size)
+        s_wall.z[:size] = zs[i, :size]
+        s_wall.x[:size] = xs[i, :size]
+        s_wall.M[:size] = Ms[i, :size]
+        s_wall.c_dz_dt = libs.c_dz_dt
+        s_wall.reset_chains()
+
+    logger.info(
+        'Grew {} S-walls in a batch, {} of them finished individually.'
+        .format(n_walls, grown_individually.sum())
+    )
+    return {s_wall: errors.get(i) for i, s_wall in enumerate(s_walls)}
+
+
+def get_batch_buffers(n_walls, size, zs=None, xs=None, Ms=None):
+    """
+    Return the arrays of z, x, and M of grow_s_walls_in_batch()
+    with the given size, copying the data of the previous arrays.
+    """
+    new_zs = numpy.empty((n_walls, size), dtype=numpy.complex128)
+    new_xs = numpy.empty(
+        (n_walls, size, NUM_ODE_XS_OVER_Z), dtype=numpy.complex128
+    )
+    new_Ms = numpy.empty((n_walls, size), dtype=numpy.float64)
+    if zs is not None:
+        old_size = zs.shape[1]
+        new_zs[:, :old_size] = zs
+        new_xs[:, :old_size] = xs
+        new_Ms[:, :old_size] = Ms
+    return new_zs, new_xs, new_Ms
+
+
+def grow_s_walls_in_threads(
+    s_walls,
+    n_threads,
+    branch_point_zs=[],
+    puncture_point_zs=[],
+    config=None,
+    libs=None,
+    twist_lines=None,
+    method=None,
+    logger_name='loom',
+):
+    """
+    Grow S-walls concurrently using a pool of threads,
+    each of which calls SWall.grow() for an S-wall.
+
+    The C library and the Numba kernels release the GIL while
+    growing an S-wall, so the S-walls are grown in parallel.
+    SciPy's ODE solver is not re-entrant and is serialized
+    by GrowLibs.ode_lock.
+
+    Returns a dict of {s_wall: error}, where error is the
+    RuntimeError raised while growing the S-wall, or None.
+    """
+    logger = logging.getLogger(logger_name)
+    n_walls = len(s_walls)
+    if n_walls == 0:
+        return {}
+    n_threads = min(n_threads, n_walls)
+    logger.info(
+        'Growing {} S-walls using {} threads...'
+        .format(n_walls, n_threads)
+    )
+
+    def grow_s_wall(s_wall):
+        try:
+            s_wall.grow(
+                branch_point_zs=branch_point_zs,
+                puncture_point_zs=puncture_point_zs,
+                config=config,
+                libs=libs,
+                use_scipy_ode=config['use_scipy_ode'],
+                twist_lines=twist_lines,
+                method=method,
+            )
+        except RuntimeError as e:
+            return e
+        return None
+
+    pool = ThreadPool(n_threads)
+    try:
+        errors = pool.map(grow_s_wall, s_walls)
+    finally:
+        pool.close()
+        pool.join()
+
+    return dict(zip(s_walls, errors))
 
 
 # XXX: Numba JIT complier fails to compile the following
@@ -1400,6 +2311,92 @@ def get_min_d(z, pzs):
         return abs(numpy.array(pzs) - z).min()
 
 
+def get_proximity_horizon(config):
+    """
+    The largest distance from a branch point or a puncture
+    that affects the growth of an S-wall.
+    """
+    return max(
+        config['size_of_bp_neighborhood'],
+        config['size_of_pp_neighborhood'],
+        config['size_of_puncture_cutoff'],
+    )
+
+
+class CriticalPointProximity:
+    """
+    Distances from z to the nearest branch point and to the nearest
+    puncture, for the proximity checks at each step of growing S-walls.
+
+    The minimum distance d_ref to the critical points at the last point
+    z_ref where the distances are evaluated is cached. When z is inside
+    the safe radius d_ref - horizon around z_ref, both distances are at
+    least the horizon, and their lower bound d_ref - |z - z_ref| is
+    returned without looking at the critical points, which gives the
+    same results for every comparison with a distance below the horizon.
+    """
+    def __init__(
+        self, branch_point_zs=[], puncture_point_zs=[], horizon=0.0,
+    ):
+        self.bpzs = numpy.array(branch_point_zs, dtype=numpy.complex128)
+        self.ppzs = numpy.array(puncture_point_zs, dtype=numpy.complex128)
+        self.horizon = horizon
+        self.z_ref = 0
+        self.d_ref = constants.N_INF
+
+    def get_min_ds(self, z):
+        """
+        Returns (min_d_from_bps, min_d_from_pps).
+        """
+        d_lb = self.d_ref - abs(z - self.z_ref)
+        if d_lb >= self.horizon:
+            return d_lb, d_lb
+
+        if len(self.bpzs) > 0:
+            min_d_from_bps = abs(self.bpzs - z).min()
+        else:
+            min_d_from_bps = constants.P_INF
+        if len(self.ppzs) > 0:
+            min_d_from_pps = abs(self.ppzs - z).min()
+        else:
+            min_d_from_pps = constants.P_INF
+        self.z_ref = z
+        self.d_ref = min(min_d_from_bps, min_d_from_pps)
+        return min_d_from_bps, min_d_from_pps
+
+    def get_min_ds_batch(self, zs, z_refs, d_refs):
+        """
+        get_min_ds() for an array of z's, where z_refs and d_refs
+        are arrays of the same shape holding the cached data of
+        each z, which are updated in place.
+        """
+        d_lbs = d_refs - abs(zs - z_refs)
+        min_d_from_bps = d_lbs.copy()
+        min_d_from_pps = d_lbs.copy()
+        near = (d_lbs < self.horizon)
+        if not near.any():
+            return min_d_from_bps, min_d_from_pps
+
+        near_zs = zs[near]
+        if len(self.bpzs) > 0:
+            min_d_from_bps[near] = abs(
+                near_zs[:, None] - self.bpzs[None, :]
+            ).min(axis=1)
+        else:
+            min_d_from_bps[near] = constants.P_INF
+        if len(self.ppzs) > 0:
+            min_d_from_pps[near] = abs(
+                near_zs[:, None] - self.ppzs[None, :]
+            ).min(axis=1)
+        else:
+            min_d_from_pps[near] = constants.P_INF
+        z_refs[near] = near_zs
+        d_refs[near] = numpy.minimum(
+            min_d_from_bps[near], min_d_from_pps[near],
+        )
+        return min_d_from_bps, min_d_from_pps
+
+
 def get_s_wall_root(z, ffr_xs, sw_data):
     x_i, x_j = ffr_xs
 
@@ -1916,6 +2913,50 @@ def left_right(l, point):
             return 'left'
 
 
+def get_dense_intersection(s_wall_1, t_1, s_wall_2, t_2, max_steps=10):
+    """
+    Find an intersection of the dense outputs of two S-walls,
+    between s_wall_1.z[t_1:t_1 + 2] and s_wall_2.z[t_2:t_2 + 2],
+    using Newton's method starting from the intersection of
+    the straight segments.
+    Returns the z-coordinate of the intersection,
+    or None if there is no intersection within the segments.
+    """
+    a = s_wall_1.get_hermite_data(t_1)
+    b = s_wall_2.get_hermite_data(t_2)
+    # Intersection of the straight segments.
+    d_1 = s_wall_1.z[t_1 + 1] - s_wall_1.z[t_1]
+    d_2 = s_wall_2.z[t_2 + 1] - s_wall_2.z[t_2]
+    d_12 = s_wall_2.z[t_2] - s_wall_1.z[t_1]
+    det = (d_1.conjugate() * d_2).imag
+    if det == 0:
+        return None
+    u = (d_12.conjugate() * d_2).imag / det
+    v = (d_12.conjugate() * d_1).imag / det
+
+    tolerance = 1e-12 * max(abs(d_1), abs(d_2))
+    for step in range(max_steps):
+        p = a[0] + u * (a[1] + u * (a[2] + u * a[3]))
+        q = b[0] + v * (b[1] + v * (b[2] + v * b[3]))
+        dp = a[1] + u * (2 * a[2] + u * 3 * a[3])
+        dq = b[1] + v * (2 * b[2] + v * 3 * b[3])
+        g = p - q
+        if abs(g) < tolerance:
+            break
+        # Solve dp * du - dq * dv = -g for real du & dv.
+        det = (dp.conjugate() * (-dq)).imag
+        if det == 0:
+            return None
+        du = ((-g).conjugate() * (-dq)).imag / det
+        dv = (dp.conjugate() * (-g)).imag / det
+        u += du
+        v += dv
+
+    if not (0 <= u <= 1 and 0 <= v <= 1):
+        return None
+    return s_wall_1.get_z_at(t_1, u)
+
+
 # TODO: Merge the following two functions?
 def get_intermediate_z_point(z_1, z_2, bp_z_med):
     """
@@ -4,14 +4,235 @@ from sympy import sympify, poly
 import mpmath
 import logging
 import os
+import stat
+import json
+import time
+import socket
 import subprocess
 # import pdb
 
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the Sage worker is not used.
+    fcntl = None
+
 base_dir = os.path.dirname(os.path.realpath(__file__))
 sage_script_dir = base_dir + '/sage_scripts/'
 # sage_bin_path = 'sage'
 sage_bin_path = '/usr/local/bin/sage'
 
+# Run the scripts in a long-lived Sage process of the user,
+# see run_sage_script(). Set to False to start Sage for every script.
+use_sage_worker = True
+# The socket of the worker is in a directory accessible only by the user.
+sage_worker_dir = os.path.join(os.path.expanduser('~'), '.loom', 'sage')
+sage_worker_socket_path = os.path.join(sage_worker_dir, 'worker.sock')
+# Lock file held by a process while it starts a Sage worker.
+sage_worker_start_lock_path = os.path.join(sage_worker_dir, 'start.lock')
+# Seconds to wait for a Sage worker to start.
+SAGE_WORKER_START_TIMEOUT = 300
+# Seconds to wait for the Sage worker to run a script. The worker runs
+# the scripts one at a time, and when it is busy with a long script
+# for longer than this, the script is run by a new Sage process.
+SAGE_WORKER_REQUEST_TIMEOUT = 60
+# Seconds after the last request for a Sage worker to exit.
+SAGE_WORKER_IDLE_TIMEOUT = 3600
+
+
+def is_executable(file_path):
+    return os.path.isfile(file_path) and os.access(file_path, os.X_OK)
+
+
+def sage_is_available():
+    """
+    Check if Sage can be run on this host.
+    """
+    if os.path.dirname(sage_bin_path) == '':
+        return any(
+            is_executable(os.path.join(a_dir, sage_bin_path))
+            for a_dir in os.environ.get('PATH', '').split(os.pathsep)
+        )
+    else:
+        return is_executable(sage_bin_path)
+
+
+def run_sage_script(script_name, args, logger_name='loom'):
+    """
+    Run a Sage script in sage_scripts/ with the arguments,
+    and return its output. The script is run by the Sage worker
+    of the user, which is started when it is not running,
+    or by a new Sage process when the worker is not available
+    or does not respond within SAGE_WORKER_REQUEST_TIMEOUT.
+    """
+    logger = logging.getLogger(logger_name)
+    if use_sage_worker is True:
+        try:
+            return request_sage_worker(script_name, args, logger_name)
+        except (socket.error, OSError, AttributeError) as e:
+            # AttributeError is raised when Unix sockets are not supported.
+            # socket.timeout is a subclass of socket.error.
+            logger.warning(
+                'Sage worker not available: {}; '
+                'start Sage for {}.'.format(e, script_name)
+            )
+
+    return subprocess.check_output(
+        [sage_bin_path, sage_script_dir + script_name] + list(args)
+    )
+
+
+def check_owner(path, private=False):
+    """
+    Raise socket.error unless the file is owned by the user, and
+    is accessible only by the user when private is True.
+    """
+    st = os.lstat(path)
+    if st.st_uid != os.getuid():
+        raise socket.error('{} is not owned by the user.'.format(path))
+    if private is True and (st.st_mode & (stat.S_IRWXG | stat.S_IRWXO)):
+        raise socket.error(
+            '{} is accessible by other users.'.format(path)
+        )
+
+
+def prepare_sage_worker_dir():
+    """
+    Create the directory of the socket of the Sage worker
+    with permission 0700, or check its owner and permission
+    when it exists.
+    """
+    try:
+        os.makedirs(sage_worker_dir, 0o700)
+    except OSError:
+        if not os.path.isdir(sage_worker_dir):
+            raise
+    if os.path.islink(sage_worker_dir):
+        raise socket.error(
+            '{} is a symbolic link.'.format(sage_worker_dir)
+        )
+    check_owner(sage_worker_dir, private=True)
+
+
+def connect_to_sage_worker():
+    """
+    Connect to the socket of the Sage worker after checking its owner.
+    Raises socket.error when it fails.
+    """
+    try:
+        check_owner(sage_worker_socket_path)
+    except OSError as e:
+        # There is no socket.
+        raise socket.error(str(e))
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(sage_worker_socket_path)
+    except socket.error:
+        conn.close()
+        raise
+    return conn
+
+
+def start_sage_worker(logger_name='loom'):
+    """
+    Start a Sage worker in a new session, so that it keeps running
+    for other processes after this process exits, and wait until
+    it accepts connections.
+
+    Only one process starts a worker at a time, holding the lock
+    on sage_worker_start_lock_path, and a process that waited for
+    the lock connects to the worker started by another process.
+    """
+    logger = logging.getLogger(logger_name)
+    with open(sage_worker_start_lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            return connect_to_sage_worker()
+        except socket.error:
+            pass
+
+        logger.info(
+            'Start a Sage worker at {}.'.format(sage_worker_socket_path)
+        )
+        with open(os.devnull, 'r+') as devnull:
+            worker = subprocess.Popen(
+                [sage_bin_path, sage_script_dir + 'worker.sage',
+                 sage_worker_socket_path, sage_script_dir,
+                 str(SAGE_WORKER_IDLE_TIMEOUT)],
+                stdin=devnull, stdout=devnull, stderr=devnull,
+                close_fds=True, preexec_fn=os.setsid,
+            )
+
+        start_time = time.time()
+        while True:
+            try:
+                return connect_to_sage_worker()
+            except socket.error:
+                if (
+                    worker.poll() is not None and
+                    not os.path.exists(sage_worker_socket_path)
+                ):
+                    raise socket.error(
+                        'Sage worker exited with {}.'
+                        .format(worker.returncode)
+                    )
+                elif time.time() - start_time > SAGE_WORKER_START_TIMEOUT:
+                    raise socket.error('Sage worker did not start in time.')
+                time.sleep(0.5)
+
+
+def request_sage_worker(script_name, args, logger_name='loom'):
+    """
+    Request the Sage worker to run a script, see sage_scripts/worker.sage.
+    """
+    prepare_sage_worker_dir()
+    try:
+        conn = connect_to_sage_worker()
+    except socket.error:
+        conn = start_sage_worker(logger_name)
+
+    try:
+        conn.settimeout(SAGE_WORKER_REQUEST_TIMEOUT)
+        request = json.dumps([script_name, [str(arg) for arg in args]])
+        request += '\n'
+        conn.sendall(request.encode('utf-8'))
+        chunks = []
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        conn.close()
+
+    status, sep, rv = b''.join(chunks).decode('utf-8').partition('\n')
+    if status == 'OK':
+        return str(rv)
+    elif status == 'ERROR':
+        raise RuntimeError(
+            'Sage worker failed to run {}:\n{}'.format(script_name, rv)
+        )
+    else:
+        raise socket.error('Invalid response from Sage worker.')
+
+
+def stop_sage_worker():
+    """
+    Stop the Sage worker of the user if it is running.
+    """
+    if not os.path.isdir(sage_worker_dir):
+        return
+    try:
+        conn = connect_to_sage_worker()
+    except socket.error:
+        return
+    try:
+        conn.settimeout(SAGE_WORKER_REQUEST_TIMEOUT)
+        conn.sendall((json.dumps(['__stop__', []]) + '\n').encode('utf-8'))
+        conn.recv(4096)
+    finally:
+        conn.close()
+
 
 def solve_system_of_eqs(eqs, precision=None, logger_name='loom',):
     """
@@ -27,10 +248,10 @@ def solve_system_of_eqs(eqs, precision=None, logger_name='loom',):
         'Use SAGE to solve {} @ precision = {}.'.format(eqs, precision)
     )
     try:
-        rv_str = subprocess.check_output(
-            [sage_bin_path, sage_script_dir + 'solve_system_of_eqs.sage'] +
-            [str(precision)] +
-            [str(eq) for eq in eqs]
+        rv_str = run_sage_script(
+            'solve_system_of_eqs.sage',
+            [str(precision)] + [str(eq) for eq in eqs],
+            logger_name=logger_name,
         )
     except (KeyboardInterrupt, SystemExit):
         raise
@@ -67,10 +288,10 @@ def solve_single_eq_single_var(
         raise Exception('Must specify variable for solving the equation.')
     else:
         try:
-            rv_str = subprocess.check_output(
-                [sage_bin_path,
-                 sage_script_dir + 'solve_single_eq_single_var.sage'] +
-                [str(precision), str(eq), var]
+            rv_str = run_sage_script(
+                'solve_single_eq_single_var.sage',
+                [str(precision), str(eq), var],
+                logger_name=logger_name,
             )
         except (KeyboardInterrupt, SystemExit):
             raise
@@ -93,9 +314,8 @@ def solve_single_eq_single_var(
 
 def get_g_data(root_system, highest_weight):
     try:
-        g_data_str = subprocess.check_output(
-            [sage_bin_path, sage_script_dir + 'get_g_data.sage', root_system,
-             str(highest_weight)]
+        g_data_str = run_sage_script(
+            'get_g_data.sage', [root_system, str(highest_weight)],
         )
     except (KeyboardInterrupt, SystemExit):
         raise
@@ -112,10 +332,7 @@ def compute_discriminant(f):
     The discriminant will be computed with respect to x.
     """
     try:
-        disc_str = subprocess.check_output(
-            [sage_bin_path, sage_script_dir + 'compute_discriminant.sage'] +
-            [str(f)]
-        )
+        disc_str = run_sage_script('compute_discriminant.sage', [str(f)])
     except (KeyboardInterrupt, SystemExit):
         raise
     disc_sym = sympify(disc_str)
@@ -4,29 +4,38 @@ import logging
 import itertools
 import json
 import cmath
+import multiprocessing
 
 import constants
 
 from cmath import exp
 from sympy import oo
+from multiprocessing.sharedctypes import RawArray
 
 from s_wall import (
-    SWall, Joint, get_s_wall_seeds, MIN_NUM_OF_DATA_PTS,
+    SWall, Joint, JointIndex, get_s_wall_seeds, MIN_NUM_OF_DATA_PTS,
 )
 from s_wall import GrowLibs
+from s_wall import grow_s_walls_in_batch, grow_s_walls_in_threads
+from s_wall import get_dense_intersection
 from misc import ctor2, r2toc
 from misc import nearest_index
+from misc import get_growth_domain_radius
 from misc import (
     n_nearest_indices, get_turning_points, get_splits_with_overlap,
     get_descendant_roots, sort_roots, get_delta,
 )
+from misc import get_chain_bboxes, get_chains_in_range, bboxes_overlap
+from misc import get_union_bbox, BoundingBoxGrid
 from intersection import (
     NoIntersection, find_intersection_of_segments,
+    find_intersections_of_polylines, locate_intersections,
 )
 from geometry import BranchPoint
 from geometry import get_xs_along_zs
 from trivialization import SWDataWithTrivialization
 from ctypes_api import libcgal_get_intersections
+from ctypes_api import libcgal_get_intersections_of_curve_set
 
 
 class Street(SWall):
@@ -468,10 +477,16 @@ class SpectralNetwork:
         # errors is a list of (error type string, error value tuples).
         self.errors = []
         self.n_finished_s_walls = None
+        # {label of an S-wall: number of its data points searched
+        # for joints}, i.e. every pair of S-walls a & b in the ledger
+        # are searched over a.z[:ledger[a]] and b.z[:ledger[b]].
+        self.intersection_ledger = {}
         self.soliton_trees = None
+        # Spatial hash of self.joints while growing the spectral network.
+        self.joint_index = None
         self.data_attributes = [
             'phase', 's_walls', 'joints', 'errors',
-            'n_finished_s_walls',
+            'n_finished_s_walls', 'intersection_ledger',
             'soliton_trees',
         ]
 
@@ -503,6 +518,7 @@ class SpectralNetwork:
         json_data = {}
         json_data['phase'] = self.phase
         json_data['n_finished_s_walls'] = self.n_finished_s_walls
+        json_data['intersection_ledger'] = self.intersection_ledger
         json_data['s_walls'] = [s_wall.get_json_data()
                                 for s_wall in self.s_walls]
         json_data['joints'] = [joint.get_json_data()
@@ -539,6 +555,17 @@ class SpectralNetwork:
             self.s_walls.append(an_s_wall)
             obj_dict[an_s_wall.label] = an_s_wall
 
+        try:
+            self.intersection_ledger = json_data['intersection_ledger']
+        except KeyError:
+            # The S-walls before n_finished_s_walls are searched
+            # for joints in the old data.
+            if self.n_finished_s_walls is not None:
+                self.intersection_ledger = {
+                    s_wall.label: len(s_wall.z)
+                    for s_wall in self.s_walls[:self.n_finished_s_walls]
+                }
+
         # Substitute labels with objects
         for s_wall in self.s_walls:
             s_wall.set_refs(obj_dict)
@@ -565,7 +592,19 @@ class SpectralNetwork:
 
     def downsample(self, ratio=None):
         for s_wall in self.s_walls:
+            n_data_pts = len(s_wall.z)
             s_wall.downsample(ratio=ratio)
+            # Keep the number of the searched data points
+            # in proportion, rounding it down.
+            try:
+                n_searched = self.intersection_ledger[s_wall.label]
+            except KeyError:
+                continue
+            if n_searched >= n_data_pts:
+                n_searched = len(s_wall.z)
+            else:
+                n_searched = n_searched * len(s_wall.z) // n_data_pts
+            self.intersection_ledger[s_wall.label] = n_searched
 
     def grow(
         self, config=None, sw_data=None,
@@ -578,7 +617,9 @@ class SpectralNetwork:
         downsample_ratio=None,
         seed_s_walls=None,
         num_of_iterations=None,
-        s_wall_label_prefix='S-wall'
+        s_wall_label_prefix='S-wall',
+        n_threads=1,
+        n_processes=1,
     ):
         """
         Grow the spectral network by seeding SWall's
@@ -588,6 +629,52 @@ class SpectralNetwork:
         is done for a given iteration, therefore it is possible
         that there is a joint from which an S-wall is not grown
         if the depth of the joint is too deep.
+
+        When n_threads > 1, the new S-walls of each iteration
+        are grown concurrently using a pool of n_threads threads.
+        When n_processes > 1, the intersections of the S-walls
+        of each iteration are found using a pool of n_processes
+        processes, which is created once for all the iterations,
+        see get_new_joints_in_processes(). Both default to 1.
+        """
+        with JointSearchPool(
+            n_processes, config['accuracy'],
+        ) as joint_search_pool:
+            self.grow_with_joint_search_pool(
+                joint_search_pool,
+                config=config, sw_data=sw_data,
+                additional_iterations=additional_iterations,
+                additional_n_steps=additional_n_steps,
+                new_mass_limit=new_mass_limit,
+                cache_file_path=cache_file_path,
+                method=method,
+                downsample=downsample,
+                downsample_ratio=downsample_ratio,
+                seed_s_walls=seed_s_walls,
+                num_of_iterations=num_of_iterations,
+                s_wall_label_prefix=s_wall_label_prefix,
+                n_threads=n_threads,
+                n_processes=n_processes,
+            )
+
+    def grow_with_joint_search_pool(
+        self, joint_search_pool, config=None, sw_data=None,
+        additional_iterations=0,
+        additional_n_steps=0,
+        new_mass_limit=None,
+        cache_file_path=None,
+        method=None,
+        downsample=False,
+        downsample_ratio=None,
+        seed_s_walls=None,
+        num_of_iterations=None,
+        s_wall_label_prefix='S-wall',
+        n_threads=1,
+        n_processes=1,
+    ):
+        """
+        Do the work of grow(), finding joints in joint_search_pool
+        when n_processes > 1. The pool is closed by grow().
         """
         logger = logging.getLogger(self.logger_name)
 
@@ -598,11 +685,30 @@ class SpectralNetwork:
             logger.info('Use CGAL to find intersections.')
             use_cgal = True
         except OSError:
-            logger.warning('CGAL not available; use interpolation '
+            logger.warning('CGAL not available; use NumPy '
                            'to find intersections.')
-            get_intersections = find_intersections_of_curves
+            get_intersections = find_intersections_of_polylines
             use_cgal = False
 
+        # Find intersections among all S-walls of an iteration
+        # with a single sweep when the CGAL library supports it.
+        get_intersections_of_curve_set = None
+        if use_cgal is True:
+            try:
+                get_intersections_of_curve_set = (
+                    libcgal_get_intersections_of_curve_set()
+                )
+                logger.info('Use a single CGAL sweep for each iteration.')
+            except OSError:
+                # NOTE: The prebuilt CGAL libraries in cgal_intersection/
+                # are built from a source without this function, and
+                # need to be rebuilt to use it.
+                logger.info(
+                    'The CGAL library does not support finding '
+                    'intersections of many curves; rebuild it to '
+                    'find them with a single sweep.'
+                )
+
         s_wall_grow_libs = GrowLibs(
             config=config,
             sw_data=sw_data,
@@ -628,6 +734,14 @@ class SpectralNetwork:
             )
             method = s_wall_grow_libs.default_lib
 
+        # When growing S-walls in a batch, the parts of S-walls that are
+        # not grown in the batch are grown individually with
+        # a default library.
+        if method == constants.LIB_BATCH:
+            s_wall_method = None
+        else:
+            s_wall_method = method
+
         # Gather z-coordinates of punctures and branch points.
         ppzs = [
             p.z for p in
@@ -643,6 +757,11 @@ class SpectralNetwork:
 
         if num_of_iterations is None:
             num_of_iterations = config['num_of_iterations']
+        # Grid of the S-walls for finding joints, see get_new_joints().
+        s_wall_grid = None
+        # Spatial hash of the joints for finding the joints
+        # that already exist, see get_joints_at_intersections().
+        self.joint_index = JointIndex(config['accuracy'], self.joints)
         n_steps = config['num_of_steps']
         if(
             additional_n_steps == 0 and
@@ -764,25 +883,57 @@ class SpectralNetwork:
                 )
                 new_s_walls = []
 
+            # S-walls grown before the loop below, with the errors
+            # raised while growing them.
+            if method == constants.LIB_BATCH:
+                pre_grown_s_walls = grow_s_walls_in_batch(
+                    new_s_walls,
+                    branch_point_zs=bpzs,
+                    puncture_point_zs=ppzs,
+                    config=config,
+                    libs=s_wall_grow_libs,
+                    twist_lines=sw_data.twist_lines,
+                    method=s_wall_method,
+                    logger_name=self.logger_name,
+                )
+            elif n_threads > 1 and len(new_s_walls) > 1:
+                pre_grown_s_walls = grow_s_walls_in_threads(
+                    new_s_walls,
+                    n_threads,
+                    branch_point_zs=bpzs,
+                    puncture_point_zs=ppzs,
+                    config=config,
+                    libs=s_wall_grow_libs,
+                    twist_lines=sw_data.twist_lines,
+                    method=s_wall_method,
+                    logger_name=self.logger_name,
+                )
+            else:
+                pre_grown_s_walls = {}
+
             # Grow each newly-seeded S-wall.
             i = 0
             while (i < len(new_s_walls)):
                 s_i = new_s_walls[i]
                 try:
-                    s_i.grow(
-                        branch_point_zs=bpzs,
-                        puncture_point_zs=ppzs,
-                        config=config,
-                        libs=s_wall_grow_libs,
-                        use_scipy_ode=config['use_scipy_ode'],
-                        twist_lines=sw_data.twist_lines,
-                        method=method,
-                    )
+                    if s_i in pre_grown_s_walls:
+                        if pre_grown_s_walls[s_i] is not None:
+                            raise pre_grown_s_walls[s_i]
+                    else:
+                        s_i.grow(
+                            branch_point_zs=bpzs,
+                            puncture_point_zs=ppzs,
+                            config=config,
+                            libs=s_wall_grow_libs,
+                            use_scipy_ode=config['use_scipy_ode'],
+                            twist_lines=sw_data.twist_lines,
+                            method=s_wall_method,
+                        )
 
                     if len(s_i.z) < MIN_NUM_OF_DATA_PTS:
                         logger.warning(
                             '{} has only {} data point(s); remove this S-wall.'
-                            .format(s_i, len(s_i).z)
+                            .format(s_i, len(s_i.z))
                         )
                         new_s_walls.pop(i)
                         continue
@@ -819,7 +970,7 @@ class SpectralNetwork:
                                 config=config,
                                 libs=s_wall_grow_libs,
                                 use_scipy_ode=False,
-                                method=method,
+                                method=s_wall_method,
                             )
                             root_types = s_i.determine_root_types(
                                 sw_data,
@@ -854,49 +1005,6 @@ class SpectralNetwork:
                 .format(iteration)
             )
 
-            # Find joints between the new S-wall and the previous S-walls,
-            # and among the new S-walls.
-            new_joints = []     # New joints found in each iteration.
-            if iteration < num_of_iterations:
-                # S-walls that are already searched for joints.
-                finished_s_walls = self.s_walls[:self.n_finished_s_walls]
-                # S-walls that are not searched for joints.
-                unfinished_s_walls = (
-                    self.s_walls[self.n_finished_s_walls:] + new_s_walls
-                )
-
-                all_s_walls = unfinished_s_walls + finished_s_walls
-                # Now for each of the new (unfinished) walls, we check its
-                # joints with other unfinished S-walls that come after it,
-                # as well as with all the old (finished) walls.
-                # This corresponds to the list slicing
-                # all_s_walls[m + 1:]
-                for m, unfinished_s_wall in enumerate(unfinished_s_walls):
-                    try:
-                        new_joints += self.get_new_joints(
-                            unfinished_s_wall, all_s_walls[m + 1:],
-                            config, sw_data, get_intersections, use_cgal,
-                        )
-                    except RuntimeError as e:
-                        error_msg = (
-                            'Error while finding joints from {}: {}\n'
-                            'Stop finding joints from this S-wall.'
-                            .format(unfinished_s_wall, e)
-                        )
-                        logger.error(error_msg)
-                        self.errors.append(
-                            ('RuntimeError', error_msg)
-                        )
-                    finished_s_walls.append(unfinished_s_wall)
-
-                if (
-                    (additional_n_steps > 0 or new_mass_limit is not None) and
-                    iteration == 1
-                ):
-                    self.n_finished_s_walls = len(self.s_walls)
-                else:
-                    self.n_finished_s_walls += len(unfinished_s_walls)
-
             # Add the new S-walls to the spectral network
             if (
                 (additional_n_steps > 0 or new_mass_limit is not None) and
@@ -921,6 +1029,7 @@ class SpectralNetwork:
                     psw.z = numpy.concatenate((psw.z, nsw.z[1:]))
                     psw.x = numpy.concatenate((psw.x, nsw.x[1:]))
                     psw.M = numpy.concatenate((psw.M, nsw.M[1:]))
+                    psw.c_dz_dt = nsw.c_dz_dt
 
                     if sw_data.is_trivialized():
                         psw.local_roots += nsw.local_roots[1:]
@@ -942,6 +1051,90 @@ class SpectralNetwork:
             else:
                 self.s_walls += new_s_walls
 
+            # Find joints between the new S-wall and the previous S-walls,
+            # and among the new S-walls.
+            new_joints = []     # New joints found in each iteration.
+            if iteration < num_of_iterations:
+                # S-walls that are already searched for joints,
+                # and those that are new or have new data points
+                # that are not searched, see self.intersection_ledger.
+                finished_s_walls = []
+                unfinished_s_walls = []
+                for s_wall in self.s_walls:
+                    if (
+                        len(s_wall.z) >
+                        self.intersection_ledger.get(s_wall.label, 0)
+                    ):
+                        unfinished_s_walls.append(s_wall)
+                    else:
+                        finished_s_walls.append(s_wall)
+
+                all_s_walls = unfinished_s_walls + finished_s_walls
+
+                if get_intersections_of_curve_set is None:
+                    # Register the bounding boxes of the monotone chains
+                    # of the S-walls to a grid, which is updated only for
+                    # S-walls that are new or changed in each iteration.
+                    if s_wall_grid is None:
+                        s_wall_grid = BoundingBoxGrid(get_grid_cell_size(
+                            all_s_walls, config['accuracy'],
+                        ))
+                    for s_wall in all_s_walls:
+                        _, bboxes = s_wall.get_chains()
+                        s_wall_grid.update(s_wall, bboxes)
+
+                if get_intersections_of_curve_set is not None:
+                    # Find the joints among the S-walls at once.
+                    new_joints += self.get_new_joints_in_batch(
+                        unfinished_s_walls, all_s_walls, config, sw_data,
+                        get_intersections_of_curve_set,
+                    )
+                elif n_processes > 1 and len(unfinished_s_walls) > 1:
+                    # Find the intersections in a pool of processes,
+                    # which is reused in the following iterations.
+                    new_joints += self.get_new_joints_in_processes(
+                        unfinished_s_walls, all_s_walls, s_wall_grid,
+                        config, sw_data, joint_search_pool,
+                    )
+                    finished_s_walls += unfinished_s_walls
+                else:
+                    # Segments of the S-walls, see get_joint_search_tasks().
+                    segment_data = {}
+                    # Now for each of the new (unfinished) walls, we check its
+                    # joints with other unfinished S-walls that come after it,
+                    # as well as with all the old (finished) walls.
+                    # This corresponds to the list slicing
+                    # all_s_walls[m + 1:], from which we only take S-walls
+                    # whose bounding boxes overlap with the new one.
+                    for m, unfinished_s_wall in enumerate(unfinished_s_walls):
+                        _, bboxes = unfinished_s_wall.get_chains()
+                        nearby_s_walls = s_wall_grid.query(
+                            bboxes, config['accuracy'],
+                        )
+                        try:
+                            new_joints += self.get_new_joints(
+                                unfinished_s_wall,
+                                [s_wall for s_wall in all_s_walls[m + 1:]
+                                 if s_wall in nearby_s_walls],
+                                config, sw_data, get_intersections, use_cgal,
+                                segment_data,
+                            )
+                        except RuntimeError as e:
+                            error_msg = (
+                                'Error while finding joints from {}: {}\n'
+                                'Stop finding joints from this S-wall.'
+                                .format(unfinished_s_wall, e)
+                            )
+                            logger.error(error_msg)
+                            self.errors.append(
+                                ('RuntimeError', error_msg)
+                            )
+                        finished_s_walls.append(unfinished_s_wall)
+
+                for s_wall in unfinished_s_walls:
+                    self.intersection_ledger[s_wall.label] = len(s_wall.z)
+                self.n_finished_s_walls = len(self.s_walls)
+
             if(len(new_joints) == 0):
                 if iteration < num_of_iterations:
                     logger.info(
@@ -961,6 +1154,7 @@ class SpectralNetwork:
             for joint in new_joints:
                 joint.label = 'joint #{}'.format(len(self.joints))
                 self.joints.append(joint)
+                self.joint_index.insert(joint)
                 label = '{} #{}'.format(
                     s_wall_label_prefix,
                     len(self.s_walls) + len(new_s_walls),
@@ -988,6 +1182,8 @@ class SpectralNetwork:
             logger.info('Iteration #{} finished.'.format(iteration))
             iteration += 1
 
+        self.joint_index = None
+
         logger.info('Finished growing a spectral network at phase = {}'
                     .format(self.phase))
 
@@ -1000,15 +1196,72 @@ class SpectralNetwork:
 
     def get_new_joints(
         self, new_s_wall, prev_s_walls, config, sw_data,
-        get_intersections, use_cgal,
+        get_intersections, use_cgal, segment_data=None,
     ):
         """
         Find intersections between S-walls using
-        either CGAL 2d curve intersection or scipy interpolation
+        either CGAL 2d curve intersection or NumPy polyline intersection
         according to the availability, then form joints
         from the intersection points.
+
+        segment_data is a dict caching the segments of S-walls,
+        see get_joint_search_tasks().
         """
+        new_joints = []
+        n_tps, n_bboxes = new_s_wall.get_chains()
+
+        for prev_s_wall, n_z_i, n_z_f, p_z_i, p_z_f in (
+            self.get_joint_search_tasks(
+                new_s_wall, prev_s_walls, config, sw_data, segment_data,
+            )
+        ):
+            # Find an intersection of the two segments on the z-plane.
+            n_zs = new_s_wall.z[n_z_i:n_z_f + 1]
+            p_zs = prev_s_wall.z[p_z_i:p_z_f + 1]
+            if use_cgal is True:
+                intersections = locate_intersections(
+                    n_zs, p_zs,
+                    find_intersections_with_cgal(
+                        get_intersections, n_zs, p_zs,
+                        logger_name=self.logger_name,
+                    ),
+                )
+            else:
+                p_tps, p_bboxes = prev_s_wall.get_chains()
+                intersections = get_intersections(
+                    n_zs, p_zs, config['accuracy'],
+                    a_chains=get_chains_in_range(
+                        n_tps, n_bboxes, n_z_i, n_z_f,
+                    ),
+                    b_chains=get_chains_in_range(
+                        p_tps, p_bboxes, p_z_i, p_z_f,
+                    ),
+                    return_segments=True,
+                )
+
+            new_joints += self.get_joints_at_intersections(
+                new_s_wall, prev_s_wall, intersections, config, sw_data,
+                n_offset=n_z_i, p_offset=p_z_i,
+            )
+
+        return new_joints
 
+    def get_joint_search_tasks(
+        self, new_s_wall, prev_s_walls, config, sw_data, segment_data=None,
+    ):
+        """
+        Return the pairs of segments of new_s_wall and the S-walls
+        of prev_s_walls that can form joints and whose bounding boxes
+        overlap, as a list of
+        [(prev_s_wall, n_z_i, n_z_f, p_z_i, p_z_f), ...], where
+        new_s_wall.z[n_z_i:n_z_f + 1] and prev_s_wall.z[p_z_i:p_z_f + 1]
+        are the segments to find intersections, leaving out the parts
+        already searched according to self.intersection_ledger.
+
+        segment_data is a dict caching get_segment_data() of S-walls
+        by their labels, which is shared among the calls while
+        the S-walls are not changed.
+        """
         logger = logging.getLogger(self.logger_name)
         accuracy = config['accuracy']
 
@@ -1019,7 +1272,22 @@ class SpectralNetwork:
             )
             return []
 
-        new_joints = []
+        if segment_data is None:
+            segment_data = {}
+
+        def get_data(s_wall):
+            try:
+                return segment_data[s_wall.label]
+            except KeyError:
+                data = get_segment_data(s_wall, sw_data)
+                segment_data[s_wall.label] = data
+                return data
+
+        tasks = []
+        n_z_splits, n_seg_bboxes, n_seg_root_indices = get_data(new_s_wall)
+        num_n_z_segs = len(n_z_splits) - 1
+        n_searched = self.intersection_ledger.get(new_s_wall.label, 0)
+
         for prev_s_wall in prev_s_walls:
             # First check if the two S-walls are compatible
             # for forming a joint.
@@ -1033,162 +1301,457 @@ class SpectralNetwork:
             # according to the trivialization, then
             # check the compatibility of a pair
             # of segments.
-            n_z_splits = new_s_wall.get_splits(endpoints=True)
-            num_n_z_segs = len(n_z_splits) - 1
-            p_z_splits = prev_s_wall.get_splits(endpoints=True)
+            p_z_splits, p_seg_bboxes, p_seg_root_indices = get_data(
+                prev_s_wall
+            )
             num_p_z_segs = len(p_z_splits) - 1
+            p_searched = self.intersection_ledger.get(prev_s_wall.label, 0)
 
             for n_z_seg_i, p_z_seg_i in itertools.product(
                 range(num_n_z_segs), range(num_p_z_segs)
             ):
-                n_z_i = n_z_splits[n_z_seg_i]
-                n_z_f = n_z_splits[n_z_seg_i + 1]
-                p_z_i = p_z_splits[p_z_seg_i]
-                p_z_f = p_z_splits[p_z_seg_i + 1]
-
-                if sw_data.is_trivialized():
-                    descendant_roots = get_descendant_roots(
-                        (prev_s_wall.multiple_local_roots[p_z_seg_i] +
-                         new_s_wall.multiple_local_roots[n_z_seg_i]),
+                # Skip a pair of segments whose roots
+                # cannot form a joint.
+                if (
+                    n_seg_root_indices is not None and
+                    not root_indices_can_form_joint(
+                        n_seg_root_indices[n_z_seg_i],
+                        p_seg_root_indices[p_z_seg_i],
                         sw_data.g_data,
                     )
-                    if len(descendant_roots) == 0:
-                        # The two segments are not compatible for
-                        # forming a joint.
-                        continue
+                ):
+                    continue
 
-                # Find an intersection of the two segments on the z-plane.
-                if use_cgal is True:
-                    buffer_size = 10
-                    intersection_search_finished = False
-                    # logger.debug(
-                    #     'Finding intersections between {} [{}:{}] '
-                    #     'and {} [{}:{}].'
-                    #     .format(
-                    #         new_s_wall.label, n_z_i, n_z_f + 1,
-                    #         prev_s_wall.label, p_z_i, p_z_f + 1,
-                    #     )
-                    # )
-
-                    while not intersection_search_finished:
-                        intersections = numpy.empty((buffer_size, 2),
-                                                    dtype=numpy.float64)
-                        num_of_intersections = get_intersections(
-                            new_s_wall.z[n_z_i:n_z_f + 1],
-                            ctypes.c_long(n_z_f + 1 - n_z_i),
-                            prev_s_wall.z[p_z_i:p_z_f + 1],
-                            ctypes.c_long(p_z_f + 1 - p_z_i),
-                            intersections, buffer_size
-                        )
-                        if num_of_intersections == 0:
-                            intersections = []
-                            intersection_search_finished = True
-                        elif num_of_intersections > buffer_size:
-                            logger.info('Number of intersections larger than '
-                                        'the buffer size; increase its size '
-                                        'to {} and find intersections again.'
-                                        .format(num_of_intersections))
-                            buffer_size = num_of_intersections
-                        else:
-                            intersections.resize((num_of_intersections, 2))
-                            intersection_search_finished = True
+                # Skip a pair of segments that are apart.
+                if not bboxes_overlap(
+                    n_seg_bboxes[n_z_seg_i], p_seg_bboxes[p_z_seg_i],
+                    accuracy,
+                ):
+                    continue
 
-                else:
-                    intersections = get_intersections(
-                        new_s_wall.z[n_z_i:n_z_f + 1],
-                        prev_s_wall.z[p_z_i:p_z_f + 1],
-                        accuracy,
+                # Search only the parts of the segments
+                # that are not searched yet.
+                for (n_z_i, n_z_f), (p_z_i, p_z_f) in get_unsearched_ranges(
+                    (n_z_splits[n_z_seg_i], n_z_splits[n_z_seg_i + 1]),
+                    (p_z_splits[p_z_seg_i], p_z_splits[p_z_seg_i + 1]),
+                    n_searched, p_searched,
+                ):
+                    tasks.append((prev_s_wall, n_z_i, n_z_f, p_z_i, p_z_f))
+
+        return tasks
+
+    def get_new_joints_in_processes(
+        self, unfinished_s_walls, all_s_walls, s_wall_grid, config,
+        sw_data, joint_search_pool,
+    ):
+        """
+        Find joints between each unfinished S-wall, which are
+        at the beginning of all_s_walls, and the nearby S-walls after it
+        in s_wall_grid, as calling get_new_joints() for each unfinished
+        S-wall but finding the intersections in a JointSearchPool.
+
+        The coordinates of the S-walls are copied to shared memory
+        of the pool, so that only the ranges of the segments are sent
+        to the processes. The joints are formed from the intersections
+        in this process in the same order as get_new_joints().
+        """
+        logger = logging.getLogger(self.logger_name)
+
+        # Gather the pairs of segments to find intersections.
+        # [(index of new_s_wall, prev_s_wall, n_z_i, n_z_f, p_z_i, p_z_f),
+        #  ...]
+        tasks = []
+        failed_s_walls = []
+        segment_data = {}
+        for m, unfinished_s_wall in enumerate(unfinished_s_walls):
+            _, bboxes = unfinished_s_wall.get_chains()
+            nearby_s_walls = s_wall_grid.query(bboxes, config['accuracy'])
+            try:
+                tasks += [
+                    (m,) + task for task in self.get_joint_search_tasks(
+                        unfinished_s_wall,
+                        [s_wall for s_wall in all_s_walls[m + 1:]
+                         if s_wall in nearby_s_walls],
+                        config, sw_data, segment_data,
                     )
+                ]
+            except RuntimeError as e:
+                error_msg = (
+                    'Error while finding joints from {}: {}\n'
+                    'Stop finding joints from this S-wall.'
+                    .format(unfinished_s_wall, e)
+                )
+                logger.error(error_msg)
+                self.errors.append(('RuntimeError', error_msg))
+                failed_s_walls.append(unfinished_s_wall)
+        if len(tasks) == 0:
+            return []
 
-                for ip_x, ip_y in intersections:
-                    ip_z = ip_x + 1j * ip_y
+        # Copy the coordinates of the S-walls to shared memory.
+        offsets = {}
+        num_of_points = 0
+        for s_wall in all_s_walls:
+            offsets[s_wall.label] = num_of_points
+            num_of_points += len(s_wall.z)
+        zs = joint_search_pool.get_shared_zs(num_of_points)
+        for s_wall in all_s_walls:
+            offset = offsets[s_wall.label]
+            zs[offset:offset + len(s_wall.z)] = s_wall.z
+
+        # Ranges of the segments in the shared memory.
+        ranges = []
+        for m, prev_s_wall, n_z_i, n_z_f, p_z_i, p_z_f in tasks:
+            n_offset = offsets[unfinished_s_walls[m].label]
+            p_offset = offsets[prev_s_wall.label]
+            ranges.append((
+                n_offset + n_z_i, n_offset + n_z_f + 1,
+                p_offset + p_z_i, p_offset + p_z_f + 1,
+            ))
+        n_processes = joint_search_pool.n_processes
+        chunk_size = max(1, len(ranges) // (4 * n_processes))
+        chunks = [
+            ranges[i:i + chunk_size]
+            for i in range(0, len(ranges), chunk_size)
+        ]
 
-                    # Discard apparent intersections of sibling S-walls
-                    # that emanate from the same branch point, if they occur
-                    # at the beginning of the S-walls
-                    # Also discard any intersectins that occur near the
-                    # beginning of an S-wall
-                    if (
-                        # XXX: Do we need to check if the parent
-                        # is a branch point?
-                        prev_s_wall.parents == new_s_wall.parents and
-                        abs(ip_z - prev_s_wall.z[0]) < accuracy and
-                        abs(ip_z - new_s_wall.z[0]) < accuracy
-                    ):
-                        continue
-                    elif (
-                        nearest_index(prev_s_wall.z, ip_z) == 0 or
-                        nearest_index(new_s_wall.z, ip_z) == 0
-                    ):
-                        continue
-                    else:
-                        # t_n: index of new_s_wall.z nearest to ip_z
-                        t_n = get_nearest_point_index(
-                            new_s_wall.z, ip_z, sw_data.branch_points,
-                            accuracy,
-                        )
+        logger.info(
+            'Find intersections of {} pairs of segments '
+            'using {} processes.'.format(len(ranges), n_processes)
+        )
+        results = joint_search_pool.pool.map(
+            find_intersections_in_chunk, chunks,
+        )
 
-                        # t_p: index of z_seg_p nearest to ip_z
-                        t_p = get_nearest_point_index(
-                            prev_s_wall.z, ip_z, sw_data.branch_points,
-                            accuracy,
-                        )
+        new_joints = []
+        intersections_of_tasks = itertools.chain.from_iterable(results)
+        for (m, prev_s_wall, n_z_i, _, p_z_i, _), intersections in zip(
+            tasks, intersections_of_tasks
+        ):
+            new_s_wall = unfinished_s_walls[m]
+            if new_s_wall in failed_s_walls:
+                continue
+            try:
+                new_joints += self.get_joints_at_intersections(
+                    new_s_wall, prev_s_wall, intersections, config, sw_data,
+                    n_offset=n_z_i, p_offset=p_z_i,
+                )
+            except RuntimeError as e:
+                error_msg = (
+                    'Error while finding joints from {}: {}\n'
+                    'Stop finding joints from this S-wall.'
+                    .format(new_s_wall, e)
+                )
+                logger.error(error_msg)
+                self.errors.append(('RuntimeError', error_msg))
+                failed_s_walls.append(new_s_wall)
+
+        return new_joints
 
-                    # TODO: need to put the joint into the parent
-                    # S-walls?
+    def get_joints_at_intersections(
+        self, new_s_wall, prev_s_wall, intersections, config, sw_data,
+        n_offset=0, p_offset=0,
+    ):
+        """
+        Form joints at the intersection points
+        [(ip_x, ip_y, i_n, t_n, i_p, t_p), ...] of two S-walls,
+        discarding the joints that already exist. Each intersection
+        is on the line segment between new_s_wall.z[n_offset + i_n]
+        and new_s_wall.z[n_offset + i_n + 1] at the parameter t_n,
+        and similarly on prev_s_wall, see locate_intersections().
+        """
+        accuracy = config['accuracy']
+        growth_domain_radius = get_growth_domain_radius(config)
 
-                    # logger.debug('Intersection at z = {}'.format(ip_z))
+        new_joints = []
+        for ip_x, ip_y, i_n, _, i_p, _ in intersections:
+            ip_z = ip_x + 1j * ip_y
+            # Indices of the points of the S-walls nearest to ip_z
+            # on the segments containing it.
+            t_n_0 = get_nearer_index(new_s_wall.z, n_offset + int(i_n), ip_z)
+            t_p_0 = get_nearer_index(prev_s_wall.z, p_offset + int(i_p), ip_z)
+
+            # Discard apparent intersections of sibling S-walls
+            # that emanate from the same branch point, if they occur
+            # at the beginning of the S-walls
+            # Also discard any intersectins that occur near the
+            # beginning of an S-wall
+            if (
+                # XXX: Do we need to check if the parent
+                # is a branch point?
+                prev_s_wall.parents == new_s_wall.parents and
+                abs(ip_z - prev_s_wall.z[0]) < accuracy and
+                abs(ip_z - new_s_wall.z[0]) < accuracy
+            ):
+                continue
+            elif t_p_0 == 0 or t_n_0 == 0:
+                continue
+            elif abs(ip_z) > growth_domain_radius:
+                # Discard intersections of S-walls
+                # that left the growth domain.
+                continue
+            else:
+                # t_n: index of new_s_wall.z nearest to ip_z
+                t_n = get_nearest_point_index(
+                    new_s_wall.z, ip_z, sw_data.branch_points,
+                    accuracy, t_0=t_n_0,
+                )
 
-                    dxs = (get_delta(new_s_wall.x, t_n).tolist() +
-                           get_delta(prev_s_wall.x, t_p).tolist())
-                    if sw_data.is_trivialized():
-                        # TODO: check if the following descendant-roots
-                        # finding is necessary, note that we calculate
-                        # descendant roots above.
-                        descendant_roots = get_descendant_roots(
-                            (prev_s_wall.get_roots_at_t(t_p) +
-                             new_s_wall.get_roots_at_t(t_n)),
-                            sw_data.g_data,
-                        )
-                        joint_data_groups = get_joint_data_groups_by_roots(
-                            descendant_roots, ip_z, sw_data, accuracy,
-                        )
-                    else:
-                        joint_data_groups = get_joint_data_groups_from_xs(
-                            new_s_wall.x[t_n],
-                            prev_s_wall.x[t_p],
-                            sw_data.g_data.type,
-                            accuracy,
-                            dxs,
-                        )
+                # t_p: index of z_seg_p nearest to ip_z
+                t_p = get_nearest_point_index(
+                    prev_s_wall.z, ip_z, sw_data.branch_points,
+                    accuracy, t_0=t_p_0,
+                )
 
-                    joint_M = prev_s_wall.M[t_p] + new_s_wall.M[t_n]
-                    joint_parents = [prev_s_wall, new_s_wall]
-
-                    for roots, ode_xs in joint_data_groups:
-                        if len(roots) > 0:
-                            joint_roots = sort_roots(roots, sw_data.g_data)
-                        else:
-                            joint_roots = []
-
-                        a_joint = Joint(
-                            z=ip_z,
-                            M=joint_M,
-                            ode_xs=ode_xs,
-                            parents=joint_parents,
-                            roots=joint_roots,
-                        )
-                        joint_is_new = True
-                        for old_joint in self.joints:
-                            if a_joint.is_equal_to(
-                                old_joint,
-                                accuracy,
-                                max([abs(dx) for dx in dxs]),
-                            ):
-                                joint_is_new = False
-                                break
-                        if joint_is_new:
-                            new_joints.append(a_joint)
+                if (
+                    new_s_wall.has_dense_output() and
+                    prev_s_wall.has_dense_output()
+                ):
+                    ip_z = get_refined_intersection(
+                        new_s_wall, t_n, prev_s_wall, t_p, ip_z,
+                    )
+
+            # TODO: need to put the joint into the parent
+            # S-walls?
+
+            # logger.debug('Intersection at z = {}'.format(ip_z))
+
+            dxs = (get_delta(new_s_wall.x, t_n).tolist() +
+                   get_delta(prev_s_wall.x, t_p).tolist())
+            if sw_data.is_trivialized():
+                # TODO: check if the following descendant-roots
+                # finding is necessary, note that we calculate
+                # descendant roots above.
+                descendant_roots = get_descendant_roots(
+                    (prev_s_wall.get_roots_at_t(t_p) +
+                     new_s_wall.get_roots_at_t(t_n)),
+                    sw_data.g_data,
+                )
+                joint_data_groups = get_joint_data_groups_by_roots(
+                    descendant_roots, ip_z, sw_data, accuracy,
+                )
+            else:
+                joint_data_groups = get_joint_data_groups_from_xs(
+                    new_s_wall.x[t_n],
+                    prev_s_wall.x[t_p],
+                    sw_data.g_data.type,
+                    accuracy,
+                    dxs,
+                )
+
+            joint_M = prev_s_wall.M[t_p] + new_s_wall.M[t_n]
+            joint_parents = [prev_s_wall, new_s_wall]
+
+            for roots, ode_xs in joint_data_groups:
+                if len(roots) > 0:
+                    joint_roots = sort_roots(roots, sw_data.g_data)
+                else:
+                    joint_roots = []
+
+                a_joint = Joint(
+                    z=ip_z,
+                    M=joint_M,
+                    ode_xs=ode_xs,
+                    parents=joint_parents,
+                    roots=joint_roots,
+                )
+                old_joint = self.joint_index.find_equal(
+                    a_joint, accuracy, max([abs(dx) for dx in dxs]),
+                )
+                if old_joint is None:
+                    new_joints.append(a_joint)
+
+        return new_joints
+
+    def get_new_joints_in_batch(
+        self, unfinished_s_walls, all_s_walls, config, sw_data,
+        get_intersections_of_curve_set,
+    ):
+        """
+        Find joints between each unfinished S-wall, which are
+        at the beginning of all_s_walls, and the S-walls after it,
+        as calling get_new_joints() for each unfinished S-wall
+        but finding the intersections among all the segments of
+        the S-walls with a single sweep of the CGAL library, which
+        leaves out the parts of the S-walls that are already searched
+        and apart from the parts that are not.
+        """
+        logger = logging.getLogger(self.logger_name)
+        accuracy = config['accuracy']
+
+        if (config['root_system'] in ['A1', ]):
+            logger.info(
+                'There is no joint for the given root system {}.'
+                .format(config['root_system'])
+            )
+            return []
+
+        # Split the segments of the S-walls into the parts that are
+        # already searched and those that are not, according to
+        # self.intersection_ledger, as curves. An intersection between
+        # two searched parts is not a new one, therefore the sweep
+        # includes only the unsearched parts and the searched parts
+        # whose bounding boxes overlap with an unsearched part.
+        # [(index of an S-wall in all_s_walls, index of a segment,
+        #   index of the S-wall where the curve starts,
+        #   index of the S-wall where the curve ends), ...]
+        new_curve_data = []
+        old_curve_data = []
+        # Indices of the roots of the segments of each S-wall.
+        seg_root_indices = []
+        for k, s_wall in enumerate(all_s_walls):
+            z_splits = s_wall.get_splits(endpoints=True)
+            if sw_data.is_trivialized():
+                seg_root_indices.append([
+                    get_root_indices(roots, sw_data.g_data)
+                    for roots in s_wall.multiple_local_roots
+                ])
+            n_searched = self.intersection_ledger.get(s_wall.label, 0)
+            for seg_i in range(len(z_splits) - 1):
+                z_i = z_splits[seg_i]
+                z_f = z_splits[seg_i + 1]
+                new_z_i = max(z_i, n_searched - 1)
+                if new_z_i < z_f:
+                    new_curve_data.append((k, seg_i, new_z_i, z_f))
+                old_z_f = min(z_f, n_searched - 1)
+                if z_i < old_z_f:
+                    old_curve_data.append((k, seg_i, z_i, old_z_f))
+        if len(new_curve_data) == 0:
+            return []
+
+        def get_bboxes(curve_data):
+            return [
+                get_chain_bboxes(all_s_walls[k].z[z_i:z_f + 1])
+                for k, _, z_i, z_f in curve_data
+            ]
+
+        new_bboxes = numpy.concatenate(get_bboxes(new_curve_data))
+        curve_data = list(new_curve_data)
+        for a_curve_data, old_bboxes in zip(
+            old_curve_data, get_bboxes(old_curve_data)
+        ):
+            qs = old_bboxes[:, None, :]
+            bs = new_bboxes[None, :, :]
+            if numpy.any(
+                (qs[..., 0] <= bs[..., 1] + accuracy) &
+                (bs[..., 0] <= qs[..., 1] + accuracy) &
+                (qs[..., 2] <= bs[..., 3] + accuracy) &
+                (bs[..., 2] <= qs[..., 3] + accuracy)
+            ):
+                curve_data.append(a_curve_data)
+
+        curve_zs = [
+            all_s_walls[k].z[z_i:z_f + 1] for k, _, z_i, z_f in curve_data
+        ]
+        curve_offsets = numpy.cumsum(
+            [0] + [len(zs) for zs in curve_zs]
+        )
+        points = numpy.ascontiguousarray(
+            numpy.concatenate(curve_zs), dtype=numpy.complex128,
+        )
+        curve_offsets = numpy.array(curve_offsets, dtype=numpy.int64)
+
+        buffer_size = 10 * len(curve_data)
+        intersection_search_finished = False
+        while not intersection_search_finished:
+            intersection_data = numpy.empty((buffer_size, 8),
+                                            dtype=numpy.float64)
+            num_of_intersections = get_intersections_of_curve_set(
+                points, curve_offsets, len(curve_data), accuracy,
+                intersection_data, buffer_size,
+            )
+            if num_of_intersections > buffer_size:
+                logger.info('Number of intersections larger than '
+                            'the buffer size; increase its size '
+                            'to {} and find intersections again.'
+                            .format(num_of_intersections))
+                buffer_size = num_of_intersections
+            else:
+                intersection_data.resize((num_of_intersections, 8))
+                intersection_search_finished = True
+
+        # Group the intersections by pairs of segments,
+        # {(m, k, n_z_seg_i, p_z_seg_i): [(ip_x, ip_y, t_n, s_n, t_p, s_p),
+        #                                 ...]},
+        # where all_s_walls[m] is an unfinished S-wall and m < k,
+        # and the intersection is between all_s_walls[m].z[t_n] and
+        # all_s_walls[m].z[t_n + 1] at the parameter s_n, and so on.
+        n_unfinished_s_walls = len(unfinished_s_walls)
+        intersections_of_segments = {}
+        # An intersection near the point where a segment of an S-wall
+        # is split into two curves is on both of them, and the CGAL
+        # library returns the same intersection point for each curve,
+        # therefore keep one of them for each pair of S-walls.
+        found_intersections = set()
+        for ip_x, ip_y, c_a, i_a, t_a, c_b, i_b, t_b in intersection_data:
+            k_a, seg_i_a, z_i_a, _ = curve_data[int(c_a)]
+            k_b, seg_i_b, z_i_b, _ = curve_data[int(c_b)]
+            i_a += z_i_a
+            i_b += z_i_b
+            if k_a == k_b:
+                continue
+            elif k_a > k_b:
+                k_a, seg_i_a, i_a, t_a, k_b, seg_i_b, i_b, t_b = (
+                    k_b, seg_i_b, i_b, t_b, k_a, seg_i_a, i_a, t_a
+                )
+            if k_a >= n_unfinished_s_walls:
+                continue
+            if (
+                i_a < self.intersection_ledger.get(
+                    all_s_walls[k_a].label, 0
+                ) - 1 and
+                i_b < self.intersection_ledger.get(
+                    all_s_walls[k_b].label, 0
+                ) - 1
+            ):
+                # Already searched.
+                continue
+            if (ip_x, ip_y, k_a, k_b) in found_intersections:
+                continue
+            found_intersections.add((ip_x, ip_y, k_a, k_b))
+            intersections_of_segments.setdefault(
+                (k_a, k_b, seg_i_a, seg_i_b), []
+            ).append((ip_x, ip_y, i_a, t_a, i_b, t_b))
+
+        new_joints = []
+        failed_s_walls = []
+        # Form joints in the same order as get_new_joints().
+        for m, k, n_z_seg_i, p_z_seg_i in sorted(
+            intersections_of_segments.keys()
+        ):
+            new_s_wall = all_s_walls[m]
+            prev_s_wall = all_s_walls[k]
+            if (
+                new_s_wall in failed_s_walls or
+                prev_s_wall in new_s_wall.parents or
+                (
+                    sw_data.is_trivialized() and
+                    not root_indices_can_form_joint(
+                        seg_root_indices[m][n_z_seg_i],
+                        seg_root_indices[k][p_z_seg_i],
+                        sw_data.g_data,
+                    )
+                )
+            ):
+                continue
+            try:
+                new_joints += self.get_joints_at_intersections(
+                    new_s_wall, prev_s_wall,
+                    intersections_of_segments[
+                        (m, k, n_z_seg_i, p_z_seg_i)
+                    ],
+                    config, sw_data,
+                )
+            except RuntimeError as e:
+                error_msg = (
+                    'Error while finding joints from {}: {}\n'
+                    'Stop finding joints from this S-wall.'
+                    .format(new_s_wall, e)
+                )
+                logger.error(error_msg)
+                self.errors.append(
+                    ('RuntimeError', error_msg)
+                )
+                failed_s_walls.append(new_s_wall)
 
         return new_joints
 
@@ -1377,7 +1940,7 @@ class SpectralNetwork:
                     # Skip if the S-wall is a child of the branch point.
                     # unless it forms a loop and comes back
                     # to the branch point.
-                    tps = get_turning_points(s_wall.z)
+                    tps = s_wall.get_turning_points()
                     if len(tps) >= 3:
                         min_t = (
                             (numpy.argmin(abs(s_wall.z[tps[2]:] - bp.z)) +
@@ -1433,9 +1996,7 @@ class SpectralNetwork:
                         ):
                             raise NotImplementedError
                         rp_x = rp.x
-                        sheets = n_nearest_indices(
-                            sw_data.ffr_curve.get_xs(z_t), rp_x, 2,
-                        )
+                        sheets = n_nearest_indices(curve_xs, rp_x, 2)
                         if (sheet_1 in sheets and sheet_2 in sheets):
                             if found:
                                 raise RuntimeError(
@@ -1481,18 +2042,37 @@ class SpectralNetwork:
 # End of class SpectralNetwork
 
 
+def get_refined_intersection(s_wall_1, t_1, s_wall_2, t_2, ip_z):
+    """
+    Refine the intersection ip_z of two S-walls, which is near
+    s_wall_1.z[t_1] and s_wall_2.z[t_2], using the dense outputs
+    of the S-walls instead of the straight segments between data points.
+    """
+    for t_1_i in (t_1 - 1, t_1):
+        if t_1_i < 0 or t_1_i + 1 >= len(s_wall_1.z):
+            continue
+        for t_2_i in (t_2 - 1, t_2):
+            if t_2_i < 0 or t_2_i + 1 >= len(s_wall_2.z):
+                continue
+            z = get_dense_intersection(s_wall_1, t_1_i, s_wall_2, t_2_i)
+            if z is not None:
+                return z
+    return ip_z
+
+
 def get_nearest_point_index(s_wall_z, p_z, branch_points, accuracy,
-                            logger_name='loom',):
+                            logger_name='loom', t_0=None,):
     """
     Get the index of the point on the S-wall that is nearest to
-    the given point on the z-plane.
+    the given point on the z-plane, which is t_0 if given.
 
     When the point found is within the accuracy limit from a branch cut,
     look fot the next nearest point and return its index.
     """
     logger = logging.getLogger(logger_name)
 
-    t_0 = nearest_index(s_wall_z, p_z)
+    if t_0 is None:
+        t_0 = nearest_index(s_wall_z, p_z)
 
     t = t_0
 
@@ -1575,20 +2155,139 @@ def get_nearest_point_index(s_wall_z, p_z, branch_points, accuracy,
     return t
 
 
-def find_intersections_of_curves(a_zs, b_zs, accuracy):
+def get_root_indices(roots, g_data):
+    """
+    Return the indices of the roots in GData.roots,
+    skipping any that is not found there.
+    """
+    root_indices = []
+    for root in roots:
+        i = g_data.get_root_index(root)
+        if i is not None:
+            root_indices.append(i)
+    return root_indices
+
+
+def root_indices_can_form_joint(n_root_indices, p_root_indices, g_data):
+    """
+    Check if the roots of two segments of S-walls, given as indices
+    of GData.roots, have descendant roots, i.e. if there is a pair of
+    them whose sum is a root, as get_descendant_roots() but looking up
+    GData.get_root_sum_table().
+    """
+    root_sum_table = g_data.get_root_sum_table()
+    for i, j in itertools.combinations(p_root_indices + n_root_indices, 2):
+        if j in root_sum_table[i]:
+            return True
+    return False
+
 
-    a_tps = get_turning_points(a_zs)
+def get_segment_data(s_wall, sw_data):
+    """
+    Return (z_splits, seg_bboxes, seg_root_indices) of the segments
+    of an S-wall according to the trivialization, where z_splits are
+    from SWall.get_splits(endpoints=True), seg_bboxes are the bounding
+    boxes of the segments, and seg_root_indices are the indices of
+    the roots of the segments, or None if sw_data is not trivialized.
+    """
+    tps, bboxes = s_wall.get_chains()
+    z_splits = s_wall.get_splits(endpoints=True)
+    seg_bboxes = [
+        get_union_bbox(get_chains_in_range(
+            tps, bboxes, z_splits[i], z_splits[i + 1],
+        )[1])
+        for i in range(len(z_splits) - 1)
+    ]
+    if sw_data.is_trivialized():
+        seg_root_indices = [
+            get_root_indices(roots, sw_data.g_data)
+            for roots in s_wall.multiple_local_roots
+        ]
+    else:
+        seg_root_indices = None
+    return (z_splits, seg_bboxes, seg_root_indices)
+
+
+def get_unsearched_ranges(n_range, p_range, n_searched, p_searched):
+    """
+    Return the parts of a pair of ranges [n_z_i, n_z_f] & [p_z_i, p_z_f]
+    of the data points of two S-walls that are not searched for joints,
+    when the S-walls are searched over their first n_searched and
+    p_searched data points, as a list of pairs of ranges.
+    """
+    n_z_i, n_z_f = n_range
+    p_z_i, p_z_f = p_range
+    ranges = []
+    # The new data points of the first S-wall against the second S-wall.
+    n_new_z_i = max(n_z_i, n_searched - 1)
+    if n_new_z_i < n_z_f:
+        ranges.append(((n_new_z_i, n_z_f), (p_z_i, p_z_f)))
+    # The searched data points of the first S-wall
+    # against the new data points of the second S-wall.
+    n_old_z_f = min(n_z_f, n_searched - 1)
+    p_new_z_i = max(p_z_i, p_searched - 1)
+    if n_z_i < n_old_z_f and p_new_z_i < p_z_f:
+        ranges.append(((n_z_i, n_old_z_f), (p_new_z_i, p_z_f)))
+    return ranges
+
+
+def get_nearer_index(zs, i, z):
+    """
+    Return i or i + 1, whichever of zs[i] and zs[i + 1] is nearer to z.
+    """
+    if i + 1 < len(zs) and abs(zs[i + 1] - z) < abs(zs[i] - z):
+        return i + 1
+    return i
+
+
+def get_grid_cell_size(s_walls, accuracy):
+    """
+    Return the size of the cells of a BoundingBoxGrid for S-walls,
+    which is the median extent of the monotone chains of the S-walls.
+    """
+    bboxes = [s_wall.get_chains()[1] for s_wall in s_walls]
+    bboxes = [a_bboxes for a_bboxes in bboxes if len(a_bboxes) > 0]
+    if len(bboxes) == 0:
+        return accuracy
+    bboxes = numpy.concatenate(bboxes)
+    extents = numpy.maximum(
+        bboxes[:, 1] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 2],
+    )
+    return max(numpy.median(extents), accuracy)
+
+
+def find_intersections_of_curves(
+    a_zs, b_zs, accuracy, a_chains=None, b_chains=None,
+):
+    """
+    Find intersections of two curves by splitting them into monotone
+    chains and finding an intersection of each pair of chains whose
+    bounding boxes overlap.
+
+    a_chains and b_chains are (turning points, chain bounding boxes)
+    of the curves, e.g. from get_chains_in_range() applied to
+    SWall.get_chains(), and are calculated when not given.
+    """
+    if a_chains is None:
+        a_tps = get_turning_points(a_zs)
+        a_chains = (a_tps, get_chain_bboxes(a_zs, a_tps))
+    a_tps, a_bboxes = a_chains
     a_z_segs = get_splits_with_overlap(a_tps)
 
-    b_tps = get_turning_points(b_zs)
+    if b_chains is None:
+        b_tps = get_turning_points(b_zs)
+        b_chains = (b_tps, get_chain_bboxes(b_zs, b_tps))
+    b_tps, b_bboxes = b_chains
     b_z_segs = get_splits_with_overlap(b_tps)
 
     intersections = []
 
-    for a_start, a_stop in a_z_segs:
+    for (a_start, a_stop), a_bbox in zip(a_z_segs, a_bboxes):
         a_seg = a_zs[a_start:a_stop]
-        for b_start, b_stop in b_z_segs:
-            b_seg = a_zs[b_start:b_stop]
+        for (b_start, b_stop), b_bbox in zip(b_z_segs, b_bboxes):
+            if not bboxes_overlap(a_bbox, b_bbox, accuracy):
+                continue
+            b_seg = b_zs[b_start:b_stop]
             # Find an intersection on the z-plane.
             try:
                 ip_x, ip_y = find_intersection_of_segments(
@@ -1712,3 +2411,126 @@ def get_joint_data_groups_by_roots(descendant_roots, z, sw_data, accuracy):
             joint_data_groups.append(([root], ode_xs))
 
     return joint_data_groups
+
+
+def find_intersections_with_cgal(
+    get_intersections, a_zs, b_zs, logger_name='loom',
+):
+    """
+    Find the intersections of two curves using the CGAL library,
+    increasing the size of the buffer for the intersections as needed.
+    Returns an array of [x, y] of the intersections, of shape (n, 2).
+    """
+    logger = logging.getLogger(logger_name)
+    buffer_size = 10
+    while True:
+        intersections = numpy.empty((buffer_size, 2), dtype=numpy.float64)
+        num_of_intersections = get_intersections(
+            a_zs, ctypes.c_long(len(a_zs)),
+            b_zs, ctypes.c_long(len(b_zs)),
+            intersections, buffer_size
+        )
+        if num_of_intersections > buffer_size:
+            logger.info('Number of intersections larger than '
+                        'the buffer size; increase its size '
+                        'to {} and find intersections again.'
+                        .format(num_of_intersections))
+            buffer_size = num_of_intersections
+        else:
+            intersections.resize((num_of_intersections, 2))
+            return intersections
+
+
+class JointSearchPool:
+    """
+    A pool of processes finding intersections of S-walls, see
+    SpectralNetwork.get_new_joints_in_processes(). The processes
+    read the coordinates of the S-walls from an array in shared memory,
+    and the pool is reused as long as the array is large enough,
+    otherwise the array is doubled and the processes are restarted.
+    The processes are started when first needed and are stopped
+    when leaving a with statement using the pool.
+    """
+    def __init__(self, n_processes, accuracy):
+        self.n_processes = n_processes
+        self.accuracy = accuracy
+        self.pool = None
+        self.shared_zs = None
+        self.size = 0
+
+    def get_shared_zs(self, num_of_points):
+        """
+        Return the array in shared memory as a complex NumPy array
+        of at least num_of_points elements.
+        """
+        if num_of_points > self.size:
+            self.close()
+            self.size = max(num_of_points, 2 * self.size)
+            self.shared_zs = RawArray(ctypes.c_double, 2 * self.size)
+            self.pool = multiprocessing.Pool(
+                self.n_processes,
+                initializer=init_joint_search_process,
+                initargs=(self.shared_zs, self.accuracy),
+            )
+        return numpy.frombuffer(self.shared_zs, dtype=numpy.complex128)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Data of a process finding intersections of S-walls,
+# see init_joint_search_process().
+joint_search_process_data = {}
+
+
+def init_joint_search_process(shared_zs, accuracy):
+    """
+    Initialize a process of SpectralNetwork.get_new_joints_in_processes()
+    with the coordinates of the S-walls in shared memory.
+    """
+    joint_search_process_data['zs'] = numpy.frombuffer(
+        shared_zs, dtype=numpy.complex128,
+    )
+    joint_search_process_data['accuracy'] = accuracy
+    try:
+        get_intersections = libcgal_get_intersections()
+    except OSError:
+        get_intersections = None
+    joint_search_process_data['get_intersections'] = get_intersections
+
+
+def find_intersections_in_chunk(ranges):
+    """
+    Find the intersections of the pairs of curves
+    [(a_start, a_stop, b_start, b_stop), ...], each curve being
+    a range of the coordinates in shared memory.
+    Returns a list of arrays of [x, y, i_a, t_a, i_b, t_b] of the
+    intersections, see find_intersections_of_polylines().
+    """
+    zs = joint_search_process_data['zs']
+    accuracy = joint_search_process_data['accuracy']
+    get_intersections = joint_search_process_data['get_intersections']
+
+    results = []
+    for a_start, a_stop, b_start, b_stop in ranges:
+        a_zs = zs[a_start:a_stop]
+        b_zs = zs[b_start:b_stop]
+        if get_intersections is not None:
+            results.append(locate_intersections(
+                a_zs, b_zs,
+                find_intersections_with_cgal(get_intersections, a_zs, b_zs),
+            ))
+        else:
+            results.append(find_intersections_of_polylines(
+                a_zs, b_zs, accuracy, return_segments=True,
+            ))
+    return results
@@ -3,6 +3,7 @@ import logging
 import sympy
 
 from cmath import exp, pi, phase
+from collections import OrderedDict
 from sympy import oo
 from numpy.linalg import matrix_rank
 from itertools import combinations
@@ -23,6 +24,20 @@ x, z = sympy.symbols('x z')
 # the path used to trivialize the cover at any given point
 N_PATH_TO_PT = 100
 
+# number of steps used to track the sheets between adjacent waypoints
+# on the horizontal line through the base point,
+# see SWDataWithTrivialization.get_ffr_xs_at_waypoint().
+N_PATH_BETWEEN_WAYPOINTS = 10
+
+# maximum number of waypoints between the base point and the point
+# right below the farthest branching locus,
+# see SWDataWithTrivialization.get_waypoint_spacing().
+N_WAYPOINTS_TO_FARTHEST_BRANCHING_LOCUS = 100
+
+# maximum number of points z at which the sheets are cached,
+# see SWDataWithTrivialization.get_sheets_at_z().
+SHEETS_AT_Z_CACHE_SIZE = 10000
+
 # number of steps for each SEGMENT of the path around a
 # branching point (either branch-point, or irregular singularity)
 # N_PATH_AROUND_PT = 60
@@ -118,6 +133,10 @@ class SWDataWithTrivialization(SWDataBase):
         self.farthest_branching_locus = None
         self.base_point = None
 
+        # Caches of the x's of the sheets in the first fundamental
+        # representation, see get_sheets_at_z().
+        self.reset_sheets_cache()
+
         # Initialize the parent attributes.
         if sw_data_base is not None:
             for name in (
@@ -299,6 +318,8 @@ class SWDataWithTrivialization(SWDataBase):
         if self.branch_cut_rotation is not None:
             self.branch_cut_rotation *= z_rotation
 
+        self.reset_sheets_cache()
+
         logger.info(
             'Analyze ramification points again '
             'to update the local Seiberg-Witten data.'
@@ -428,6 +449,7 @@ class SWDataWithTrivialization(SWDataBase):
         self.reference_ffr_xs, self.reference_xs = self.get_aligned_xs(
             self.base_point,
         )
+        self.reset_sheets_cache()
 
         # Analyze each branch points.
         bps = []
@@ -587,12 +609,15 @@ class SWDataWithTrivialization(SWDataBase):
         if ffr_sheets_along_path is None:
             ffr_sheets_along_path = [[x] for x in ffr_xs_0]
 
+        # x's over all the points of the path.
+        ffr_xs_along_path = self.ffr_curve.get_xs_batch(z_path)
+
         for i, z in enumerate(z_path):
             near_degenerate_branch_locus = False
             if is_path_to_bp is True and abs(z - z_path[-1]) < self.accuracy:
                 near_degenerate_branch_locus = True
 
-            ffr_xs_1 = self.ffr_curve.get_xs(z)
+            ffr_xs_1 = ffr_xs_along_path[i]
 
             # if it's not a path to branch point, check tracking
             # if it's a path to branch point, but we are far from it,
@@ -710,14 +735,107 @@ class SWDataWithTrivialization(SWDataBase):
         """
         Returns a dict of (sheet_index, x) at a point ''z_pt'',
         which cannot be a branch point or a singularity.
+
+        The sheets are tracked along a path from the waypoint nearest
+        to z_pt on the horizontal line through the base point,
+        see get_ffr_xs_at_waypoint(). The result is cached for
+        the exact value of z_pt, keeping the SHEETS_AT_Z_CACHE_SIZE
+        most recently used points.
         """
-        z_path = get_path_to(z_pt, self)
-        sheets = self.get_sheets_along_path(z_path, ffr=ffr)
+        z_pt = complex(z_pt)
+        try:
+            final_ffr_xs = self.ffr_xs_at_z.pop(z_pt)
+        except KeyError:
+            closest_z_pt = get_critical_point_below(z_pt, self)
+            if closest_z_pt is None:
+                x_1 = z_pt.real
+            else:
+                x_1 = closest_z_pt.real
+            k = int(round(
+                (x_1 - self.base_point.real) / self.get_waypoint_spacing()
+            ))
+            z_path = get_path_to(
+                z_pt, self, z_start=self.get_waypoint(k),
+                logger_name=self.logger_name,
+            )
+            sheets = self.get_sheets_along_path(
+                z_path, ffr=True, ffr_xs_0=self.get_ffr_xs_at_waypoint(k),
+            )
+            final_ffr_xs = tuple(s_i[-1] for s_i in sheets)
+            if len(self.ffr_xs_at_z) >= SHEETS_AT_Z_CACHE_SIZE:
+                # Remove the least recently used point.
+                self.ffr_xs_at_z.popitem(last=False)
+        # Put z_pt as the most recently used point.
+        self.ffr_xs_at_z[z_pt] = final_ffr_xs
 
-        final_xs = [s_i[-1] for s_i in sheets]
+        if ffr is True:
+            final_xs = list(final_ffr_xs)
+        else:
+            final_xs = self.get_xs_of_weights_from_ffr_xs(final_ffr_xs)
         final_sheets = {i: x for i, x in enumerate(final_xs)}
         return final_sheets
 
+    def reset_sheets_cache(self):
+        # {z: x's of the sheets at z}, in the order of use.
+        self.ffr_xs_at_z = OrderedDict()
+        # {k: x's of the sheets at self.get_waypoint(k)}
+        self.ffr_xs_at_waypoints = {}
+
+    def get_waypoint_spacing(self):
+        """
+        Return the distance between adjacent waypoints, which is
+        half the minimal horizontal distance among the branching loci
+        unless there are too many waypoints between them.
+        The horizontal line through the base point is below all the
+        branching loci and does not cross any branch cut, therefore
+        any spacing tracks the sheets along it correctly.
+        """
+        return max(
+            self.min_horizontal_distance / 2.0,
+            (abs(self.base_point) + self.farthest_branching_locus) /
+            N_WAYPOINTS_TO_FARTHEST_BRANCHING_LOCUS,
+        )
+
+    def get_waypoint(self, k):
+        """
+        Return the k-th waypoint on the horizontal line
+        through the base point, which is the 0-th waypoint.
+        """
+        return self.base_point + k * self.get_waypoint_spacing()
+
+    def get_ffr_xs_at_waypoint(self, k):
+        """
+        Return the x's of the sheets at the k-th waypoint,
+        tracking the sheets from the nearest waypoint already known
+        along the horizontal line through the base point,
+        which does not cross any branch cut.
+        """
+        if len(self.ffr_xs_at_waypoints) == 0:
+            self.ffr_xs_at_waypoints[0] = tuple(self.reference_ffr_xs)
+
+        # The known waypoints are consecutive and include the base point.
+        if k > 0:
+            k_0 = max(self.ffr_xs_at_waypoints.keys())
+            step = 1
+        else:
+            k_0 = min(self.ffr_xs_at_waypoints.keys())
+            step = -1
+
+        while (k - k_0) * step > 0:
+            z_0 = self.get_waypoint(k_0)
+            z_1 = self.get_waypoint(k_0 + step)
+            z_path = [
+                z_0 + ((z_1 - z_0) / N_PATH_BETWEEN_WAYPOINTS) * i
+                for i in range(N_PATH_BETWEEN_WAYPOINTS + 1)
+            ]
+            sheets = self.get_sheets_along_path(
+                z_path, ffr=True, ffr_xs_0=self.ffr_xs_at_waypoints[k_0],
+            )
+            k_0 += step
+            self.ffr_xs_at_waypoints[k_0] = tuple(s_i[-1] for s_i in sheets)
+
+        return self.ffr_xs_at_waypoints[k]
+
     # TODO: Review this method.
     def get_sheet_monodromy(
         self, z_path, is_higher_bp=False, higher_bp_type=None,
@@ -1178,21 +1296,12 @@ class SWDataWithTrivialization(SWDataBase):
         )
 
 
-def get_path_to(z_pt, sw_data, logger_name='loom'):
+def get_critical_point_below(z_pt, sw_data):
     """
-    Return a rectangular path from the base point to z_pt.
-    If the path has to pass too close to a branch point or a puncture,
-    we avoid the latter by drawing an arc around it.
+    Return z of the branch point or the puncture that a vertical path
+    up to z_pt passes close to, or None if there is no such point.
     """
-    logger = logging.getLogger(logger_name)
-    base_pt = sw_data.base_point
-    closest_z_pt = None
     radius = sw_data.min_horizontal_distance / 2.0
-
-    logger.debug("Constructing a path [{}, {}]".format(base_pt, z_pt))
-
-    # Determine if the path will need to pass
-    # close to a branch point or a puncture.
     for p in (
         sw_data.branch_points + sw_data.regular_punctures +
         sw_data.irregular_punctures
@@ -1204,12 +1313,34 @@ def get_path_to(z_pt, sw_data, logger_name='loom'):
         # based on the fact that the radius is always less
         # than the minimal horizontal separation of them
         if abs(delta_z.real) < radius and delta_z.imag > 0:
-            closest_z_pt = p.z
-            break
+            return p.z
+    return None
+
+
+def get_path_to(z_pt, sw_data, logger_name='loom', z_start=None):
+    """
+    Return a rectangular path from the base point to z_pt.
+    If the path has to pass too close to a branch point or a puncture,
+    we avoid the latter by drawing an arc around it.
+
+    When z_start on the horizontal line through the base point
+    is given, the path starts from z_start instead.
+    """
+    logger = logging.getLogger(logger_name)
+    base_pt = sw_data.base_point
+    if z_start is None:
+        z_start = base_pt
+    radius = sw_data.min_horizontal_distance / 2.0
+
+    logger.debug("Constructing a path [{}, {}]".format(z_start, z_pt))
+
+    # Determine if the path will need to pass
+    # close to a branch point or a puncture.
+    closest_z_pt = get_critical_point_below(z_pt, sw_data)
 
     # If there the path does not pass near a branch point:
     if closest_z_pt is None:
-        z_0 = base_pt
+        z_0 = z_start
         z_1 = 1j * base_pt.imag + z_pt.real
         z_2 = z_pt
         half_steps = int(N_PATH_TO_PT / 2)
@@ -1222,7 +1353,7 @@ def get_path_to(z_pt, sw_data, logger_name='loom'):
 
     # If there the path needs to pass near a branch point:
     else:
-        z_0 = base_pt
+        z_0 = z_start
         z_1 = 1j * base_pt.imag + closest_z_pt.real
         z_2 = 1j * (closest_z_pt.imag - radius) + closest_z_pt.real
         z_3 = closest_z_pt + radius * exp(1j * phase(z_pt - closest_z_pt))
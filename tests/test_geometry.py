@@ -0,0 +1,356 @@
+import itertools
+import numpy
+import sympy
+
+from fractions import Fraction
+
+from loom import geometry
+from loom.geometry import (
+    GData, SWCurve, get_ramification_points_using_resultant,
+)
+
+x, z = sympy.symbols('x z')
+
+
+class AOneGData(object):
+    type = 'A'
+    rank = 1
+
+
+def get_a_one_curve(num_eq=None):
+    curve = SWCurve(
+        casimir_differentials={2: '-z**2 + 1'}, g_data=AOneGData(),
+        diff_params={}, mt_params=None, ffr=True,
+    )
+    if num_eq is not None:
+        curve.num_eq = num_eq
+    return curve
+
+
+def test_get_xs_batch_of_non_monic_curve():
+    zs = numpy.array([2.0 + 0.5j, -0.3 + 1.2j, 0.5 - 2.0j])
+    expected = numpy.sort_complex(numpy.array(
+        [[x_0, -x_0] for x_0 in numpy.sqrt(zs ** 2 - 1)]
+    ))
+    for c_N in [1, 2, z + 3]:
+        curve = get_a_one_curve(sympy.expand(c_N * (x ** 2 - z ** 2 + 1)))
+        xs = numpy.sort_complex(curve.get_xs_batch(zs))
+        assert numpy.allclose(xs, expected, atol=1e-10)
+
+
+class Curve(object):
+    def __init__(self, sym_eq):
+        self.sym_eq = sympy.sympify(sym_eq)
+
+
+def get_ramification_points(sym_eq, accuracy=1e-8):
+    sols = get_ramification_points_using_resultant(
+        curve=Curve(sym_eq), diff_params={}, accuracy=accuracy,
+        punctures=[],
+    )
+    return sorted(
+        [(z_i, x_i, m_x) for z_i, (x_i, m_x) in sols],
+        key=lambda sol: (sol[0].real, sol[0].imag),
+    )
+
+
+def test_get_ramification_points_using_resultant():
+    sols = get_ramification_points('x**2 - z**2 + 1')
+    assert len(sols) == 2
+    for (z_i, x_i, m_x), z_c in zip(sols, [-1, 1]):
+        assert abs(z_i - z_c) < 1e-8
+        assert abs(x_i) < 1e-8
+        assert m_x == 2
+
+    sols = get_ramification_points('x**3 - 3*x + z')
+    assert len(sols) == 2
+    for (z_i, x_i, m_x), (z_c, x_c) in zip(sols, [(-2, -1), (2, 1)]):
+        assert abs(z_i - z_c) < 1e-8
+        assert abs(x_i - x_c) < 1e-8
+        assert m_x == 2
+
+    # A factor of x^2 is removed.
+    sols = get_ramification_points('x**4 - (z - 1)*x**2')
+    assert len(sols) == 1
+    z_i, x_i, m_x = sols[0]
+    assert abs(z_i - 1) < 1e-8
+    assert abs(x_i) < 1e-8
+
+
+def test_get_ramification_points_using_resultant_same_as_discriminant():
+    f = x ** 4 + (z ** 2 - 2) * x ** 2 + (1 + 1j) * z * x + z ** 3 - 1
+    sols = get_ramification_points(f)
+    disc_z_roots = numpy.roots(
+        [complex(c) for c in sympy.Poly(sympy.discriminant(f, x), z)
+         .all_coeffs()]
+    )
+    assert len(sols) == len(disc_z_roots)
+    for z_i, x_i, m_x in sols:
+        assert min(abs(disc_z_roots - z_i)) < 1e-6
+        assert abs(complex(f.subs({z: z_i, x: x_i}))) < 1e-8
+        assert abs(complex(f.diff(x).subs({z: z_i, x: x_i}))) < 1e-8
+
+
+def get_g_data_json(root_system, ffr_weights, roots, weights,
+                     highest_weight, weight_basis=None):
+    """
+    Return the JSON data of a GData in the same form as
+    that from get_g_data.sage, where the weights are
+    in the ambient space of the root system.
+    """
+    ffr_weights = numpy.array(ffr_weights, dtype=float)
+    roots = numpy.array(roots, dtype=float)
+    weights = numpy.array(weights, dtype=float)
+    if weight_basis is None:
+        # Pick linearly independent weights from ffr_weights.
+        weight_basis = []
+        for v in ffr_weights:
+            if (
+                numpy.linalg.matrix_rank(numpy.array(weight_basis + [v]))
+                > len(weight_basis)
+            ):
+                weight_basis.append(v)
+    weight_basis = numpy.array(weight_basis, dtype=float)
+    weight_coefficients = numpy.linalg.lstsq(
+        weight_basis.T, weights.T, rcond=None,
+    )[0].T
+    # The first nonzero coordinate of a positive root is positive.
+    positive_roots = [
+        root for root in roots if root[numpy.nonzero(root)[0][0]] > 0
+    ]
+    return {
+        'root_system': root_system,
+        'type': root_system[0],
+        'rank': int(root_system[1:]),
+        'fundamental_representation_index': highest_weight.index(1) + 1,
+        'highest_weight': highest_weight,
+        'ffr_weights': ffr_weights.tolist(),
+        'roots': roots.tolist(),
+        'positive_roots': numpy.array(positive_roots).tolist(),
+        'weights': weights.tolist(),
+        'multiplicities': [1] * len(weights),
+        'weight_basis': weight_basis.tolist(),
+        'weight_coefficients': weight_coefficients.tolist(),
+    }
+
+
+def get_a_g_data_json(n):
+    """
+    Return the JSON data of the GData of A_n
+    with the first fundamental representation.
+    """
+    ffr_weights = numpy.identity(n + 1)
+    roots = [
+        ffr_weights[i] - ffr_weights[j]
+        for i, j in itertools.permutations(range(n + 1), 2)
+    ]
+    return get_g_data_json(
+        'A{}'.format(n), ffr_weights, roots, ffr_weights,
+        [1] + [0] * (n - 1), weight_basis=ffr_weights,
+    )
+
+
+def get_d_g_data_json(n):
+    """
+    Return the JSON data of the GData of D_n
+    with a spinor representation.
+    """
+    identity = numpy.identity(n)
+    ffr_weights = numpy.concatenate([identity, -identity])
+    roots = [
+        s_i * identity[i] + s_j * identity[j]
+        for i, j in itertools.permutations(range(n), 2)
+        for s_i, s_j in itertools.product([1, -1], repeat=2)
+        if i < j
+    ]
+    weights = [
+        numpy.array(signs) / 2.0
+        for signs in itertools.product([1, -1], repeat=n)
+        if signs.count(-1) % 2 == 0
+    ]
+    return get_g_data_json(
+        'D{}'.format(n), ffr_weights, roots, weights,
+        [0] * (n - 1) + [1], weight_basis=identity,
+    )
+
+
+def get_e_eight_roots():
+    """
+    Return the roots of E_8 in the orthonormal basis of IR^8.
+    """
+    roots = []
+    for i, j in itertools.combinations(range(8), 2):
+        for s_i, s_j in itertools.product([1, -1], repeat=2):
+            root = [Fraction(0)] * 8
+            root[i] = Fraction(s_i)
+            root[j] = Fraction(s_j)
+            roots.append(root)
+    for signs in itertools.product([1, -1], repeat=8):
+        if signs.count(-1) % 2 == 0:
+            roots.append([Fraction(s, 2) for s in signs])
+    return roots
+
+
+def get_weyl_orbit(weight, roots):
+    """
+    Return the orbit of weight under the reflections by roots,
+    where every root has length squared 2.
+    """
+    orbit = [tuple(weight)]
+    i = 0
+    while i < len(orbit):
+        w = orbit[i]
+        for root in roots:
+            w_dot_root = sum(w_k * r_k for w_k, r_k in zip(w, root))
+            image = tuple(
+                w_k - w_dot_root * r_k for w_k, r_k in zip(w, root)
+            )
+            if image not in orbit:
+                orbit.append(image)
+        i += 1
+    return orbit
+
+
+def get_e_g_data_json(n):
+    """
+    Return the JSON data of the GData of E_6 or E_7
+    with its minuscule representation.
+    """
+    if n == 6:
+        roots = [
+            r for r in get_e_eight_roots() if r[5] == r[6] == -r[7]
+        ]
+        highest_weight = [1, 0, 0, 0, 0, 0]
+        omega = [0, 0, 0, 0, 0, Fraction(-2, 3), Fraction(-2, 3),
+                 Fraction(2, 3)]
+    elif n == 7:
+        roots = [r for r in get_e_eight_roots() if r[6] == -r[7]]
+        highest_weight = [0, 0, 0, 0, 0, 0, 1]
+        omega = [0, 0, 0, 0, 0, 1, Fraction(-1, 2), Fraction(1, 2)]
+    weights = get_weyl_orbit(omega, roots)
+    return get_g_data_json(
+        'E{}'.format(n), weights, roots, weights, highest_weight,
+    )
+
+
+def check_g_data_indices(g_data):
+    # A small perturbation does not change the lattice key,
+    # but the perturbed vector is not in the lattice.
+    epsilon = 1e-9 * numpy.arange(1, len(g_data.roots[0]) + 1)
+
+    for i, root in enumerate(g_data.roots):
+        assert g_data.get_root_index(root) == i
+        assert g_data.get_root_index(root + epsilon) is None
+        assert g_data.get_root_index(2 * root) is None
+
+    for i, p_root in enumerate(g_data.positive_roots):
+        assert g_data.get_positive_root_index(p_root) == i
+        assert g_data.get_positive_root_index(-p_root) == i
+        assert g_data.get_positive_root_index(p_root + epsilon) is None
+
+    for ffr, weights in [
+        (False, g_data.weights), (True, g_data.ffr_weights),
+    ]:
+        for i, w in enumerate(weights):
+            assert g_data.get_weight_index(w, ffr=ffr) == i
+            assert g_data.get_weight_index(w + epsilon, ffr=ffr) is None
+
+        for root in g_data.roots:
+            expected = [
+                [i, j]
+                for i, w_1 in enumerate(weights)
+                for j, w_2 in enumerate(weights)
+                if numpy.array_equal(w_2 - w_1, root)
+            ]
+            assert g_data.ordered_weight_pairs(root, ffr=ffr) == expected
+            assert g_data.ordered_weight_pairs(root + epsilon, ffr=ffr) == []
+
+
+def test_g_data_indices():
+    for json_data, n_roots, n_weights in [
+        (get_a_g_data_json(2), 6, 3),
+        (get_a_g_data_json(3), 12, 4),
+        (get_d_g_data_json(4), 24, 8),
+        (get_d_g_data_json(5), 40, 16),
+        (get_e_g_data_json(6), 72, 27),
+        (get_e_g_data_json(7), 126, 56),
+    ]:
+        g_data = GData(json_data=json_data)
+        assert len(g_data.roots) == n_roots
+        assert len(g_data.positive_roots) == n_roots // 2
+        assert len(g_data.weights) == n_weights
+        assert g_data.lattice_key_matrix is None
+        check_g_data_indices(g_data)
+        # The weights are integral in the weight basis
+        # up to a common denominator.
+        assert g_data.lattice_key_matrix is not False
+
+
+def test_g_data_indices_without_lattice_key_matrix(monkeypatch):
+    # The spinor weights of D_4 have coordinates of denominator 2
+    # in the weight basis, and their lattice keys are not found.
+    monkeypatch.setattr(geometry, 'LATTICE_KEY_MAX_DENOMINATOR', 1)
+    g_data = GData(json_data=get_d_g_data_json(4))
+    check_g_data_indices(g_data)
+    assert g_data.lattice_key_matrix is False
+
+
+def test_g_data_from_sage_with_cache(monkeypatch, tmpdir):
+    monkeypatch.setattr(geometry, 'G_DATA_CACHE_DIR', str(tmpdir))
+    json_data = get_a_g_data_json(2)
+    sage_calls = []
+
+    def get_g_data(root_system, highest_weight):
+        sage_calls.append((root_system, highest_weight))
+        return json_data
+
+    monkeypatch.setattr(geometry.sage_subprocess, 'get_g_data', get_g_data)
+
+    # Get the data from Sage and save it to the empty cache.
+    g_data = GData('A2', '1')
+    assert sage_calls == [('A2', [1, 0])]
+    assert len(tmpdir.listdir()) == 1
+    check_g_data_indices(g_data)
+
+    # Load the data from the cache.
+    cached_g_data = GData('A2', '1')
+    assert len(sage_calls) == 1
+    for attr in g_data.data_attributes:
+        assert numpy.array_equal(
+            getattr(cached_g_data, attr), getattr(g_data, attr)
+        )
+    check_g_data_indices(cached_g_data)
+
+
+def test_g_data_cache(monkeypatch, tmpdir):
+    monkeypatch.setattr(geometry, 'G_DATA_CACHE_DIR', str(tmpdir))
+    g_data = GData(json_data=get_a_g_data_json(2))
+    g_data.save_to_cache('A2', '1')
+    assert len(tmpdir.listdir()) == 1
+
+    # Loaded from the cache without Sage.
+    cached_g_data = GData('A2', '1')
+    for attr in g_data.data_attributes:
+        assert numpy.array_equal(
+            getattr(cached_g_data, attr), getattr(g_data, attr)
+        )
+    for root in g_data.roots:
+        for ffr in [False, True]:
+            assert (
+                cached_g_data.ordered_weight_pairs(root, ffr=ffr) ==
+                g_data.ordered_weight_pairs(root, ffr=ffr)
+            )
+    assert cached_g_data.ordered_weight_pairs(2 * g_data.roots[0]) == []
+
+    assert (
+        g_data.get_cache_file_path('A2', '1') !=
+        g_data.get_cache_file_path('A3', '1')
+    )
+
+    # A corrupted cache file is ignored.
+    tmpdir.listdir()[0].write('{')
+    assert cached_g_data.load_from_cache('A2', '1') is False
+
+    # No cache file without the cache directory.
+    monkeypatch.setattr(geometry, 'G_DATA_CACHE_DIR', None)
+    assert g_data.load_from_cache('A2', '1') is False
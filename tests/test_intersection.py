@@ -0,0 +1,81 @@
+import numpy
+
+from loom.intersection import (
+    find_intersections_of_polylines, find_intersection_of_segments,
+)
+
+
+def get_random_polyline(random_state, n_points):
+    steps = (
+        random_state.randn(n_points) + 1j * random_state.randn(n_points)
+    )
+    return numpy.cumsum(steps)
+
+
+def find_intersections_by_brute_force(a_zs, b_zs):
+    """
+    Test every pair of line segments of two polylines
+    in general position.
+    """
+    intersections = []
+    for i in range(len(a_zs) - 1):
+        p = a_zs[i]
+        r = a_zs[i + 1] - p
+        for j in range(len(b_zs) - 1):
+            q = b_zs[j]
+            s = b_zs[j + 1] - q
+            denom = (r.conjugate() * s).imag
+            if denom == 0:
+                continue
+            t = ((q - p).conjugate() * s).imag / denom
+            u = ((q - p).conjugate() * r).imag / denom
+            if 0 <= t <= 1 and 0 <= u <= 1:
+                intersections.append([i, t, j, u])
+    return intersections
+
+
+def test_find_intersections_of_polylines_same_as_brute_force():
+    random_state = numpy.random.RandomState(0)
+    for n_a, n_b in [(2, 2), (10, 30), (60, 60), (200, 50)]:
+        a_zs = get_random_polyline(random_state, n_a)
+        b_zs = get_random_polyline(random_state, n_b)
+        expected = find_intersections_by_brute_force(a_zs, b_zs)
+        ips = find_intersections_of_polylines(
+            a_zs, b_zs, return_segments=True,
+        )
+        assert ips.shape == (len(expected), 6)
+
+        # Compare them in the order of the segments of a_zs.
+        ips = ips[numpy.lexsort((ips[:, 3], ips[:, 2]))]
+        for (ip_x, ip_y, i_a, t_a, i_b, t_b), (i, t, j, u) in zip(
+            ips, sorted(expected)
+        ):
+            ip_z = (1 - t) * a_zs[i] + t * a_zs[i + 1]
+            assert (int(i_a), int(i_b)) == (i, j)
+            assert abs(complex(ip_x, ip_y) - ip_z) < 1e-10
+            assert abs(t_a - t) < 1e-10
+            assert abs(t_b - u) < 1e-10
+
+        # Without the segments.
+        xys = find_intersections_of_polylines(a_zs, b_zs)
+        assert numpy.allclose(
+            numpy.sort(xys[:, 0]), numpy.sort(ips[:, 0]), atol=1e-10,
+        )
+
+
+def test_find_intersections_of_polylines_at_endpoints():
+    # The polylines start from the same point,
+    # and cross each other once.
+    a_zs = numpy.array([0, 1 + 1j, 2 - 1j])
+    b_zs = numpy.array([0, 1 - 1j, 2 + 1j])
+    ips = find_intersections_of_polylines(a_zs, b_zs)
+    assert ips.shape == (1, 2)
+    assert numpy.allclose(ips[0], [1.5, 0])
+
+
+def test_find_intersection_of_segments():
+    segment_1 = (numpy.array([0., 1., 2.]), numpy.array([0., 1., 2.]))
+    segment_2 = (numpy.array([0., 1., 2.]), numpy.array([2., 1.5, 0.]))
+    ip_x, ip_y = find_intersection_of_segments(segment_1, segment_2)
+    assert abs(ip_x - 1.2) < 1e-8
+    assert abs(ip_y - 1.2) < 1e-8
@@ -0,0 +1,201 @@
+import cmath
+import numpy
+import sympy
+
+from loom import constants
+from loom.geometry import SWCurve, SWDiff, typed_ode_f
+from loom.s_wall import (
+    SWall, GrowLibs, Joint, JointIndex, grow_s_walls_in_batch, _grow,
+)
+
+# x^2 = z^2 - 1, with branch points at z = +1 and z = -1.
+BRANCH_POINT_ZS = [1.0 + 0j, -1.0 + 0j]
+
+CONFIG = {
+    'accuracy': 1e-6,
+    'size_of_small_step': 1e-3,
+    'size_of_large_step': 1e-2,
+    'size_of_bp_neighborhood': 0.05,
+    'size_of_pp_neighborhood': 0.05,
+    'size_of_puncture_cutoff': 0.01,
+    'mass_limit': None,
+    'plot_range': None,
+    'use_growth_domain': False,
+    'growth_domain_margin': None,
+    'twist_lines': None,
+    'adaptive_step_tolerance': None,
+    'use_scipy_ode': False,
+    'use_adaptive_step': False,
+}
+
+
+class AOneGData(object):
+    type = 'A'
+    rank = 1
+
+
+class AOneSWData(object):
+    def __init__(self):
+        g_data = AOneGData()
+        self.ffr_curve = SWCurve(
+            casimir_differentials={2: '-z**2 + 1'}, g_data=g_data,
+            diff_params={}, mt_params=None, ffr=True,
+        )
+        self.diff = SWDiff('x', g_data=g_data, diff_params={},
+                           mt_params=None)
+        self.ffr_ramification_points = []
+        self.regular_punctures = []
+        self.irregular_punctures = []
+
+
+def get_grow_libs(config=CONFIG, phase=0.0):
+    libs = GrowLibs(config=config, sw_data=AOneSWData(), phase=phase)
+    if libs.numba_grow is None:
+        # Use the same stepping rule without Numba.
+        libs.numba_grow = _grow
+    return libs
+
+
+def get_seed_s_walls(libs, n_steps=200, r=0.01):
+    """
+    Seed S-walls near the branch point at z = 1,
+    which go away from the branch point.
+    """
+    s_walls = []
+    for k in range(3):
+        z_0 = 1 + r * cmath.exp(2j * cmath.pi * k / 3)
+        x_0 = cmath.sqrt(z_0 ** 2 - 1)
+        dz_dt = libs.c_dz_dt / (2 * x_0)
+        if (dz_dt / (z_0 - 1)).real < 0:
+            x_0 = -x_0
+        s_walls.append(SWall(
+            z_0=z_0, x_0=[x_0, -x_0], M_0=0,
+            label='S-wall #{}'.format(k), n_steps=n_steps,
+        ))
+    return s_walls
+
+
+def test_grow_s_walls_in_batch_same_as_serial():
+    libs = get_grow_libs()
+    serial_s_walls = get_seed_s_walls(libs)
+    for s_wall in serial_s_walls:
+        s_wall.grow(
+            branch_point_zs=BRANCH_POINT_ZS, config=CONFIG, libs=libs,
+            use_scipy_ode=False, method=constants.LIB_NUMBA,
+        )
+
+    batch_s_walls = get_seed_s_walls(libs)
+    errors = grow_s_walls_in_batch(
+        batch_s_walls, branch_point_zs=BRANCH_POINT_ZS, config=CONFIG,
+        libs=libs, method=constants.LIB_NUMBA,
+    )
+
+    assert all(error is None for error in errors.values())
+    for serial_s_wall, batch_s_wall in zip(serial_s_walls, batch_s_walls):
+        assert len(batch_s_wall.z) == len(serial_s_wall.z)
+        # Both start inside the neighborhood of the branch point.
+        assert abs(serial_s_wall.z[1] - 1) < CONFIG['size_of_bp_neighborhood']
+        numpy.testing.assert_allclose(
+            batch_s_wall.z, serial_s_wall.z, rtol=0, atol=1e-8,
+        )
+        numpy.testing.assert_allclose(
+            batch_s_wall.x, serial_s_wall.x, rtol=0, atol=1e-8,
+        )
+        numpy.testing.assert_allclose(
+            batch_s_wall.M, serial_s_wall.M, rtol=0, atol=1e-8,
+        )
+
+
+def test_adaptive_step_same_as_fixed_step_with_fewer_steps():
+    config = dict(CONFIG)
+    config['size_of_large_step'] = 1e-3
+    config['mass_limit'] = 1.0
+    config['adaptive_step_tolerance'] = 1e-8
+    libs = get_grow_libs(config, phase=0.5)
+
+    z_0 = 2.0 + 0j
+    x_0 = cmath.sqrt(z_0 ** 2 - 1)
+    if (libs.c_dz_dt / (2 * x_0) / z_0).real < 0:
+        x_0 = -x_0
+
+    s_walls = {}
+    for method in (constants.LIB_NUMBA, constants.LIB_ADAPTIVE):
+        s_wall = SWall(
+            z_0=z_0, x_0=[x_0, -x_0], M_0=0, label=str(method),
+            n_steps=5000,
+        )
+        s_wall.grow(
+            branch_point_zs=BRANCH_POINT_ZS, config=config, libs=libs,
+            use_scipy_ode=False, method=method,
+        )
+        s_walls[method] = s_wall
+    fixed = s_walls[constants.LIB_NUMBA]
+    adaptive = s_walls[constants.LIB_ADAPTIVE]
+
+    assert len(adaptive.z) < len(fixed.z) / 10
+    # Compare z of the S-walls at the same M.
+    Ms = adaptive.M[adaptive.M <= fixed.M[-1]]
+    assert len(Ms) > 1
+    fixed_zs = (
+        numpy.interp(Ms, fixed.M, fixed.z.real) +
+        1j * numpy.interp(Ms, fixed.M, fixed.z.imag)
+    )
+    adaptive_zs = adaptive.z[:len(Ms)]
+    assert abs(adaptive_zs - fixed_zs).max() < 1e-3
+    # The x's stay on the curve.
+    for z_t, (x_1, x_2) in zip(adaptive.z, adaptive.x):
+        assert abs(x_1 ** 2 - (z_t ** 2 - 1)) < 1e-5
+        assert abs(x_1 + x_2) < 1e-5
+
+
+def test_typed_ode_f_same_as_lambdified():
+    libs = get_grow_libs()
+    x, z = sympy.symbols('x z')
+    f = libs.f
+    F = sympy.lambdify((z, x), sympy.simplify(-f.diff(z) / f.diff(x)))
+    N, n_k, n_c, n_e, d_k, d_c, d_e = libs.typed_phi_k_czes
+    for z_i in [2.0 + 0.5j, -0.3 + 1.2j, 0.5 - 2.0j]:
+        x1_i = cmath.sqrt(z_i ** 2 - 1)
+        x2_i = -x1_i
+        y = numpy.array([z_i, x1_i, x2_i, 0], dtype=numpy.complex128)
+        dy_dt = typed_ode_f(y, N, n_k, n_c, n_e, d_k, d_c, d_e,
+                            libs.c_dz_dt, libs.accuracy)
+        dz_i_dt = libs.c_dz_dt / (x1_i - x2_i)
+        expected = [dz_i_dt, F(z_i, x1_i) * dz_i_dt,
+                    F(z_i, x2_i) * dz_i_dt, 1]
+        assert numpy.allclose(dy_dt, expected, atol=1e-12)
+
+
+def test_joint_index_same_as_linear_search():
+    accuracy = 1e-3
+    random_state = numpy.random.RandomState(0)
+    roots = [numpy.array([1, -1, 0]), numpy.array([0, 1, -1])]
+
+    def get_joint(z, root):
+        return Joint(z=z, M=abs(z), ode_xs=[z, -z], roots=[root])
+
+    joints = []
+    for k in range(200):
+        # Put the joints near the boundaries of the cells.
+        z = complex(*(random_state.randint(-20, 20, 2) * accuracy))
+        joints.append(get_joint(z, roots[k % 2]))
+    joint_index = JointIndex(accuracy, joints)
+
+    n_found = 0
+    for k in range(1000):
+        old_joint = joints[random_state.randint(len(joints))]
+        dz = complex(*(random_state.uniform(-2, 2, 2) * accuracy))
+        joint = get_joint(old_joint.z + dz, roots[k % 2])
+        found = joint_index.find_equal(joint, accuracy)
+        expected = [
+            a_joint for a_joint in joints
+            if joint.is_equal_to(a_joint, accuracy)
+        ]
+        if len(expected) == 0:
+            assert found is None
+        else:
+            n_found += 1
+            assert found is not None
+            assert joint.is_equal_to(found, accuracy)
+    # Both cases are tested.
+    assert 0 < n_found < 1000
@@ -0,0 +1,189 @@
+import itertools
+import numpy
+
+from loom.intersection import (
+    find_intersections_of_polylines, locate_point_on_polyline,
+)
+from loom.s_wall import SWall, JointIndex
+from loom.spectral_network import (
+    SpectralNetwork, get_unsearched_ranges, get_nearer_index,
+)
+
+CONFIG = {
+    'accuracy': 1e-6,
+    'root_system': 'A2',
+    'plot_range': None,
+    'use_growth_domain': False,
+    'growth_domain_margin': None,
+}
+
+
+class ATwoGData(object):
+    type = 'A'
+    rank = 2
+
+
+class ATwoSWData(object):
+    g_data = ATwoGData()
+    branch_points = []
+
+    def is_trivialized(self):
+        return False
+
+
+def get_pairs_of_segments(ranges):
+    """
+    Return the list of the pairs of the indices of line segments
+    [z[i], z[i + 1]] in the pairs of ranges.
+    """
+    pairs = []
+    for (n_z_i, n_z_f), (p_z_i, p_z_f) in ranges:
+        pairs += itertools.product(range(n_z_i, n_z_f), range(p_z_i, p_z_f))
+    return pairs
+
+
+def test_get_unsearched_ranges():
+    for n_range, p_range in [((0, 10), (0, 7)), ((3, 8), (5, 12))]:
+        for n_searched, p_searched in itertools.product(range(14), repeat=2):
+            ranges = get_unsearched_ranges(
+                n_range, p_range, n_searched, p_searched,
+            )
+            pairs = get_pairs_of_segments(ranges)
+            # Each pair of segments is searched at most once.
+            assert len(pairs) == len(set(pairs))
+            # The pairs of segments that have not been searched, i.e.
+            # those with a segment not in the first n_searched and
+            # p_searched data points.
+            expected = [
+                (i, j) for i, j in get_pairs_of_segments([(n_range, p_range)])
+                if i + 1 >= n_searched or j + 1 >= p_searched
+            ]
+            assert sorted(pairs) == sorted(expected)
+
+
+def find_intersections_of_curve_set(
+    points, curve_offsets, num_of_curves, accuracy,
+    intersection_data, max_num_of_intersections,
+):
+    """
+    Find the intersections among the curves as
+    find_intersections_of_curve_set() of the CGAL library does,
+    using find_intersections_of_polylines().
+    """
+    curves = [
+        points[curve_offsets[n]:curve_offsets[n + 1]]
+        for n in range(num_of_curves)
+    ]
+    # The sweep finds each intersection point once.
+    ip_zs = []
+    for a, b in itertools.combinations(range(num_of_curves), 2):
+        for ip_x, ip_y in find_intersections_of_polylines(
+            curves[a], curves[b]
+        ):
+            ip_z = complex(ip_x, ip_y)
+            if all(abs(ip_z - z) > 1e-12 for z in ip_zs):
+                ip_zs.append(ip_z)
+
+    intersections = []
+    for ip_z in ip_zs:
+        incidences = []
+        for n, zs in enumerate(curves):
+            i, t = locate_point_on_polyline(zs, ip_z)
+            if (
+                len(zs) > 1 and
+                abs((1 - t) * zs[i] + t * zs[i + 1] - ip_z) <= accuracy
+            ):
+                incidences.append((n, i, t))
+        for (c_a, i_a, t_a), (c_b, i_b, t_b) in itertools.combinations(
+            incidences, 2
+        ):
+            intersections.append(
+                [ip_z.real, ip_z.imag, c_a, i_a, t_a, c_b, i_b, t_b]
+            )
+    n = min(len(intersections), max_num_of_intersections)
+    intersection_data[:n] = intersections[:n]
+    return len(intersections)
+
+
+def get_s_wall(zs, xs, label):
+    s_wall = SWall(label=label, parents=[label])
+    s_wall.z = numpy.array(zs, dtype=numpy.complex128)
+    s_wall.x = numpy.array(xs, dtype=numpy.complex128)
+    s_wall.M = numpy.arange(len(zs), dtype=numpy.float64)
+    return s_wall
+
+
+def get_s_walls_forming_joints(n_zs, p_zs):
+    """
+    Return two S-walls that form a joint at every intersection.
+    """
+    # The second sheet of n_s_wall is the first sheet of p_s_wall
+    # within the changes of the sheets along the S-walls.
+    n_s_wall = get_s_wall(
+        n_zs, [[1, 2 + 1e-3 * (t % 2)] for t in range(len(n_zs))], 'n',
+    )
+    p_s_wall = get_s_wall(p_zs, [[2.0005, 3]] * len(p_zs), 'p')
+    return n_s_wall, p_s_wall
+
+
+def get_new_joints_in_batch(s_walls, intersection_ledger):
+    spectral_network = SpectralNetwork()
+    spectral_network.intersection_ledger = intersection_ledger
+    spectral_network.joint_index = JointIndex(CONFIG['accuracy'], [])
+    return spectral_network.get_new_joints_in_batch(
+        s_walls, s_walls, CONFIG, ATwoSWData(),
+        find_intersections_of_curve_set,
+    )
+
+
+def test_get_new_joints_in_batch_at_split():
+    # The S-walls intersect at n_s_wall.z[10], where n_s_wall is split
+    # into its searched and unsearched parts, and in the unsearched part
+    # of p_s_wall.
+    n_s_wall, p_s_wall = get_s_walls_forming_joints(
+        numpy.linspace(-1, 1, 21), 1j * numpy.linspace(-1, 1, 20),
+    )
+    new_joints = get_new_joints_in_batch(
+        [n_s_wall, p_s_wall], {'n': 11, 'p': 5},
+    )
+    assert len(new_joints) == 1
+    assert abs(new_joints[0].z) < 1e-12
+    assert numpy.allclose(new_joints[0].ode_xs, [1, 3])
+
+
+def test_get_new_joints_in_batch_same_as_polylines():
+    random_state = numpy.random.RandomState(0)
+    n_tested = 0
+    for k in range(20):
+        n_zs, p_zs = [
+            numpy.cumsum(
+                random_state.randn(50) + 1j * random_state.randn(50)
+            )
+            for i in range(2)
+        ]
+        n_s_wall, p_s_wall = get_s_walls_forming_joints(n_zs, p_zs)
+        n_searched, p_searched = random_state.randint(0, 50, 2)
+        new_joints = get_new_joints_in_batch(
+            [n_s_wall, p_s_wall], {'n': n_searched, 'p': p_searched},
+        )
+
+        expected = []
+        for ip_x, ip_y, i_n, _, i_p, _ in find_intersections_of_polylines(
+            n_zs, p_zs, return_segments=True,
+        ):
+            ip_z = complex(ip_x, ip_y)
+            if (
+                (i_n < n_searched - 1 and i_p < p_searched - 1) or
+                get_nearer_index(n_zs, int(i_n), ip_z) == 0 or
+                get_nearer_index(p_zs, int(i_p), ip_z) == 0
+            ):
+                continue
+            expected.append(ip_z)
+        n_tested += len(expected)
+        assert len(new_joints) == len(expected)
+        assert numpy.allclose(
+            numpy.sort_complex([joint.z for joint in new_joints]),
+            numpy.sort_complex(expected),
+            atol=1e-10,
+        )
+    assert n_tested > 0
@@ -0,0 +1,65 @@
+import numpy
+import sympy
+
+from loom.trivialization import SWDataWithTrivialization, get_path_to
+from tests.test_geometry import get_a_one_curve
+
+x, z = sympy.symbols('x z')
+
+
+class ATwoGData(object):
+    type = 'A'
+    rank = 2
+
+
+class CriticalPoint(object):
+    def __init__(self, z):
+        self.z = z
+
+
+class ATwoSWData(SWDataWithTrivialization):
+    """
+    SWDataWithTrivialization of the curve x^3 - 3x + z,
+    whose branch points are at z = 2 and z = -2, without
+    analyzing the branch points.
+    """
+    def __init__(self, min_horizontal_distance):
+        self.logger_name = 'loom'
+        self.accuracy = 1e-6
+        self.g_data = ATwoGData()
+        self.ffr_curve = get_a_one_curve(x ** 3 - 3 * x + z)
+        self.branch_points = [CriticalPoint(2.0), CriticalPoint(-2.0)]
+        self.regular_punctures = []
+        self.irregular_punctures = []
+        self.min_horizontal_distance = min_horizontal_distance
+        self.farthest_branching_locus = 2.0
+        self.base_point = -4j
+        self.reference_ffr_xs = list(self.ffr_curve.get_xs(self.base_point))
+        self.reset_sheets_cache()
+
+
+def test_get_sheets_at_z_same_as_along_path():
+    # The second minimal horizontal distance is as small as that of
+    # critical points whose real parts differ by 1e-4.
+    for min_horizontal_distance, z_pts in [
+        (4.0, [0.5 + 1j, 1.99 + 2j, -2.5 + 0.5j, 10 + 3j, -7 - 1j]),
+        (1e-4, [0.5 + 1j, 3 + 2j, -2.5 + 0.5j, 10 + 3j, -7 - 1j]),
+    ]:
+        sw_data = ATwoSWData(min_horizontal_distance)
+        for z_pt in z_pts:
+            sheets = sw_data.get_sheets_along_path(
+                get_path_to(z_pt, sw_data), ffr=True,
+            )
+            expected = [s_i[-1] for s_i in sheets]
+            ffr_xs = sw_data.get_sheets_at_z(z_pt, ffr=True)
+            assert numpy.allclose(
+                [ffr_xs[i] for i in range(3)], expected, atol=1e-8,
+            )
+            # From the cache.
+            assert sw_data.get_sheets_at_z(z_pt, ffr=True) == ffr_xs
+        # The waypoints are at most 100 per the distance from the base
+        # point to the farthest branch point, which is 4 + 2, and are
+        # between the real parts of z_pts.
+        spacing = sw_data.get_waypoint_spacing()
+        assert spacing >= 6.0 / 100
+        assert len(sw_data.ffr_xs_at_waypoints) <= 17 / spacing + 2